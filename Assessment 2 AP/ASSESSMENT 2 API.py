@@ -1,32 +1,97 @@
+import time
+STARTUP_T0 = time.perf_counter()
+
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
-import requests
 import json
-from PIL import Image, ImageTk
-import io
-import webbrowser
+import os
+import sys
 from datetime import datetime
 import random
 
+from fetch_engine import FetchEngine
+from mealdb_core import MealDB, DEFAULT_BASE_URL
+from image_cache import ImagePipeline
+from prefetch import PrefetchBuffer
+from catalog import Catalog
+from ingredient_index import IngredientIndex
+from text_search import TextSearch
+from meal_planner import MealPlanner
+from recommender import Recommender
+from results_gallery import ResultsGallery
+from render_layer import RenderBatcher, FieldCache
+from resilience import CLOSED, CircuitOpenError
+from user_store import UserStore
+from stall_watchdog import StallWatchdog
+from meal_cache import DATA_DIR
+import tracing
+from tracing import traced
+
+# requests and PIL are imported lazily by the client and image pipeline
+IMPORTS_DONE = time.perf_counter()
+
 class CuisineExplorer:
     """Main application with enhanced features"""
     
-    def __init__(self, root):
+    def __init__(self, root, measure_startup=False):
         self.root = root
+        self.measure_startup = measure_startup
+        self.startup_times = {"imports_ms": (IMPORTS_DONE - STARTUP_T0) * 1000}
         self.root.title("🌍 Global Cuisine Explorer")
         self.root.geometry("1000x750")
         
         # API base URL
-        self.BASE_URL = "https://www.themealdb.com/api/json/v1/1"
+        self.BASE_URL = DEFAULT_BASE_URL
+        
+        # Local mirror of the catalog (filled by "python catalog.py sync"),
+        # read into memory in the background after the first frame
+        self.catalog = Catalog(load=False)
+        
+        # Headless data layer: response cache, pooled HTTP client, parsing
+        self.core = MealDB(self.BASE_URL, catalog=self.catalog)
+        self.cache = self.core.cache
+        self.client = self.core.client
+        
+        # Recipe thumbnails cached in memory and on disk
+        self.images = ImagePipeline(self.client)
+        self.IMAGE_SIZE = (280, 180)
+        self.ingredient_index = None
+        self.text_search = None
+        self.meal_planner = None
+        self.recommender = None
+        self.results_dialog = None
+        self.results_gallery = None
+        
+        # Next few random and surprise recipes, fetched ahead of time
+        self.random_buffer = PrefetchBuffer("random", self.prefetch_random)
+        self.surprise_buffer = PrefetchBuffer("surprise", self.prefetch_surprise)
+        
+        # Background workers so network calls never block the mainloop
+        self.fetcher = FetchEngine(self.root)
+        
+        # Recipe view updates are batched per idle and only touch changed widgets
+        self.render = RenderBatcher(self.root)
+        self.fields = FieldCache()
+        self.full_recipe_dialog = None
+        self.plan_dialog = None
+        self.offline_polling = False
+        
+        # Actions waiting for the background catalog load (None once it is done)
+        self.catalog_waiting = []
+        # Callbacks waiting for a catalog index being built, by attribute name
+        self.index_waiting = {}
         
         # Current data
         self.current_recipe = None
+        self.renders_skipped = 0
         self.current_country = "All"
         
-        # User data
-        self.favorites = []
-        self.shopping_list = []
-        self.meal_plan = {}
+        # User data, saved between runs and keyed by meal ID
+        self.store = UserStore()
+        self.favorites = self.store.favorites
+        self.shopping_list = self.store.shopping
+        self.shopping_tags = {}
+        self.meal_plan = self.store.meal_plan
         
         # Country data with emoji flags
         self.countries = {
@@ -53,9 +118,62 @@ class CuisineExplorer:
         
         # Setup modern UI
         self.setup_ui()
+        self.fetcher.on_busy_change = self.set_loading
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        # Logs where the mainloop blocks for longer than CUISINE_STALL_MS
+        self.watchdog = StallWatchdog(self.root)
+        self.watchdog.start()
+        
+        # F12 opens live span timings when CUISINE_TRACE is set
+        if tracing.ENABLED:
+            self.root.bind("<F12>", lambda event: self.show_trace_panel())
+        
+        # Show the last viewed recipe straight away from local state
+        last_recipe = self.store.get(self.store.last_viewed)
+        if last_recipe:
+            self.show_recipe(last_recipe)
+        self.startup_times["ui_built_ms"] = (time.perf_counter() - STARTUP_T0) * 1000
+        
+        # Everything that needs the network waits for the first frame
+        self.first_frame_done = False
+        self.root.bind("<Expose>", self.on_first_frame, add="+")
+    
+    def on_first_frame(self, event=None):
+        """Schedule background work once the window has been painted"""
+        if self.first_frame_done:
+            return
+        self.first_frame_done = True
+        # Idle callbacks run in order, so this lands after the pending redraws
+        self.root.after_idle(self.start_background_work)
+    
+    def start_background_work(self):
+        """Load initial data once the window is on screen"""
+        self.startup_times["first_frame_ms"] = (time.perf_counter() - STARTUP_T0) * 1000
+        if self.measure_startup:
+            self.report_startup()
+            self.on_close()
+            return
+        
+        self.fetcher.submit("catalog", self.catalog.load, self.on_catalog_loaded,
+                            self.on_catalog_loaded)
+        self.when_catalog_loaded(self.prepare_indexes)
         
         # Load initial random recipe
-        self.get_random_recipe()
+        if not self.current_recipe:
+            self.get_random_recipe()
+        self.random_buffer.start()
+        self.surprise_buffer.start()
+    
+    def report_startup(self):
+        """Print startup timings and append them to the local startup log"""
+        report = {"time": datetime.now().isoformat(timespec="seconds"),
+                  "last_recipe": self.current_recipe is not None}
+        report.update({key: round(value, 1) for key, value in self.startup_times.items()})
+        line = json.dumps(report)
+        print(line)
+        with open(os.path.join(DATA_DIR, "startup_times.jsonl"), "a", encoding="utf-8") as log:
+            log.write(line + "\n")
     
     def setup_ui(self):
         """Setup the beautiful user interface"""
@@ -67,6 +185,7 @@ class CuisineExplorer:
         header = tk.Frame(main_frame, bg='#2d3436', height=100)
         header.pack(fill='x')
         header.pack_propagate(False)
+        self.header = header
         
         # Title with emoji
         title_frame = tk.Frame(header, bg='#2d3436')
@@ -181,6 +300,18 @@ class CuisineExplorer:
         )
         search_btn.pack(side='left')
         
+        cook_btn = tk.Button(
+            search_frame,
+            text="🥕 What Can I Cook?",
+            command=self.open_ingredient_search,
+            bg='#e17055',
+            fg='white',
+            font=("Segoe UI", 9, "bold"),
+            padx=15,
+            relief='flat'
+        )
+        cook_btn.pack(side='left', padx=(5, 0))
+        
         # Main content area
         content_frame = tk.Frame(main_frame, bg='#f0f4f8')
         content_frame.pack(fill='both', expand=True, padx=20, pady=10)
@@ -207,9 +338,14 @@ class CuisineExplorer:
         recipe_content = tk.Frame(left_frame, bg='white')
         recipe_content.pack(fill='both', expand=True, padx=20, pady=20)
         
-        # Recipe info (country, category, tags)
+        # Recipe info (country, category, tags), filled in by render_recipe
         self.info_frame = tk.Frame(recipe_content, bg='white')
         self.info_frame.pack(fill='x', pady=(0, 15))
+        self.area_label = tk.Label(self.info_frame, bg='white',
+                                   font=("Segoe UI", 10, "bold"), fg='#0984e3')
+        self.category_label = tk.Label(self.info_frame, bg='white', font=("Segoe UI", 10))
+        self.tag_labels = [tk.Label(self.info_frame, bg='white', font=("Segoe UI", 9),
+                                    fg='#636e72') for _ in range(2)]
         
         # Image and details frame
         details_frame = tk.Frame(recipe_content, bg='white')
@@ -300,6 +436,7 @@ class CuisineExplorer:
             ("📖 View Full Recipe", self.show_full_recipe, '#00cec9'),
             ("▶ Watch Tutorial", self.open_video, '#6c5ce7'),
             ("🔄 Surprise Me", self.get_surprise_meal, '#fd79a8'),
+            ("✨ More Like This", self.show_similar, '#e17055'),
             ("📋 Copy Ingredients", self.copy_ingredients, '#00b894')
         ]
         
@@ -328,6 +465,15 @@ class CuisineExplorer:
             font=("Segoe UI", 9)
         )
         self.status_bar.pack(side='bottom', fill='x')
+        
+        # Shown under the header while the circuit breaker keeps the API offline
+        self.offline_banner = tk.Label(
+            main_frame,
+            bg='#d63031',
+            fg='white',
+            font=("Segoe UI", 10, "bold"),
+            pady=6
+        )
     
     def setup_favorites_tab(self, parent):
         """Setup favorites tab"""
@@ -343,6 +489,9 @@ class CuisineExplorer:
         )
         self.favorites_listbox.pack(fill='both', expand=True, padx=10, pady=5)
         
+        for meal_id in self.favorites:
+            self.favorites_listbox.insert(tk.END, self.store.get(meal_id).name)
+        
         # Bind double-click to load recipe
         self.favorites_listbox.bind('<Double-Button-1>', self.load_favorite)
     
@@ -360,9 +509,11 @@ class CuisineExplorer:
         )
         self.shopping_text.pack(fill='both', expand=True, padx=10, pady=5)
         
-        # Add some default items
-        self.shopping_text.insert(tk.END, "• Olive oil\n• Salt\n• Black pepper\n• Garlic\n• Onions")
-        self.shopping_text.config(state='disabled')
+        # Add some default items the first time the app runs
+        if not self.store.shopping_started:
+            for item in ["Olive oil", "Salt", "Black pepper", "Garlic", "Onions"]:
+                self.store.add_shopping_item(item)
+        self.render_shopping_items(list(self.shopping_list.items))
         
         # Clear button
         tk.Button(parent, text="Clear List", command=self.clear_shopping_list,
@@ -384,28 +535,40 @@ class CuisineExplorer:
             tk.Label(frame, text=day[:3], width=8, anchor='w',
                     bg='#f8f9fa', font=("Segoe UI", 9, "bold")).pack(side='left')
             
-            label = tk.Label(frame, text="Not planned", anchor='w',
-                           bg='#f8f9fa', font=("Segoe UI", 9))
+            planned = self.store.get(self.meal_plan.get(day))
+            label = tk.Label(frame, text=planned.name if planned else "Not planned",
+                           anchor='w', bg='#f8f9fa', font=("Segoe UI", 9))
             label.pack(side='left', fill='x', expand=True)
+            label.bind('<Double-Button-1>', lambda event, day=day: self.load_planned_meal(day))
             self.mealplan_labels[day] = label
+        
+        # Let the planner pick a week that shares ingredients
+        tk.Button(parent, text="✨ Auto-plan Week", command=self.open_auto_plan,
+                 bg='#6c5ce7', fg='white', relief='flat').pack(pady=10)
     
     def get_random_recipe(self):
         """Fetch a random recipe"""
         self.set_status("Fetching a random recipe from around the world...")
         
-        try:
-            response = requests.get(f"{self.BASE_URL}/random.php")
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data.get("meals"):
-                    self.current_recipe = data["meals"][0]
-                    self.display_recipe()
-                    self.set_status(f"Loaded {self.current_recipe['strMeal']} from {self.current_recipe.get('strArea', 'Unknown')}")
-                else:
-                    messagebox.showerror("Error", "No recipe found")
-        except Exception as e:
-            messagebox.showerror("Connection Error", str(e))
+        item = self.random_buffer.pop()
+        if item:
+            self.show_prefetched(*item)
+            meal = self.current_recipe
+            self.set_status(f"Loaded {meal.name} from {meal.area or 'Unknown'}")
+            return
+        
+        def work():
+            return self.core.random_recipe()
+        
+        def done(meal):
+            if meal:
+                self.show_recipe(meal)
+                self.set_status(f"Loaded {meal.name} from {meal.area or 'Unknown'}")
+            else:
+                messagebox.showerror("Error", "No recipe found")
+        
+        self.fetcher.submit("recipe", work, done,
+                            lambda e: self.show_error(e, "Connection Error"))
     
     def filter_by_country(self, event=None):
         """Filter recipes by country"""
@@ -415,20 +578,7 @@ class CuisineExplorer:
             return
         
         self.set_status(f"Finding {country} recipes...")
-        
-        try:
-            response = requests.get(f"{self.BASE_URL}/filter.php?a={country}")
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data.get("meals"):
-                    # Pick random recipe from this country
-                    meal_id = random.choice(data["meals"])["idMeal"]
-                    self.get_recipe_by_id(meal_id)
-                else:
-                    messagebox.showinfo("No Recipes", f"No {country} recipes found")
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
+        self.load_random_from(f"No {country} recipes found", area=country)
     
     def filter_by_category(self, event=None):
         """Filter recipes by category"""
@@ -438,19 +588,45 @@ class CuisineExplorer:
             return
         
         self.set_status(f"Finding {category} recipes...")
+        self.load_random_from(f"No {category} recipes found", category=category)
+    
+    def load_random_from(self, empty_message, area=None, category=None, show_all=True):
+        """Load a random meal matching a filter; show_all also lists every match in the gallery"""
+        title = f"{area or category} Recipes"
+        
+        # A synced local catalog answers instantly and offline
+        if self.catalog.ready:
+            listing = self.core.filter_meals(area=area, category=category)
+            self.fetcher.cancel("recipe")
+            if listing:
+                meal = self.catalog.get(random.choice(listing)[0])
+                self.show_recipe(meal)
+                self.set_status(f"Loaded {meal.name} from {meal.area or 'Unknown'}")
+                if show_all:
+                    self.show_results(title, listing)
+            else:
+                messagebox.showinfo("No Recipes", empty_message)
+            return
         
-        try:
-            response = requests.get(f"{self.BASE_URL}/filter.php?c={category}")
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data.get("meals"):
-                    meal_id = random.choice(data["meals"])["idMeal"]
-                    self.get_recipe_by_id(meal_id)
-                else:
-                    messagebox.showinfo("No Recipes", f"No {category} recipes found")
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
+        def work():
+            listing = self.core.filter_meals(area=area, category=category)
+            if not listing:
+                return None
+            return self.core.lookup(random.choice(listing)[0]), listing
+        
+        def done(result):
+            if result and result[0]:
+                meal, listing = result
+                self.show_recipe(meal)
+                self.set_status(f"Loaded {meal.name} from {meal.area or 'Unknown'}")
+                if show_all:
+                    self.show_results(title, listing)
+            else:
+                messagebox.showinfo("No Recipes", empty_message)
+        
+        self.fetcher.submit("recipe", work, done,
+                            self.show_error,
+                            key=("filter", area, category))
     
     def search_recipe(self):
         """Search recipe by name"""
@@ -461,70 +637,177 @@ class CuisineExplorer:
         
         self.set_status(f"Searching for '{search_term}'...")
         
-        try:
-            response = requests.get(f"{self.BASE_URL}/search.php?s={search_term}")
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data.get("meals"):
-                    self.current_recipe = data["meals"][0]
-                    self.display_recipe()
-                    self.set_status(f"Found '{search_term}'!")
-                else:
-                    messagebox.showinfo("Not Found", f"No recipes found for '{search_term}'")
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
+        # Typo-tolerant search over names, tags and instructions of the local catalog
+        if self.catalog.ready:
+            self.fetcher.cancel("recipe")
+            self.with_index("text_search", TextSearch,
+                            lambda search: self.show_search_results(search_term, search))
+            return
+        
+        def work():
+            return self.core.search(search_term)
+        
+        def done(meals):
+            if meals:
+                self.show_recipe(meals[0])
+                self.set_status(f"Found {len(meals)} recipes for '{search_term}'")
+                if len(meals) > 1:
+                    self.show_results(f"Search Results - {search_term}",
+                                      [(meal.id, meal.name, meal.thumb) for meal in meals])
+            else:
+                messagebox.showinfo("Not Found", f"No recipes found for '{search_term}'")
+        
+        self.fetcher.submit("recipe", work, done,
+                            self.show_error,
+                            key=("search", search_term))
+    
+    def show_search_results(self, search_term, search):
+        """Show the best local match and list every other one in the gallery"""
+        total, hits = search.search(search_term)
+        if not total:
+            messagebox.showinfo("Not Found", f"No recipes found for '{search_term}'")
+            return
+        self.show_recipe(self.catalog.get(hits[0][0]))
+        self.set_status(f"Found {total} recipes for '{search_term}'")
+        if total > 1:
+            _, hits = search.search(search_term, 0, total)
+            meals = [self.catalog.get(meal_id) for meal_id, _ in hits]
+            self.show_results(f"Search Results - {search_term}",
+                              [(meal.id, meal.name, meal.thumb) for meal in meals])
+    
+    def show_results(self, title, items):
+        """Show every match as a thumbnail card in the results gallery"""
+        if self.results_dialog is not None and self.results_dialog.winfo_exists():
+            # Reuse the open gallery and its cards
+            self.results_dialog.title(title)
+            self.results_gallery.set_items(items)
+            return
+        
+        dialog = tk.Toplevel(self.root)
+        dialog.title(title)
+        dialog.geometry("520x520")
+        dialog.configure(bg='white')
+        self.results_dialog = dialog
+        
+        def open_item(item):
+            meal_id = item[0]
+            recipe = self.catalog.get(meal_id) if self.catalog.ready else None
+            if recipe:
+                self.fetcher.cancel("recipe")
+                self.show_recipe(recipe)
+            else:
+                self.get_recipe_by_id(meal_id)
+        
+        self.results_gallery = ResultsGallery(dialog, self.images, self.fetcher, open_item)
+        self.results_gallery.pack(fill='both', expand=True, padx=10, pady=10)
+        self.results_gallery.set_items(items)
+        
+        def close():
+            self.results_gallery.destroy()
+            dialog.destroy()
+        
+        dialog.protocol("WM_DELETE_WINDOW", close)
     
     def get_recipe_by_id(self, meal_id):
         """Fetch recipe by ID"""
+        def work():
+            return self.core.lookup(meal_id)
+        
+        def done(meal):
+            if meal:
+                self.show_recipe(meal)
+        
+        self.fetcher.submit("recipe", work, done,
+                            self.show_error,
+                            key=("lookup", meal_id))
+    
+    def show_recipe(self, meal):
+        """Make a fetched meal the current recipe and display it"""
+        # Opening the recipe that is already on screen needs no re-render
+        if self.current_recipe is not None and meal.id == self.current_recipe.id:
+            self.renders_skipped += 1
+            return
+        self.current_recipe = meal
+        self.display_recipe()
+        self.store.set_last_viewed(meal)
+    
+    def show_prefetched(self, meal, img):
+        """Display a recipe taken from a prefetch buffer"""
+        # Anything still loading was requested before this click
+        self.fetcher.cancel("recipe")
+        if img is not None:
+            self.images.to_photo(meal.thumb, self.IMAGE_SIZE, img)
+        self.show_recipe(meal)
+    
+    def prefetch_random(self):
+        """Fetch a random recipe and its thumbnail (prefetch thread)"""
+        meal = self.core.random_recipe()
+        if not meal:
+            return None
+        return meal, self.prefetch_image(meal)
+    
+    def prefetch_surprise(self):
+        """Fetch a surprise recipe and its thumbnail (prefetch thread)"""
+        if random.choice([True, False]):
+            field = "country"
+            value = random.choice(list(self.countries.keys())[1:])  # Skip "All"
+            meal = self.core.random_filtered(area=value)
+        else:
+            field = "category"
+            value = random.choice(list(self.categories.keys())[1:])
+            meal = self.core.random_filtered(category=value)
+        
+        if not meal:
+            return None
+        return meal, self.prefetch_image(meal), field, value
+    
+    def prefetch_image(self, meal):
+        """Load a meal's thumbnail into the image cache, ignoring failures"""
+        if not meal.thumb:
+            return None
         try:
-            response = requests.get(f"{self.BASE_URL}/lookup.php?i={meal_id}")
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data.get("meals"):
-                    self.current_recipe = data["meals"][0]
-                    self.display_recipe()
+            return self.images.load(meal.thumb, self.IMAGE_SIZE)
         except Exception as e:
-            messagebox.showerror("Error", str(e))
+            print(f"Image error: {e}")
+            return None
     
     def display_recipe(self):
-        """Display the current recipe"""
+        """Display the current recipe once Tk is idle"""
+        self.render.schedule("recipe", self.render_recipe)
+    
+    @traced("render.display_recipe")
+    def render_recipe(self):
+        """Update the recipe view in place, touching only what changed"""
         if not self.current_recipe:
             return
         
         # Update title
-        self.recipe_title.config(text=self.current_recipe["strMeal"])
-        
-        # Update info frame
-        for widget in self.info_frame.winfo_children():
-            widget.destroy()
+        self.fields.config(self.recipe_title, text=self.current_recipe.name)
         
         # Country flag and name
-        country = self.current_recipe.get("strArea", "Unknown")
+        country = self.current_recipe.area or "Unknown"
         flag = self.countries.get(country, "🌐")
-        tk.Label(self.info_frame, text=f"{flag} {country}", 
-                bg='white', font=("Segoe UI", 10, "bold"),
-                fg='#0984e3').pack(side='left', padx=5)
+        self.fields.config(self.area_label, text=f"{flag} {country}")
+        self.fields.show(self.area_label, side='left', padx=5)
         
         # Category
-        category = self.current_recipe.get("strCategory", "Unknown")
+        category = self.current_recipe.category or "Unknown"
         cat_icon = self.categories.get(category, "🍽️")
-        tk.Label(self.info_frame, text=f" • {cat_icon} {category}", 
-                bg='white', font=("Segoe UI", 10)).pack(side='left', padx=5)
+        self.fields.config(self.category_label, text=f" • {cat_icon} {category}")
+        self.fields.show(self.category_label, side='left', padx=5)
         
-        # Tags if available
-        tags = self.current_recipe.get("strTags", "")
-        if tags:
-            for tag in tags.split(",")[:2]:
-                tk.Label(self.info_frame, text=f" • #{tag.strip()}", 
-                        bg='white', font=("Segoe UI", 9),
-                        fg='#636e72').pack(side='left', padx=5)
+        # Tags if available (at most two labels, kept and hidden when unused)
+        tags = self.current_recipe.tags[:2]
+        for i, label in enumerate(self.tag_labels):
+            if i < len(tags):
+                self.fields.config(label, text=f" • #{tags[i]}")
+            self.fields.show(label, i < len(tags), side='left', padx=5)
         
         # Update info cards with estimated values
-        self.cards["prep_time"].config(text=f"{random.randint(15, 60)} mins")
-        self.cards["difficulty"].config(text=random.choice(["Easy", "Medium", "Hard"]))
-        self.cards["servings"].config(text=f"{random.randint(2, 8)} people")
+        self.fields.config(self.cards["prep_time"], text=f"{random.randint(15, 60)} mins")
+        self.fields.config(self.cards["difficulty"],
+                           text=random.choice(["Easy", "Medium", "Hard"]))
+        self.fields.config(self.cards["servings"], text=f"{random.randint(2, 8)} people")
         
         # Load image
         self.load_recipe_image()
@@ -534,38 +817,39 @@ class CuisineExplorer:
     
     def load_recipe_image(self):
         """Load and display recipe image"""
-        image_url = self.current_recipe.get("strMealThumb")
+        image_url = self.current_recipe.thumb
         if not image_url:
+            # Drop the previous recipe's photo and any download still on its way
+            self.fetcher.cancel("image")
+            self.fields.config(self.image_label, image='')
+            self.image_label.image = None
             return
         
-        try:
-            response = requests.get(image_url)
-            img_data = response.content
-            
-            img = Image.open(io.BytesIO(img_data))
-            img = img.resize((280, 180), Image.Resampling.LANCZOS)
-            photo = ImageTk.PhotoImage(img)
-            
-            self.image_label.config(image=photo)
+        # Already decoded and resized - no network, no resize
+        photo = self.images.get_photo(image_url, self.IMAGE_SIZE)
+        if photo:
+            self.fetcher.cancel("image")
+            self.fields.config(self.image_label, image=photo)
             self.image_label.image = photo
-            
-        except Exception as e:
-            print(f"Image error: {e}")
+            return
+        
+        def work():
+            return self.images.load(image_url, self.IMAGE_SIZE)
+        
+        def done(img):
+            # PhotoImage must be created on the Tk thread
+            photo = self.images.to_photo(image_url, self.IMAGE_SIZE, img)
+            self.fields.config(self.image_label, image=photo)
+            self.image_label.image = photo
+        
+        self.fetcher.submit("image", work, done,
+                            lambda e: print(f"Image error: {e}"), key=image_url)
     
+    @traced("render.display_ingredients")
     def display_ingredients(self):
         """Display recipe ingredients"""
-        self.ingredients_text.delete(1.0, tk.END)
-        
-        ingredients = []
-        for i in range(1, 21):
-            ingredient = self.current_recipe.get(f"strIngredient{i}")
-            measure = self.current_recipe.get(f"strMeasure{i}")
-            
-            if ingredient and ingredient.strip():
-                ingredients.append(f"• {measure.strip()} {ingredient.strip()}")
-        
-        self.ingredients_text.insert(tk.END, "\n".join(ingredients))
-        self.ingredients_text.config(state='normal')
+        ingredients = self.current_recipe.ingredient_lines("• ")
+        self.fields.set_text(self.ingredients_text, "\n".join(ingredients))
     
     def add_to_favorites(self):
         """Add current recipe to favorites"""
@@ -573,9 +857,8 @@ class CuisineExplorer:
             messagebox.showwarning("Warning", "No recipe selected")
             return
         
-        recipe_name = self.current_recipe["strMeal"]
-        if recipe_name not in self.favorites:
-            self.favorites.append(recipe_name)
+        recipe_name = self.current_recipe.name
+        if self.store.add_favorite(self.current_recipe):
             self.favorites_listbox.insert(tk.END, recipe_name)
             self.set_status(f"Added '{recipe_name}' to favorites!")
         else:
@@ -585,29 +868,53 @@ class CuisineExplorer:
         """Load a recipe from favorites"""
         selection = self.favorites_listbox.curselection()
         if selection:
-            recipe_name = self.favorites_listbox.get(selection[0])
-            self.search_var.set(recipe_name)
-            self.search_recipe()
+            # Saved snapshot - no network needed
+            recipe = self.store.get(self.favorites[selection[0]])
+            self.fetcher.cancel("recipe")
+            self.show_recipe(recipe)
+            self.set_status(f"Opened favorite '{recipe.name}'")
+    
+    def load_planned_meal(self, day):
+        """Open the recipe planned for a day"""
+        recipe = self.store.get(self.meal_plan.get(day))
+        if recipe:
+            self.fetcher.cancel("recipe")
+            self.show_recipe(recipe)
     
     def add_to_shopping_list(self):
         """Add recipe ingredients to shopping list"""
         if not self.current_recipe:
             return
         
+        changed = self.store.add_recipe_to_shopping(self.current_recipe)
+        if not changed:
+            self.set_status("This recipe is already on your shopping list")
+            return
+        
+        self.render_shopping_items(changed)
+        self.set_status("Ingredients added to shopping list!")
+    
+    def render_shopping_items(self, keys):
+        """Rewrite only the shopping list lines whose items changed"""
         self.shopping_text.config(state='normal')
         
-        for i in range(1, 21):
-            ingredient = self.current_recipe.get(f"strIngredient{i}")
-            if ingredient and ingredient.strip():
-                item = f"• {ingredient.strip()}\n"
-                if item not in self.shopping_text.get(1.0, tk.END):
-                    self.shopping_text.insert(tk.END, item)
+        for key in keys:
+            line = f"• {self.shopping_list.items[key].text()}\n"
+            tag = self.shopping_tags.get(key)
+            if tag is None:
+                tag = self.shopping_tags[key] = f"item{len(self.shopping_tags)}"
+                self.shopping_text.insert(tk.END, line, (tag,))
+            else:
+                start, end = self.shopping_text.tag_ranges(tag)
+                self.shopping_text.delete(start, end)
+                self.shopping_text.insert(start, line, (tag,))
         
         self.shopping_text.config(state='disabled')
-        self.set_status("Ingredients added to shopping list!")
     
     def clear_shopping_list(self):
         """Clear the shopping list"""
+        self.store.clear_shopping()
+        self.shopping_tags.clear()
         self.shopping_text.config(state='normal')
         self.shopping_text.delete(1.0, tk.END)
         self.shopping_text.config(state='disabled')
@@ -618,11 +925,20 @@ class CuisineExplorer:
         if not self.current_recipe:
             return
         
-        # Simple dialog to select day
+        # Simple dialog to select day, built once and shown again on later clicks
+        if self.plan_dialog is None:
+            self.plan_dialog = self.build_plan_dialog()
+        dialog = self.plan_dialog
+        dialog.deiconify()
+        dialog.lift()
+    
+    def build_plan_dialog(self):
+        """Create the hidden-on-close day picker used by add_to_meal_plan"""
         dialog = tk.Toplevel(self.root)
         dialog.title("Plan This Meal")
         dialog.geometry("300x200")
         dialog.configure(bg='white')
+        dialog.protocol("WM_DELETE_WINDOW", dialog.withdraw)
         
         tk.Label(dialog, text="Select day for this meal:", 
                 font=("Segoe UI", 12), bg='white').pack(pady=20)
@@ -638,28 +954,108 @@ class CuisineExplorer:
         
         def save_meal_plan():
             day = day_var.get()
-            meal = self.current_recipe["strMeal"]
+            meal = self.current_recipe.name
+            self.store.plan_meal(day, self.current_recipe)
             self.mealplan_labels[day].config(text=meal)
-            self.meal_plan[day] = meal
-            dialog.destroy()
+            dialog.withdraw()
             self.set_status(f"Planned '{meal}' for {day}")
         
         tk.Button(dialog, text="Save", command=save_meal_plan,
                  bg='#00b894', fg='white', padx=20).pack(pady=20)
+        return dialog
+    
+    def open_auto_plan(self):
+        """Fill the week with recipes that keep the shopping list short"""
+        if not self.catalog.ready:
+            messagebox.showinfo("Catalog Needed",
+                                "Auto-planning picks from the local catalog.\n"
+                                "Run 'python catalog.py sync' once, then restart.")
+            return
+        
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Auto-plan Week")
+        dialog.geometry("320x260")
+        dialog.configure(bg='white')
+        
+        tk.Label(dialog, text="Country:", font=("Segoe UI", 10), bg='white').pack(pady=(15, 2))
+        area_var = tk.StringVar(value="All")
+        ttk.Combobox(dialog, textvariable=area_var, values=list(self.countries.keys()),
+                     state="readonly").pack()
+        
+        tk.Label(dialog, text="Category:", font=("Segoe UI", 10), bg='white').pack(pady=(10, 2))
+        category_var = tk.StringVar(value="All")
+        ttk.Combobox(dialog, textvariable=category_var, values=list(self.categories.keys()),
+                     state="readonly").pack()
+        
+        keep_var = tk.BooleanVar(value=True)
+        tk.Checkbutton(dialog, text="Keep meals already planned", variable=keep_var,
+                      bg='white').pack(pady=10)
+        
+        def plan():
+            area = area_var.get()
+            category = category_var.get()
+            days = list(self.mealplan_labels)
+            fixed_days = [day for day in days
+                          if keep_var.get() and self.store.get(self.meal_plan.get(day))]
+            fixed = [self.store.get(self.meal_plan[day]) for day in fixed_days]
+            open_days = [day for day in days if day not in fixed_days]
+            dialog.destroy()
+            self.set_status("Planning your week...")
+            
+            def start(planner):
+                def work():
+                    return planner.plan(days=len(days), fixed=fixed,
+                                        areas={area} if area != "All" else None,
+                                        categories={category} if category != "All" else None)
+                
+                self.fetcher.submit("plan", work, done,
+                                    self.show_error)
+            
+            def done(result):
+                week, distinct = result
+                new = week[len(fixed):]
+                if not new and open_days:
+                    messagebox.showinfo("No Recipes", "No recipes match those filters")
+                    return
+                for day, recipe in zip(open_days, new):
+                    self.store.plan_meal(day, recipe)
+                    self.mealplan_labels[day].config(text=recipe.name)
+                self.set_status(f"Planned {len(new)} meals using {distinct} ingredients "
+                                f"(not counting staples)")
+            
+            self.when_catalog_loaded(
+                lambda: self.with_index("meal_planner", MealPlanner, start))
+        
+        tk.Button(dialog, text="Plan", command=plan,
+                 bg='#00b894', fg='white', padx=20).pack(pady=5)
     
     def show_full_recipe(self):
         """Show full recipe details"""
         if not self.current_recipe:
             return
         
+        # One window is kept and refilled; closing it only hides it
+        if self.full_recipe_dialog is None:
+            self.full_recipe_dialog = self.build_full_recipe_dialog()
+        dialog, title, instructions_text = self.full_recipe_dialog
+        
+        name = self.current_recipe.name
+        dialog.title(f"{name} - Full Recipe")
+        self.fields.config(title, text=name)
+        self.fields.set_text(instructions_text, self.current_recipe.instructions, disabled=True)
+        dialog.deiconify()
+        dialog.lift()
+    
+    def build_full_recipe_dialog(self):
+        """Create the full recipe window; returns (dialog, title label, instructions text)"""
         dialog = tk.Toplevel(self.root)
-        dialog.title(f"{self.current_recipe['strMeal']} - Full Recipe")
         dialog.geometry("600x500")
         dialog.configure(bg='white')
+        dialog.protocol("WM_DELETE_WINDOW", dialog.withdraw)
         
         # Title
-        tk.Label(dialog, text=self.current_recipe["strMeal"], 
-                font=("Segoe UI", 18, "bold"), bg='white').pack(pady=10)
+        title = tk.Label(dialog, font=("Segoe UI", 18, "bold"), bg='white')
+        title.pack(pady=10)
         
         # Instructions
         tk.Label(dialog, text="Instructions:", font=("Segoe UI", 12, "bold"),
@@ -672,52 +1068,321 @@ class CuisineExplorer:
             relief='flat'
         )
         instructions_text.pack(fill='both', expand=True, padx=20, pady=(0, 20))
+        return dialog, title, instructions_text
+    
+    def open_ingredient_search(self):
+        """Find recipes that use the ingredients you have"""
+        if not self.catalog.ready:
+            messagebox.showinfo("No Catalog",
+                                "Run 'python catalog.py sync' to download the recipe catalog first")
+            return
+        
+        dialog = tk.Toplevel(self.root)
+        dialog.title("What Can I Cook?")
+        dialog.geometry("450x450")
+        dialog.configure(bg='white')
+        
+        tk.Label(dialog, text="Ingredients you have (comma separated):",
+                font=("Segoe UI", 11), bg='white').pack(anchor='w', padx=20, pady=(15, 5))
+        
+        ingredients_var = tk.StringVar()
+        entry = tk.Entry(dialog, textvariable=ingredients_var, font=("Segoe UI", 10),
+                        relief='solid', bd=1)
+        entry.pack(fill='x', padx=20)
+        entry.focus_set()
+        
+        require_all = tk.BooleanVar(value=False)
+        tk.Checkbutton(dialog, text="Only recipes that use all of them",
+                      variable=require_all, bg='white').pack(anchor='w', padx=20, pady=5)
+        
+        results = tk.Listbox(dialog, font=("Segoe UI", 10), bg='#f8f9fa', relief='flat')
+        results.pack(fill='both', expand=True, padx=20, pady=(5, 20))
+        matches = []
+        
+        def find(event=None):
+            wanted = [name for name in ingredients_var.get().split(",") if name.strip()]
+            self.with_index("ingredient_index", IngredientIndex,
+                            lambda index: show(wanted, index.search(wanted, require_all.get())))
+        
+        def show(wanted, found):
+            if not results.winfo_exists():
+                return  # Closed while the index was building
+            matches[:] = found
+            results.delete(0, tk.END)
+            for meal_id, matched, total in matches:
+                meal = self.catalog.get(meal_id)
+                results.insert(tk.END, f"{matched}/{len(wanted)} • {meal.name} ({total} ingredients)")
+            self.set_status(f"{len(matches)} recipes use your ingredients")
+        
+        def load(event=None):
+            selection = results.curselection()
+            if selection:
+                self.fetcher.cancel("recipe")
+                self.show_recipe(self.catalog.get(matches[selection[0]][0]))
+        
+        entry.bind('<Return>', find)
+        results.bind('<Double-Button-1>', load)
+        tk.Button(dialog, text="Find Recipes", command=find,
+                 bg='#e17055', fg='white', padx=20).pack(before=results, pady=5)
+    
+    def with_recommender(self, then):
+        """Call then(recommender), building it in the background once the catalog has loaded"""
+        if self.recommender is not None:
+            then(self.recommender)
+            return
+        
+        def start():
+            saved = list(self.store.recipes.values())
+            self.with_index("recommender", lambda recipes: Recommender(recipes + saved), then)
         
-        instructions = self.current_recipe.get("strInstructions", "")
-        instructions_text.insert(tk.END, instructions)
-        instructions_text.config(state='disabled')
+        self.when_catalog_loaded(start)
+    
+    def show_similar(self):
+        """List the recipes most like the current one"""
+        if not self.current_recipe:
+            messagebox.showwarning("Warning", "No recipe selected")
+            return
+        
+        recipe = self.current_recipe
+        self.set_status(f"Finding recipes like {recipe.name}...")
+        self.with_recommender(lambda recommender: self.show_similar_results(
+            recipe, recommender.similar(recipe)))
+    
+    def show_similar_results(self, recipe, similar):
+        """List similar recipes in a window"""
+        if not similar:
+            messagebox.showinfo("No Recommendations",
+                                "Run 'python catalog.py sync' to download the recipe catalog first")
+            return
+        
+        self.set_status(f"{len(similar)} recipes like {recipe.name}")
+        dialog = tk.Toplevel(self.root)
+        dialog.title(f"More Like {recipe.name}")
+        dialog.geometry("420x360")
+        dialog.configure(bg='white')
+        
+        results = tk.Listbox(dialog, font=("Segoe UI", 10), bg='#f8f9fa', relief='flat')
+        results.pack(fill='both', expand=True, padx=20, pady=20)
+        for meal, score in similar:
+            results.insert(tk.END, f"{score:.0%} • {meal.name} ({meal.area or 'Unknown'})")
+        
+        def load(event=None):
+            selection = results.curselection()
+            if selection:
+                self.fetcher.cancel("recipe")
+                self.show_recipe(similar[selection[0]][0])
+        
+        results.bind('<Double-Button-1>', load)
     
     def open_video(self):
         """Open YouTube tutorial"""
-        youtube_url = self.current_recipe.get("strYoutube")
+        youtube_url = self.current_recipe.youtube
         if youtube_url:
+            import webbrowser
             webbrowser.open(youtube_url)
         else:
             messagebox.showinfo("No Video", "No tutorial video available for this recipe")
     
     def get_surprise_meal(self):
         """Get a surprise meal based on random filters"""
-        # Random country or category
+        item = self.surprise_buffer.pop()
+        if item:
+            meal, img, field, value = item
+            if field == "country":
+                self.country_var.set(value)
+            else:
+                self.category_var.set(value)
+            self.show_prefetched(meal, img)
+            self.set_status(f"Surprise! {meal.name} from {meal.area or 'Unknown'}")
+            return
+        
+        # Random country or category; like a prefetched surprise, only the recipe is shown
         if random.choice([True, False]):
             random_country = random.choice(list(self.countries.keys())[1:])  # Skip "All"
             self.country_var.set(random_country)
-            self.filter_by_country()
+            self.set_status(f"Finding a surprise from {random_country}...")
+            self.load_random_from(f"No {random_country} recipes found",
+                                  area=random_country, show_all=False)
         else:
             random_category = random.choice(list(self.categories.keys())[1:])
             self.category_var.set(random_category)
-            self.filter_by_category()
+            self.set_status(f"Finding a surprise {random_category} recipe...")
+            self.load_random_from(f"No {random_category} recipes found",
+                                  category=random_category, show_all=False)
     
     def copy_ingredients(self):
         """Copy ingredients to clipboard"""
         if self.current_recipe:
-            ingredients = []
-            for i in range(1, 21):
-                ingredient = self.current_recipe.get(f"strIngredient{i}")
-                measure = self.current_recipe.get(f"strMeasure{i}")
-                if ingredient and ingredient.strip():
-                    ingredients.append(f"{measure.strip()} {ingredient.strip()}")
+            ingredients = self.current_recipe.ingredient_lines()
             
             self.root.clipboard_clear()
             self.root.clipboard_append("\n".join(ingredients))
             self.set_status("Ingredients copied to clipboard!")
     
+    def on_catalog_loaded(self, error=None):
+        """Run everything that was waiting for the catalog to finish loading"""
+        if error is not None:
+            print(f"Catalog load failed: {error}")
+        waiting, self.catalog_waiting = self.catalog_waiting, None
+        for action in waiting:
+            action()
+    
+    def when_catalog_loaded(self, action):
+        """Run action now if the catalog has finished loading, else once it has"""
+        if self.catalog_waiting is None:
+            action()
+        else:
+            self.catalog_waiting.append(action)
+    
+    def with_index(self, name, build, then):
+        """Call then(index) with the catalog index kept in self.<name>
+        
+        The first call runs build(recipes) on the fetcher; calls made
+        meanwhile wait for that same build. Meals the catalog gains while
+        it runs are added afterwards, and later ones reach the index
+        through the catalog's listeners.
+        """
+        index = getattr(self, name)
+        if index is not None:
+            then(index)
+            return
+        waiting = self.index_waiting.setdefault(name, [])
+        waiting.append(then)
+        if len(waiting) > 1:
+            return  # Already being built
+        
+        def work():
+            recipes = self.catalog.recipes()
+            index = build(recipes)
+            built = {recipe.id for recipe in recipes}
+            for meal_id in self.catalog.subscribe(index.add) - built:
+                index.add(self.catalog.get(meal_id))
+            return index
+        
+        def done(index):
+            setattr(self, name, index)
+            for callback in self.index_waiting.pop(name):
+                callback(index)
+        
+        def failed(error):
+            self.index_waiting.pop(name, None)
+            self.show_error(error)
+        
+        self.fetcher.submit(f"index.{name}", work, done, failed)
+    
+    def prepare_indexes(self):
+        """Build the search indexes in the background as soon as the catalog is in memory"""
+        if self.catalog.ready:
+            self.with_index("text_search", TextSearch, lambda index: None)
+            self.with_index("ingredient_index", IngredientIndex, lambda index: None)
+            self.with_index("meal_planner", MealPlanner, lambda index: None)
+    
+    def requests_saved(self):
+        """How much duplicate work request coalescing has avoided"""
+        return {
+            "saved.http_requests": self.client.metrics()["coalesced"],
+            "saved.image_loads": self.images.stats()["coalesced"],
+            "saved.fetch_jobs": self.fetcher.coalesced,
+            "dropped.superseded": self.fetcher.superseded,
+            "saved.renders": self.renders_skipped,
+        }
+    
+    def show_trace_panel(self):
+        """Live p50/p95 of every tracing span, refreshed twice a second"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Timings")
+        dialog.geometry("520x400")
+        dialog.configure(bg='white')
+        
+        text = tk.Text(dialog, font=("Consolas", 9), bg='#f8f9fa', relief='flat')
+        text.pack(fill='both', expand=True, padx=10, pady=(10, 5))
+        
+        def export():
+            self.set_status(f"Trace written to {tracing.export()}")
+        
+        tk.Button(dialog, text="💾 Export Trace", command=export,
+                 bg='#0984e3', fg='white', relief='flat').pack(pady=(0, 10))
+        
+        def refresh():
+            if not dialog.winfo_exists():
+                return
+            lines = [f"{'span':28} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} {'last ms':>8}"]
+            for name, row in sorted(tracing.summary().items()):
+                lines.append(f"{name:28} {row['count']:6} {row['p50_ms']:8.1f} "
+                             f"{row['p95_ms']:8.1f} {row['last_ms']:8.1f}")
+            lines.append("")
+            lines.extend(f"{name:28} {count:6}" for name, count in self.requests_saved().items())
+            stalls = self.watchdog.stats()
+            lines.append(f"{'mainloop.stalls':28} {stalls['stalls']:6}   worst {stalls['worst_ms']} ms")
+            lines.extend(f"  {bucket:26} {count:6}" for bucket, count in stalls['histogram'].items())
+            text.config(state='normal')
+            text.delete(1.0, tk.END)
+            text.insert(tk.END, "\n".join(lines))
+            text.config(state='disabled')
+            dialog.after(500, refresh)
+        
+        refresh()
+    
     def set_status(self, message):
         """Update status bar"""
         self.status_bar.config(text=message)
+    
+    def show_error(self, error, title="Error"):
+        """Report a failed fetch: a banner while the API is offline, a dialog otherwise"""
+        if isinstance(error, CircuitOpenError) or self.client.breaker.state != CLOSED:
+            self.set_status(f"Offline: {error}")
+            self.update_offline_banner()
+            return
+        messagebox.showerror(title, str(error))
+    
+    def update_offline_banner(self):
+        """Show the offline banner with a countdown until the circuit closes again"""
+        breaker = self.client.breaker
+        if breaker.state == CLOSED:
+            self.offline_polling = False
+            self.fields.show(self.offline_banner, False)
+            self.set_status("Back online")
+            return
+        
+        retry_in = breaker.retry_in()
+        if retry_in > 0:
+            text = f"⚠️ TheMealDB is not responding - retrying in {retry_in:.0f}s"
+        else:
+            text = "⚠️ TheMealDB is not responding - trying again with your next request"
+        self.fields.config(self.offline_banner, text=text)
+        self.fields.show(self.offline_banner, fill='x', after=self.header)
+        if not self.offline_polling:
+            self.offline_polling = True
+            self.root.after(1000, self.poll_offline_banner)
+    
+    def poll_offline_banner(self):
+        self.offline_polling = False
+        self.update_offline_banner()
+    
+    def set_loading(self, busy):
+        """Show a loading state in the status bar while fetches are in flight"""
+        if busy:
+            self.status_bar.config(bg='#0984e3', cursor='watch')
+        else:
+            self.status_bar.config(bg='#2d3436', cursor='')
+    
+    def on_close(self):
+        """Stop background work and close the window"""
+        self.watchdog.stop()
+        self.render.cancel()
+        self.random_buffer.stop()
+        self.surprise_buffer.stop()
+        self.fetcher.shutdown()
+        self.core.close()
+        self.catalog.close()
+        self.store.close()
+        self.root.destroy()
 
 def main():
+    # --measure-startup: print import / first-frame timings and exit
+    measure = "--measure-startup" in sys.argv
     root = tk.Tk()
-    app = CuisineExplorer(root)
+    app = CuisineExplorer(root, measure_startup=measure)
     root.mainloop()
 
 if __name__ == "__main__":
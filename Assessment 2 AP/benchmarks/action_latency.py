@@ -0,0 +1,269 @@
+"""Per-action latency of the explorer against the local TheMealDB stand-in
+
+    python benchmarks/action_latency.py [--samples 30] [--latency 80 --jitter 20]
+                                        [--mode core|tk] [--warm] [--data DIR]
+                                        [-o results.json] [--compare baseline.json]
+
+Times get_random_recipe, filter_by_country, search_recipe and
+load_recipe_image end to end (recipe and thumbnail on screen) and prints
+p50/p95/p99 latency, requests and bytes per action as JSON.
+
+--mode core runs the same work the actions hand to the fetcher, without
+Tk. --mode tk drives a real CuisineExplorer window and needs a display
+(e.g. xvfb-run). Caches are emptied before every sample unless --warm is
+given. With --compare the run is checked against an earlier results file
+and the exit status is 1 if any action's p95 got more than --threshold
+slower.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+# mealdb_standin puts the app directory on sys.path
+from mealdb_standin import StandInData, start
+from recipe import Recipe
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(APP_DIR, "ASSESSMENT 2 API.py")
+ACTIONS = ["get_random_recipe", "filter_by_country", "search_recipe", "load_recipe_image"]
+
+
+def percentile(samples, p):
+    """Nearest-rank percentile of an already sorted list"""
+    return samples[max(0, math.ceil(p / 100 * len(samples)) - 1)]
+
+
+class CoreDriver:
+    """Runs each action's background work directly, as the fetcher would"""
+
+    def __init__(self, base_url, size=(280, 180)):
+        # Imported late so CUISINE_DATA_DIR is already set
+        from image_cache import ImagePipeline
+        from mealdb_core import MealDB
+
+        self.core = MealDB(base_url)
+        self.images = ImagePipeline(self.core.client)
+        self.size = size
+
+    def reset(self):
+        self.core.cache.clear()
+        self.images.clear()
+
+    def show(self, meal):
+        if meal and meal.thumb:
+            self.images.load(meal.thumb, self.size)
+
+    def get_random_recipe(self, arg):
+        self.show(self.core.random_recipe())
+
+    def filter_by_country(self, area):
+        self.show(self.core.random_filtered(area=area))
+
+    def search_recipe(self, term):
+        meals = self.core.search(term)
+        self.show(meals[0] if meals else None)
+
+    def load_recipe_image(self, recipe):
+        self.images.load(recipe.thumb, self.size)
+
+    def close(self):
+        self.core.close()
+
+
+class TkDriver:
+    """Clicks through a real CuisineExplorer and waits until the fetcher is idle"""
+
+    def __init__(self, base_url):
+        import importlib.util
+        import tkinter as tk
+
+        # The app reads its API URL when mealdb_core is imported
+        os.environ["CUISINE_API_URL"] = base_url
+        spec = importlib.util.spec_from_file_location("cuisine_explorer", APP)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+
+        self.root = tk.Tk()
+        self.app = module.CuisineExplorer(self.root)
+        # No catalog load or prefetching, so every action goes to the network
+        self.app.first_frame_done = True
+        self.wait()
+
+    def wait(self):
+        self.root.update()
+        while self.app.fetcher.busy:
+            time.sleep(0.001)
+            self.root.update()
+
+    def reset(self):
+        self.app.cache.clear()
+        self.app.images.clear()
+
+    def get_random_recipe(self, arg):
+        self.app.get_random_recipe()
+        self.wait()
+
+    def filter_by_country(self, area):
+        self.app.country_var.set(area)
+        self.app.filter_by_country()
+        self.wait()
+
+    def search_recipe(self, term):
+        self.app.search_var.set(term)
+        self.app.search_recipe()
+        self.wait()
+
+    def load_recipe_image(self, recipe):
+        self.app.current_recipe = recipe
+        self.app.load_recipe_image()
+        self.wait()
+
+    def close(self):
+        self.app.on_close()
+
+
+def action_args(server, action, samples, rng):
+    """Inputs for each sample: areas, search terms or recipes"""
+    data = server.data
+    if action == "filter_by_country":
+        areas = sorted({meal["strArea"] for meal in data.meals if meal.get("strArea")})
+        return [rng.choice(areas) for _ in range(samples)]
+    if action == "search_recipe":
+        return [" ".join(rng.choice(data.meals)["strMeal"].split()[:2]) for _ in range(samples)]
+    if action == "load_recipe_image":
+        meals = rng.sample(data.meals, min(samples, len(data.meals)))
+        return [Recipe.from_json(dict(meal, strMealThumb=server.image_url(meal["idMeal"])))
+                for meal in meals]
+    return [None] * samples
+
+
+def run_action(driver, server, action, args, warm):
+    latencies = []
+    requests = 0
+    transferred = 0
+    errors = 0
+    for arg in args:
+        if not warm:
+            driver.reset()
+        before = server.stats()
+        start_time = time.perf_counter()
+        try:
+            getattr(driver, action)(arg)
+        except Exception as e:
+            errors += 1
+            print(f"{action} error: {e}", file=sys.stderr)
+        latencies.append((time.perf_counter() - start_time) * 1000)
+        after = server.stats()
+        requests += after["requests"] - before["requests"]
+        transferred += after["bytes"] - before["bytes"]
+
+    latencies.sort()
+    count = len(latencies)
+    return {
+        "samples": count,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "mean_ms": round(sum(latencies) / count, 2),
+        "max_ms": round(latencies[-1], 2),
+        "requests": requests,
+        "requests_per_action": round(requests / count, 2),
+        "bytes": transferred,
+        "bytes_per_action": round(transferred / count),
+    }
+
+
+def version():
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], cwd=APP_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """Print p95 changes against a baseline and return the regressed actions"""
+    regressed = []
+    for action, current in results["actions"].items():
+        before = baseline.get("actions", {}).get(action)
+        if not before:
+            continue
+        change = current["p95_ms"] / before["p95_ms"] - 1 if before["p95_ms"] else 0
+        flag = "REGRESSED" if change > threshold else "ok"
+        print(f"{action:20} p95 {before['p95_ms']:8.1f} -> {current['p95_ms']:8.1f} ms "
+              f"({change:+.0%}) {flag}", file=sys.stderr)
+        if change > threshold:
+            regressed.append(action)
+    return regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=["core", "tk"], default="core")
+    parser.add_argument("--samples", type=int, default=30)
+    parser.add_argument("--actions", nargs="+", choices=ACTIONS, default=ACTIONS)
+    parser.add_argument("--latency", type=float, default=80, help="server latency (ms)")
+    parser.add_argument("--jitter", type=float, default=20, help="latency jitter (ms)")
+    parser.add_argument("--image-latency", type=float, help="image latency (ms)")
+    parser.add_argument("--data", help="stand-in recording directory")
+    parser.add_argument("--warm", action="store_true", help="keep caches between samples")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("-o", "--output", help="also write the results to this file")
+    parser.add_argument("--compare", help="earlier results file to check against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed p95 slowdown before --compare fails")
+    args = parser.parse_args(argv)
+
+    # Keep the benchmark's caches and user data away from the real ones
+    data_dir = tempfile.mkdtemp(prefix="cuisine_bench_")
+    os.environ["CUISINE_DATA_DIR"] = data_dir
+
+    data = StandInData(args.data)
+    data.prepare()
+    server = start(data, latency_ms=args.latency, jitter_ms=args.jitter,
+                   image_latency_ms=args.image_latency)
+    driver = CoreDriver(server.base_url) if args.mode == "core" else TkDriver(server.base_url)
+
+    rng = random.Random(args.seed)
+    random.seed(args.seed)
+    results = {
+        "version": version(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "mode": args.mode,
+        "cache": "warm" if args.warm else "cold",
+        "latency_ms": args.latency,
+        "jitter_ms": args.jitter,
+        "image_latency_ms": server.image_latency_ms,
+        "meals": len(data.meals),
+        "actions": {},
+    }
+    try:
+        for action in args.actions:
+            samples = action_args(server, action, args.samples, rng)
+            results["actions"][action] = run_action(driver, server, action, samples, args.warm)
+    finally:
+        driver.close()
+        server.shutdown()
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
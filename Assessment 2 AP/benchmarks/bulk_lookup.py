@@ -0,0 +1,94 @@
+"""Hydrating many meal IDs one by one versus with get_recipes_by_ids
+
+    python benchmarks/bulk_lookup.py [--ids 50] [--latency 80 --jitter 20]
+                                     [--concurrency 4 8 16]
+
+Runs against the local TheMealDB stand-in with a cold cache each time and
+prints, as JSON, the wall time of a sequential lookup loop and of bulk
+lookups at each concurrency limit, next to the slowest a single request can be
+and the time until the first result was available. Bulk lookups run with
+the client's shipped rate limit, with it scaled to the concurrency as
+cuisine_cli.py does, and with no limit, to show the round trips alone.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+# mealdb_standin puts the app directory on sys.path
+from mealdb_standin import StandInData, start
+
+
+LIMITERS = ("shipped_limiter", "scaled_limiter", "no_limiter")
+
+
+def run(core, ids, concurrency):
+    """Return (seconds, seconds to first result, results) for one cold hydration"""
+    core.cache.clear()
+    first = None
+    start_time = time.perf_counter()
+    if concurrency is None:
+        results = []
+        for meal_id in ids:
+            results.append(core.lookup(meal_id))
+            first = first or time.perf_counter() - start_time
+    else:
+        results = []
+        for result in core.get_recipes_by_ids(ids, concurrency=concurrency):
+            results.append(result.recipe)
+            first = first or time.perf_counter() - start_time
+    return time.perf_counter() - start_time, first, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ids", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=80, help="ms per request")
+    parser.add_argument("--jitter", type=float, default=20, help="+/- ms per request")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[4, 8, 16])
+    args = parser.parse_args()
+
+    os.environ.setdefault("CUISINE_DATA_DIR", tempfile.mkdtemp(prefix="bulk_lookup_"))
+    # Imported late so CUISINE_DATA_DIR is already set
+    from mealdb_core import MealDB
+
+    server = start(StandInData(count=max(args.ids, 100)),
+                   latency_ms=args.latency, jitter_ms=args.jitter)
+    ids = [meal["idMeal"] for meal in server.data.meals[:args.ids]]
+    report = {"ids": args.ids, "latency_ms": args.latency, "jitter_ms": args.jitter}
+    try:
+        expected = None
+        for concurrency in [None] + args.concurrency:
+            for limiter in LIMITERS if concurrency else [None]:
+                # A fresh client each run, so every limiter starts with a full bucket
+                core = MealDB(server.base_url)
+                if limiter == "scaled_limiter":
+                    core.client.scale_limiter(concurrency)
+                elif limiter == "no_limiter":
+                    core.client.limiter = None
+                try:
+                    seconds, first, results = run(core, ids, concurrency)
+                    throttled = core.client.limiter.throttled if core.client.limiter else 0
+                finally:
+                    core.close()
+                names = [recipe.name if recipe else None for recipe in results]
+                expected = expected or names
+                row = {
+                    "total_ms": round(seconds * 1000, 1),
+                    "first_result_ms": round(first * 1000, 1),
+                    "throttled": throttled,
+                    "in_order": names == expected,
+                }
+                if concurrency is None:
+                    report["sequential"] = row
+                else:
+                    report.setdefault(limiter, {})[f"concurrency_{concurrency}"] = row
+        report["slowest_possible_request_ms"] = round(args.latency + args.jitter, 1)
+    finally:
+        server.shutdown()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Opening the catalog from SQLite JSON versus the memory-mapped snapshot
+
+    python benchmarks/catalog_open.py [--meals 10000] [--touch 100]
+
+Writes a synthetic catalog of --meals recipes to a throwaway data
+directory both ways, then opens each in a fresh process and prints, as
+JSON, the open time (after imports) and resident memory (RSS) growth after opening, after
+reading --touch random recipes and after reading all of them. Both files
+are dropped from the page cache first (Linux), as after a reboot; a file
+that was just written is cached in large folios, and mapping one page of
+it pulls the whole folio into RSS.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sample_data import make_meals
+
+
+def rss_kb():
+    """Resident set size of this process in KB (Linux)"""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+
+
+def evict(path):
+    """Ask the kernel to drop a file's cached pages"""
+    if not hasattr(os, "posix_fadvise"):
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+def child(mode, touch):
+    """Runs in a fresh process so imports and earlier runs do not skew RSS"""
+    from catalog import SNAPSHOT_PATH, Catalog
+    import catalog_snapshot  # Module import time is not part of opening
+
+    base = rss_kb()
+    start = time.perf_counter()
+    catalog = Catalog(snapshot_path=None if mode == "sqlite" else SNAPSHOT_PATH)
+    opened_ms = (time.perf_counter() - start) * 1000
+    opened = rss_kb()
+
+    ids = sorted(catalog.ids())
+    sample = random.Random(1).sample(ids, min(touch, len(ids)))
+    start = time.perf_counter()
+    names = [catalog.get(meal_id).name for meal_id in sample]
+    touch_ms = (time.perf_counter() - start) * 1000
+    touched = rss_kb()
+
+    for meal_id in ids:
+        catalog.get(meal_id).ingredient_lines()
+    everything = rss_kb()
+    catalog.close()
+    return {
+        "open_ms": round(opened_ms, 2),
+        "rss_open_kb": opened - base,
+        f"get_{len(names)}_ms": round(touch_ms, 2),
+        f"rss_after_{len(names)}_kb": touched - base,
+        "rss_after_all_kb": everything - base,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--meals", type=int, default=10000)
+    parser.add_argument("--touch", type=int, default=100)
+    parser.add_argument("--child", choices=["sqlite", "snapshot"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        print(json.dumps(child(args.child, args.touch)))
+        return
+
+    data_dir = tempfile.mkdtemp(prefix="catalog_open_")
+    os.environ["CUISINE_DATA_DIR"] = data_dir
+    # Imported late so CUISINE_DATA_DIR is already set
+    from catalog import SNAPSHOT_PATH, Catalog
+    from catalog_snapshot import build
+    from recipe import Recipe
+
+    catalog = Catalog(snapshot_path=None, load=False)
+    for meal in make_meals(args.meals):
+        catalog.add(Recipe.from_json(meal), commit=False)
+    catalog.synced_at = time.time()
+    catalog._db.execute("INSERT OR REPLACE INTO meta VALUES ('synced_at', ?)",
+                        (str(catalog.synced_at),))
+    catalog._db.commit()
+    start = time.perf_counter()
+    build(catalog.meals.values(), SNAPSHOT_PATH, catalog.lists, catalog.synced_at)
+    report = {"meals": args.meals, "build_s": round(time.perf_counter() - start, 2),
+              "snapshot_kb": os.path.getsize(SNAPSHOT_PATH) // 1024}
+    catalog.close()
+
+    for mode in ("sqlite", "snapshot"):
+        for path in (os.path.join(data_dir, "catalog.sqlite"), SNAPSHOT_PATH):
+            evict(path)
+        output = subprocess.run([sys.executable, __file__, "--child", mode,
+                                 "--touch", str(args.touch)],
+                                capture_output=True, text=True, check=True).stdout
+        report[mode] = json.loads(output)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+"""Local stand-in for TheMealDB API with injected latency
+
+    python benchmarks/mealdb_standin.py serve [--data DIR] [--port 8765] [--latency 80 --jitter 20]
+    python benchmarks/mealdb_standin.py record DIR --area Italian --category Dessert
+
+serve answers random/lookup/search/filter/list/categories.php and meal
+thumbnails (including the "/preview" size) from a recording, or from
+synthetic meals when no recording is given. Point the app at it with
+CUISINE_API_URL=http://127.0.0.1:8765/api/json/v1/1.
+
+A recording is a directory holding meals.jsonl (one API meal dict per
+line, the same format cuisine_cli.py exports) and images/<idMeal>.jpg.
+record builds one from the real API.
+
+GET /_stats returns request counts and bytes sent per endpoint and
+GET /_reset zeroes them.
+"""
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sample_data import make_meals
+
+API_PREFIX = "/api/json/v1/1"
+IMAGE_PREFIX = "/images/media/meals/"
+PREVIEW_SIZE = 250
+
+
+class StandInData:
+    """Meals and thumbnails served by the stand-in"""
+
+    def __init__(self, data_dir=None, count=500):
+        self.data_dir = data_dir
+        if data_dir:
+            with open(os.path.join(data_dir, "meals.jsonl"), encoding="utf-8") as f:
+                self.meals = [json.loads(line) for line in f if line.strip()]
+        else:
+            self.meals = make_meals(count)
+        self.by_id = {meal["idMeal"]: meal for meal in self.meals}
+        self._images = {}
+        self._lock = threading.Lock()
+
+    def image(self, meal_id, preview=False):
+        """JPEG bytes for a meal's thumbnail, or None"""
+        key = (meal_id, preview)
+        data = self._images.get(key)
+        if data is not None:
+            return data
+        if meal_id not in self.by_id:
+            return None
+
+        from PIL import Image
+        full = self._recorded_image(meal_id)
+        if full is None:
+            # Blurred colour noise encodes to about the size of a real 700px photo
+            rng = random.Random(meal_id)
+            img = Image.merge("RGB", [Image.effect_noise((88, 88), rng.randint(30, 70))
+                                      for _ in range(3)])
+            img = img.resize((700, 700), Image.Resampling.BICUBIC)
+        else:
+            img = Image.open(io.BytesIO(full))
+        if preview:
+            img = img.resize((PREVIEW_SIZE, PREVIEW_SIZE))
+        if preview or full is None:
+            out = io.BytesIO()
+            img.convert("RGB").save(out, "JPEG", quality=85)
+            data = out.getvalue()
+        else:
+            data = full
+
+        with self._lock:
+            self._images[key] = data
+        return data
+
+    def prepare(self, workers=4):
+        """Encode every thumbnail up front so requests only measure serving them"""
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for preview in (False, True):
+                list(pool.map(lambda meal_id: self.image(meal_id, preview), self.by_id))
+
+    def _recorded_image(self, meal_id):
+        if not self.data_dir:
+            return None
+        try:
+            with open(os.path.join(self.data_dir, "images", f"{meal_id}.jpg"), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+
+class StandInServer(ThreadingHTTPServer):
+    """HTTP server holding the data, latency settings and traffic counters"""
+
+    daemon_threads = True
+    # Bulk lookups open many connections at once; the default backlog of 5 drops them
+    request_queue_size = 128
+
+    def __init__(self, address, data, latency_ms=0, jitter_ms=0, image_latency_ms=None):
+        super().__init__(address, StandInHandler)
+        self.data = data
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.image_latency_ms = latency_ms if image_latency_ms is None else image_latency_ms
+        self._lock = threading.Lock()
+        self.reset()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def image_url(self, meal_id):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{IMAGE_PREFIX}{meal_id}.jpg"
+
+    def delay(self, image=False):
+        latency = self.image_latency_ms if image else self.latency_ms
+        latency += random.uniform(-self.jitter_ms, self.jitter_ms)
+        if latency > 0:
+            time.sleep(latency / 1000)
+
+    def record(self, endpoint, size):
+        with self._lock:
+            entry = self.traffic.setdefault(endpoint, {"requests": 0, "bytes": 0})
+            entry["requests"] += 1
+            entry["bytes"] += size
+
+    def reset(self):
+        with self._lock:
+            self.traffic = {}
+
+    def stats(self):
+        with self._lock:
+            traffic = {endpoint: dict(entry) for endpoint, entry in self.traffic.items()}
+        return {
+            "requests": sum(entry["requests"] for entry in traffic.values()),
+            "bytes": sum(entry["bytes"] for entry in traffic.values()),
+            "endpoints": traffic,
+        }
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+
+        if parts.path == "/_stats":
+            self.send(json.dumps(self.server.stats()).encode(), "application/json")
+        elif parts.path == "/_reset":
+            self.server.reset()
+            self.send(b"{}", "application/json")
+        elif parts.path.startswith(IMAGE_PREFIX):
+            self.image(parts.path[len(IMAGE_PREFIX):])
+        elif parts.path.startswith(API_PREFIX + "/"):
+            self.api(parts.path[len(API_PREFIX) + 1:], query)
+        else:
+            self.send_error(404)
+
+    def send(self, body, content_type, endpoint=None):
+        # Count before replying so a client never sees a response that is not in the stats
+        if endpoint:
+            self.server.record(endpoint, len(body))
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def thumb_url(self, meal_id):
+        host = self.headers.get("Host") or "%s:%s" % self.server.server_address[:2]
+        return f"http://{host}{IMAGE_PREFIX}{meal_id}.jpg"
+
+    def full(self, meal):
+        return dict(meal, strMealThumb=self.thumb_url(meal["idMeal"]))
+
+    def summary(self, meal):
+        return {"strMeal": meal["strMeal"], "strMealThumb": self.thumb_url(meal["idMeal"]),
+                "idMeal": meal["idMeal"]}
+
+    def api(self, endpoint, query):
+        self.server.delay()
+        meals = self.server.data.meals
+        if endpoint == "random.php":
+            result = [self.full(random.choice(meals))]
+        elif endpoint == "lookup.php":
+            meal = self.server.data.by_id.get(query.get("i"))
+            result = [self.full(meal)] if meal else None
+        elif endpoint == "search.php":
+            if "f" in query:
+                letter = query["f"].lower()
+                result = [self.full(m) for m in meals if m["strMeal"].lower().startswith(letter)]
+            else:
+                term = query.get("s", "").lower()
+                result = [self.full(m) for m in meals if term in m["strMeal"].lower()]
+        elif endpoint == "filter.php":
+            result = [self.summary(m) for m in meals if self.matches(m, query)]
+        elif endpoint == "list.php":
+            field = {"a": "strArea", "c": "strCategory"}.get(next(iter(query), ""))
+            if field:
+                values = sorted({m[field] for m in meals if m.get(field)})
+            else:
+                field = "strIngredient"
+                values = sorted({m[f"strIngredient{n}"] for m in meals for n in range(1, 21)
+                                 if m.get(f"strIngredient{n}")})
+            result = [{field: value} for value in values]
+        elif endpoint == "categories.php":
+            names = sorted({m["strCategory"] for m in meals if m.get("strCategory")})
+            self.send(json.dumps({"categories": [{"strCategory": name} for name in names]})
+                      .encode(), "application/json", endpoint)
+            return
+        else:
+            self.send_error(404)
+            return
+        self.send(json.dumps({"meals": result or None}).encode(), "application/json", endpoint)
+
+    @staticmethod
+    def matches(meal, query):
+        if "a" in query:
+            return meal.get("strArea") == query["a"]
+        if "c" in query:
+            return meal.get("strCategory") == query["c"]
+        if "i" in query:
+            wanted = query["i"].replace("_", " ").lower()
+            return any((meal.get(f"strIngredient{n}") or "").lower() == wanted
+                       for n in range(1, 21))
+        return False
+
+    def image(self, name):
+        preview = name.endswith("/preview")
+        meal_id = name.split("/")[0].rsplit(".", 1)[0]
+        self.server.delay(image=True)
+        data = self.server.data.image(meal_id, preview)
+        if data is None:
+            self.send_error(404)
+            return
+        self.send(data, "image/jpeg", "preview" if preview else "image")
+
+
+def start(data=None, host="127.0.0.1", port=0, **latency):
+    """Run a stand-in on a background thread and return the server"""
+    server = StandInServer((host, port), data or StandInData(), **latency)
+    threading.Thread(target=server.serve_forever, name="standin", daemon=True).start()
+    return server
+
+
+def record(out_dir, areas, categories, workers=8):
+    """Save meals and thumbnails from the real API as a stand-in recording"""
+    from mealdb_core import MealDB
+    from cuisine_cli import export
+
+    os.makedirs(os.path.join(out_dir, "images"), exist_ok=True)
+    core = MealDB()
+    path = os.path.join(out_dir, "meals.jsonl")
+    with open(path, "w", encoding="utf-8") as out:
+        count = export(core, out, areas, categories, workers=workers)
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            meal = json.loads(line)
+            if meal.get("strMealThumb"):
+                data = core.client.get_bytes(meal["strMealThumb"])
+                with open(os.path.join(out_dir, "images", f"{meal['idMeal']}.jpg"), "wb") as img:
+                    img.write(data)
+    core.close()
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local TheMealDB stand-in")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="serve a recording or synthetic meals")
+    serve.add_argument("--data", help="recording directory (default: synthetic meals)")
+    serve.add_argument("--meals", type=int, default=500, help="synthetic meal count")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--latency", type=float, default=0, help="added to every request (ms)")
+    serve.add_argument("--jitter", type=float, default=0, help="random +/- on the latency (ms)")
+    serve.add_argument("--image-latency", type=float, help="latency for images (ms)")
+    rec = commands.add_parser("record", help="record meals and thumbnails from the real API")
+    rec.add_argument("out_dir")
+    rec.add_argument("--area", action="append", default=[])
+    rec.add_argument("--category", action="append", default=[])
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        if not args.area and not args.category:
+            parser.error("record needs at least one --area or --category")
+        count = record(args.out_dir, args.area, args.category)
+        print(f"Recorded {count} meals to {args.out_dir}")
+        return 0
+
+    data = StandInData(args.data, args.meals)
+    data.prepare()
+    server = StandInServer((args.host, args.port), data,
+                           latency_ms=args.latency, jitter_ms=args.jitter,
+                           image_latency_ms=args.image_latency)
+    print(f"Serving {len(server.data.meals)} meals at {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""Requests per second through cuisine_proxy.py in front of the TheMealDB stand-in
+
+    python benchmarks/proxy_throughput.py [--clients 8] [--seconds 10]
+                                          [--latency 80 --jitter 20] [--meals 200]
+
+Starts the stand-in upstream in this process and the proxy in its own
+process (so it has one core to itself), then has --clients keep-alive
+connections request a mix of lookup.php, filter.php and thumbnail URLs
+for --seconds, the way several explorers on one network would. Every
+path is requested once beforehand (unless --cold), so the run measures
+serving from the proxy rather than the upstream's latency. Prints
+client-side throughput and latency, the proxy's own stats and how many
+requests reached the upstream, as JSON.
+"""
+import argparse
+import http.client
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+# mealdb_standin puts the app directory on sys.path
+from mealdb_standin import StandInData, start
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROXY = os.path.join(APP_DIR, "cuisine_proxy.py")
+
+
+def percentile(samples, p):
+    """Nearest-rank percentile of an already sorted list"""
+    return samples[max(0, math.ceil(p / 100 * len(samples)) - 1)]
+
+
+def request_paths(data, count, seed=1):
+    """A mixed workload over a limited set of meals, like many users browsing"""
+    rng = random.Random(seed)
+    areas = sorted({meal["strArea"] for meal in data.meals})
+    paths = []
+    for _ in range(count):
+        meal = rng.choice(data.meals)
+        kind = rng.random()
+        if kind < 0.5:
+            paths.append(f"/api/json/v1/1/lookup.php?i={meal['idMeal']}")
+        elif kind < 0.65:
+            paths.append(f"/api/json/v1/1/filter.php?a={rng.choice(areas)}")
+        else:
+            paths.append(f"/images/media/meals/{meal['idMeal']}.jpg/preview")
+    return paths
+
+
+def client(port, paths, deadline, latencies, errors):
+    """Request paths in a loop on one connection until deadline (or once each if None)"""
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    headers = {"Accept-Encoding": "gzip"}
+    i = 0
+    while (i < len(paths)) if deadline is None else (time.perf_counter() < deadline):
+        path = paths[i % len(paths)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            connection.request("GET", path, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(repr(e))
+            connection.close()
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - start)
+    connection.close()
+
+
+def get_json(port, path):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    connection.request("GET", path)
+    body = connection.getresponse().read()
+    connection.close()
+    return json.loads(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--latency", type=float, default=80, help="upstream ms per request")
+    parser.add_argument("--jitter", type=float, default=20)
+    parser.add_argument("--meals", type=int, default=200, help="distinct meals browsed")
+    parser.add_argument("--cold", action="store_true", help="skip warming the proxy cache")
+    args = parser.parse_args()
+
+    data = StandInData(count=args.meals)
+    data.prepare()
+    upstream = start(data, latency_ms=args.latency, jitter_ms=args.jitter)
+    cache_dir = tempfile.mkdtemp(prefix="proxy_throughput_")
+    proxy = subprocess.Popen(
+        [sys.executable, PROXY, "--host", "127.0.0.1", "--port", "0", "--stats-every", "0",
+         "--upstream", upstream.base_url, "--upstream-rate", "0", "--cache", os.path.join(cache_dir, "cache.sqlite")],
+        stdout=subprocess.PIPE, text=True, env=dict(os.environ, CUISINE_DATA_DIR=cache_dir))
+    try:
+        # "Proxying <upstream> at http://127.0.0.1:<port>/api/json/v1/1"
+        port = int(proxy.stdout.readline().rsplit(":", 1)[1].split("/")[0])
+
+        workloads = [request_paths(data, 5000, seed=i) for i in range(args.clients)]
+        if not args.cold:
+            distinct = sorted({path for paths in workloads for path in paths})
+            warm = [threading.Thread(target=client, args=(
+                port, distinct[i::16], None, [], [])) for i in range(16)]
+            for thread in warm:
+                thread.start()
+            for thread in warm:
+                thread.join()
+        warmed = upstream.stats()["requests"]
+
+        latencies, errors = [], []
+        deadline = time.perf_counter() + args.seconds
+        threads = [threading.Thread(target=client, args=(
+            port, workloads[i], deadline, latencies, errors))
+            for i in range(args.clients)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        stats = get_json(port, "/_proxy/stats")
+        report = {
+            "clients": args.clients,
+            "seconds": round(elapsed, 1),
+            "requests": len(latencies),
+            "errors": len(errors),
+            "requests_per_s": round(len(latencies) / elapsed, 1),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2) if latencies else None,
+            "upstream_requests_warmup": warmed,
+            "upstream_requests_run": upstream.stats()["requests"] - warmed,
+            "proxy": stats,
+        }
+    finally:
+        proxy.terminate()
+        proxy.wait()
+        upstream.shutdown()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Memory footprint of parsed Recipes versus raw API dicts
+
+    python benchmarks/recipe_memory.py [count]
+
+Each meal is decoded from its own JSON string, as it would be when it
+arrives from the API, so the raw dicts do not share string objects.
+"""
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recipe import Recipe
+from sample_data import make_meals
+
+
+def measure(build):
+    """Return (objects, bytes allocated, seconds) for build()"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size, elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    payloads = [json.dumps(meal) for meal in make_meals(count)]
+
+    raw, raw_bytes, raw_time = measure(lambda: [json.loads(p) for p in payloads])
+    del raw
+    recipes, recipe_bytes, recipe_time = measure(
+        lambda: [Recipe.from_json(json.loads(p)) for p in payloads])
+
+    result = {
+        "recipes": count,
+        "raw_dict_bytes": raw_bytes,
+        "recipe_bytes": recipe_bytes,
+        "raw_bytes_per_recipe": raw_bytes // count,
+        "recipe_bytes_per_recipe": recipe_bytes // count,
+        "saving": round(1 - recipe_bytes / raw_bytes, 3),
+        "raw_parse_seconds": round(raw_time, 3),
+        "recipe_parse_seconds": round(recipe_time, 3),
+    }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""Tk work per recipe when flipping quickly through 100 recipes
+
+    python benchmarks/render_flip.py [--recipes 100] [--burst 5] [-o results.json]
+
+Builds a real CuisineExplorer (needs a display, e.g. xvfb-run) with every
+Tcl command counted, then shows the same recipes in several ways:
+
+  legacy             the old display_recipe: destroy and recreate the info
+                     labels, rewrite every card and the ingredients text
+  recycled           render_recipe once per recipe (persistent widgets,
+                     only changed fields applied)
+  batched            display_recipe for --burst recipes between idle
+                     callbacks, as when clicks arrive faster than Tk draws
+  full_recipe_legacy a new Toplevel and ScrolledText per "Full Recipe" click
+  full_recipe_reused the kept Full Recipe window, refilled per click
+
+For each it prints Tcl calls, widgets created and destroyed, Python memory
+(tracemalloc net and peak) and per-frame time p50/p95 as JSON. Thumbnails
+are left out so only rendering is measured.
+"""
+import argparse
+import gc
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recipe import Recipe
+from sample_data import make_meals
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(APP_DIR, "ASSESSMENT 2 API.py")
+WIDGET_CLASSES = {"frame", "label", "text", "scrollbar", "toplevel", "button", "canvas"}
+
+
+class CountingTk:
+    """Stands in for root.tk and counts the Tcl commands widgets send through it"""
+
+    def __init__(self, tk):
+        self._tk = tk
+        self.calls = 0
+        self.created = 0
+        self.destroyed = 0
+
+    def call(self, *args):
+        self.calls += 1
+        if args and isinstance(args[0], tuple):
+            args = args[0]
+        if args:
+            if args[0] in WIDGET_CLASSES:
+                self.created += 1
+            elif args[0] == "destroy":
+                self.destroyed += 1
+        return self._tk.call(*args)
+
+    def __getattr__(self, name):
+        return getattr(self._tk, name)
+
+    def reset(self):
+        self.calls = self.created = self.destroyed = 0
+
+
+def percentile(samples, p):
+    """Nearest-rank percentile of an already sorted list"""
+    return samples[max(0, math.ceil(p / 100 * len(samples)) - 1)]
+
+
+def legacy_display_recipe(app, info_frame):
+    """The destroy-and-recreate display_recipe this benchmark compares against"""
+    import random
+    import tkinter as tk
+
+    recipe = app.current_recipe
+    app.recipe_title.config(text=recipe.name)
+    for widget in info_frame.winfo_children():
+        widget.destroy()
+    country = recipe.area or "Unknown"
+    tk.Label(info_frame, text=f"{app.countries.get(country, '🌐')} {country}",
+             bg='white', font=("Segoe UI", 10, "bold"), fg='#0984e3').pack(side='left', padx=5)
+    category = recipe.category or "Unknown"
+    tk.Label(info_frame, text=f" • {app.categories.get(category, '🍽️')} {category}",
+             bg='white', font=("Segoe UI", 10)).pack(side='left', padx=5)
+    for tag in recipe.tags[:2]:
+        tk.Label(info_frame, text=f" • #{tag}", bg='white', font=("Segoe UI", 9),
+                 fg='#636e72').pack(side='left', padx=5)
+    app.cards["prep_time"].config(text=f"{random.randint(15, 60)} mins")
+    app.cards["difficulty"].config(text=random.choice(["Easy", "Medium", "Hard"]))
+    app.cards["servings"].config(text=f"{random.randint(2, 8)} people")
+    app.ingredients_text.delete(1.0, tk.END)
+    app.ingredients_text.insert(tk.END, "\n".join(recipe.ingredient_lines("• ")))
+    app.ingredients_text.config(state='normal')
+
+
+def legacy_full_recipe(app):
+    """The old show_full_recipe: a new window per click (closed again right away)"""
+    import tkinter as tk
+    from tkinter import scrolledtext
+
+    dialog = tk.Toplevel(app.root)
+    dialog.title(f"{app.current_recipe.name} - Full Recipe")
+    dialog.geometry("600x500")
+    dialog.configure(bg='white')
+    tk.Label(dialog, text=app.current_recipe.name,
+             font=("Segoe UI", 18, "bold"), bg='white').pack(pady=10)
+    tk.Label(dialog, text="Instructions:", font=("Segoe UI", 12, "bold"),
+             bg='white').pack(anchor='w', padx=20, pady=(10, 5))
+    text = scrolledtext.ScrolledText(dialog, font=("Segoe UI", 10), bg='#f8f9fa', relief='flat')
+    text.pack(fill='both', expand=True, padx=20, pady=(0, 20))
+    text.insert(tk.END, app.current_recipe.instructions)
+    text.config(state='disabled')
+    return dialog
+
+
+def load_app():
+    import importlib.util
+    import tkinter as tk
+
+    spec = importlib.util.spec_from_file_location("cuisine_explorer", APP)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    root = tk.Tk()
+    # Installed before any widget exists, so every widget talks through it
+    counter = root.tk = CountingTk(root.tk)
+    app = module.CuisineExplorer(root)
+    # No catalog load or prefetching while measuring
+    app.first_frame_done = True
+    root.update()
+    return app, counter
+
+
+def run_mode(app, counter, mode, recipes, burst):
+    import tkinter as tk
+
+    root = app.root
+    scratch = tk.Frame(app.info_frame.master, bg='white')
+    frames = []
+
+    def frame(step):
+        start = time.perf_counter()
+        step()
+        root.update_idletasks()
+        frames.append(time.perf_counter() - start)
+
+    def show(recipe):
+        app.current_recipe = recipe
+        app.render_recipe()
+
+    def legacy(recipe):
+        app.current_recipe = recipe
+        legacy_display_recipe(app, scratch)
+
+    def schedule(group):
+        for recipe in group:
+            app.current_recipe = recipe
+            app.display_recipe()
+
+    def full_legacy(recipe):
+        app.current_recipe = recipe
+        legacy_full_recipe(app).destroy()
+
+    def full_reused(recipe):
+        app.current_recipe = recipe
+        app.show_full_recipe()
+
+    gc.collect()
+    counter.reset()
+    fields_before = (app.fields.applied, app.fields.skipped)
+    tracemalloc.start()
+    start = time.perf_counter()
+    if mode == "batched":
+        for i in range(0, len(recipes), burst):
+            frame(lambda group=recipes[i:i + burst]: schedule(group))
+    else:
+        step = {"legacy": legacy, "recycled": show,
+                "full_recipe_legacy": full_legacy, "full_recipe_reused": full_reused}[mode]
+        for recipe in recipes:
+            frame(lambda recipe=recipe: step(recipe))
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    net, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    scratch.destroy()
+
+    frames.sort()
+    return {
+        "frames": len(frames),
+        "tcl_calls": counter.calls,
+        "tcl_calls_per_recipe": round(counter.calls / len(recipes), 1),
+        "widgets_created": counter.created,
+        "widgets_destroyed": counter.destroyed,
+        "fields_applied": app.fields.applied - fields_before[0],
+        "fields_skipped": app.fields.skipped - fields_before[1],
+        "py_net_kb": round(net / 1024, 1),
+        "py_peak_kb": round(peak / 1024, 1),
+        "frame_p50_ms": round(percentile(frames, 50) * 1000, 3),
+        "frame_p95_ms": round(percentile(frames, 95) * 1000, 3),
+        "total_ms": round(elapsed * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recipes", type=int, default=100)
+    parser.add_argument("--burst", type=int, default=5,
+                        help="recipes shown between idle callbacks in batched mode")
+    parser.add_argument("-o", "--output")
+    args = parser.parse_args()
+
+    # Keep the benchmark's favourites and history out of the real profile
+    os.environ.setdefault("CUISINE_DATA_DIR", tempfile.mkdtemp(prefix="render_flip_"))
+    recipes = [Recipe.from_json(dict(meal, strMealThumb=None))
+               for meal in make_meals(args.recipes)]
+
+    app, counter = load_app()
+    results = {"recipes": args.recipes, "burst": args.burst}
+    try:
+        for mode in ["legacy", "recycled", "batched", "full_recipe_legacy", "full_recipe_reused"]:
+            # Warm-up pass so one-off widget creation is not counted
+            run_mode(app, counter, mode, recipes[:args.burst], args.burst)
+            results[mode] = run_mode(app, counter, mode, recipes, args.burst)
+        results["batcher"] = app.render.stats()
+    finally:
+        app.on_close()
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
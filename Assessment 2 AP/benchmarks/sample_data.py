@@ -0,0 +1,61 @@
+"""Synthetic TheMealDB-shaped meals for benchmarks
+
+The generated dicts have the same 50-odd keys as real API responses,
+including the mostly-empty strIngredientN / strMeasureN slots, so memory
+and parsing numbers are representative.
+"""
+import random
+
+AREAS = ["American", "British", "Canadian", "Chinese", "French", "Greek", "Indian",
+         "Italian", "Japanese", "Mexican", "Moroccan", "Spanish", "Thai", "Turkish"]
+CATEGORIES = ["Beef", "Chicken", "Dessert", "Lamb", "Miscellaneous", "Pasta", "Pork",
+              "Seafood", "Side", "Starter", "Vegetarian", "Breakfast"]
+INGREDIENTS = ["Olive Oil", "Salt", "Black Pepper", "Garlic", "Onion", "Butter", "Flour",
+               "Eggs", "Milk", "Sugar", "Chicken Breast", "Beef Mince", "Tomatoes",
+               "Potatoes", "Carrots", "Rice", "Soy Sauce", "Ginger", "Lemon", "Parsley",
+               "Cumin", "Paprika", "Cheddar Cheese", "Double Cream", "Basil", "Chilli",
+               "Coconut Milk", "Spinach", "Mushrooms", "Pasta", "Honey", "Thyme",
+               "Red Wine", "Chicken Stock", "Lamb", "Prawns", "Bacon", "Yogurt"]
+MEASURES = ["1 cup", "2 cups", "200ml", "1 tbs", "2 tbs", "1 tsp", "pinch", "100g",
+            "250g", "1", "2", "3", "to taste", "1/2 cup", "1 kg"]
+WORDS = ["add", "stir", "heat", "oven", "pan", "minutes", "until", "golden", "simmer",
+         "season", "chop", "serve", "mix", "bake", "boil", "fry", "gently", "sauce",
+         "cover", "remove", "pour", "bowl", "whisk", "low", "high", "slice", "dice"]
+DISHES = ["Curry", "Stew", "Pie", "Soup", "Salad", "Tart", "Risotto", "Roast", "Bake",
+          "Noodles", "Kebab", "Pudding", "Casserole", "Skewers", "Burger"]
+
+
+def make_meal(i, rng=None):
+    """Return one API-shaped meal dict with a stable ID"""
+    rng = rng or random.Random(i)
+    area = rng.choice(AREAS)
+    main = rng.choice(INGREDIENTS)
+    count = rng.randint(5, 15)
+    ingredients = rng.sample(INGREDIENTS, count)
+
+    meal = {
+        "idMeal": str(52700 + i),
+        "strMeal": f"{area} {main} {rng.choice(DISHES)} {i}",
+        "strDrinkAlternate": None,
+        "strCategory": rng.choice(CATEGORIES),
+        "strArea": area,
+        "strInstructions": " ".join(rng.choice(WORDS) for _ in range(rng.randint(60, 250))),
+        "strMealThumb": f"https://www.themealdb.com/images/media/meals/sample{i}.jpg",
+        "strTags": rng.choice([None, "Spicy", "Meat,Casserole", "Baking,Sweet", "Quick,Easy"]),
+        "strYoutube": f"https://www.youtube.com/watch?v=sample{i}",
+    }
+    for n in range(1, 21):
+        meal[f"strIngredient{n}"] = ingredients[n - 1] if n <= count else ""
+    for n in range(1, 21):
+        meal[f"strMeasure{n}"] = rng.choice(MEASURES) if n <= count else " "
+    meal.update({
+        "strSource": None,
+        "strImageSource": None,
+        "strCreativeCommonsConfirmed": None,
+        "dateModified": None,
+    })
+    return meal
+
+
+def make_meals(count, start=0):
+    return [make_meal(i) for i in range(start, start + count)]
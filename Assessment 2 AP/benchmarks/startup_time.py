@@ -0,0 +1,35 @@
+"""Cold-start timings of the explorer window
+
+    python benchmarks/startup_time.py [runs]
+
+Launches the app with --measure-startup several times (needs a display,
+e.g. under xvfb-run) and prints the median import, UI build and
+first-frame times as JSON. Every run is also appended to
+~/.cuisine_explorer/startup_times.jsonl by the app itself.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                   "ASSESSMENT 2 API.py")
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    reports = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, APP, "--measure-startup"],
+                                capture_output=True, text=True, check=True).stdout
+        reports.append(json.loads(output.strip().splitlines()[-1]))
+
+    keys = [key for key in reports[0] if key.endswith("_ms")]
+    summary = {"runs": runs}
+    summary.update({key: round(statistics.median(r[key] for r in reports), 1) for key in keys})
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
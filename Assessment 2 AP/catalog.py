@@ -0,0 +1,298 @@
+"""Local mirror of the whole TheMealDB catalog
+
+Run ``python catalog.py sync`` to download every meal (via search.php?f=a..z)
+plus the area, category and ingredient lists. The explorer then answers
+country, category and Surprise Me filters from memory, and keeps working
+offline. ``python catalog_snapshot.py build`` afterwards writes a
+memory-mapped snapshot that later starts open in milliseconds.
+"""
+import json
+import os
+import random
+import sqlite3
+import string
+import sys
+import threading
+import time
+
+from meal_cache import DATA_DIR
+from recipe import Recipe
+
+LIST_ENDPOINTS = {
+    "areas": ("list.php?a=list", "strArea"),
+    "categories": ("list.php?c=list", "strCategory"),
+    "ingredients": ("list.php?i=list", "strIngredient"),
+}
+
+# Built by catalog_snapshot.py; used instead of parsing every stored meal
+SNAPSHOT_PATH = os.path.join(DATA_DIR, "catalog.snap")
+
+
+def normalize(value):
+    """Index key for an area, category, tag or ingredient name"""
+    return " ".join(value.split()).lower() if value else ""
+
+
+class Catalog:
+    """All known meals as Recipes, indexed by area, category, tag and ingredient
+
+    When a catalog snapshot at least as new as the last sync exists, meals
+    is a lazy mapping over it and the indexes below only hold recipes added
+    since (see catalog_snapshot.py).
+    """
+
+    def __init__(self, path=None, load=True, snapshot_path=SNAPSHOT_PATH):
+        self.path = path or os.path.join(DATA_DIR, "catalog.sqlite")
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS meals (id INTEGER PRIMARY KEY, json TEXT NOT NULL)")
+        # Lets the snapshot check list meal IDs without reading every JSON row
+        self._db.execute("CREATE INDEX IF NOT EXISTS meals_id ON meals (id)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS lists (name TEXT PRIMARY KEY, json TEXT NOT NULL)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._db.commit()
+
+        self.snapshot_path = snapshot_path
+        self.snapshot = None
+        self.meals = {}
+        self.lists = {}
+        self.by_area = {}
+        self.by_category = {}
+        self.by_tag = {}
+        self.by_ingredient = {}
+
+        # Called with each meal passed to add(), e.g. to update search indexes
+        self.listeners = []
+
+        # Only a synced catalog is complete enough to answer filters
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'synced_at'").fetchone()
+        self.synced_at = float(row[0]) if row else None
+
+        self.loaded = False
+        if load:
+            self.load()
+
+    def load(self, batch=200):
+        """Read every stored meal into memory (safe to run on a background thread)"""
+        snapshot = self._open_snapshot()
+        if snapshot is not None:
+            self._load_snapshot(snapshot)
+            return
+        with self._lock:
+            rows = self._db.execute("SELECT json FROM meals").fetchall()
+            lists = self._db.execute("SELECT name, json FROM lists").fetchall()
+        for start in range(0, len(rows), batch):
+            recipes = [Recipe.from_json(json.loads(meal_json))
+                       for meal_json, in rows[start:start + batch]]
+            with self._lock:
+                for recipe in recipes:
+                    self._index(recipe)
+        with self._lock:
+            for name, list_json in lists:
+                self.lists[name] = json.loads(list_json)
+            self.loaded = True
+
+    def _open_snapshot(self):
+        """The snapshot file if there is a usable one, else None"""
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return None
+        from catalog_snapshot import CatalogSnapshot
+
+        try:
+            snapshot = CatalogSnapshot(self.snapshot_path)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring catalog snapshot: {e}")
+            return None
+        if self.synced_at and (snapshot.synced_at or 0) < self.synced_at:
+            # Synced again since the snapshot was built
+            snapshot.close()
+            return None
+        return snapshot
+
+    def _load_snapshot(self, snapshot):
+        """Serve meals from the snapshot, parsing only stored meals it lacks
+
+        Published meals do not change, so rows the snapshot already has are
+        not read.
+        """
+        from catalog_snapshot import SnapshotMeals
+
+        with self._lock:
+            stored = snapshot.missing(
+                meal_id for meal_id, in self._db.execute("SELECT id FROM meals"))
+            rows = [self._db.execute("SELECT json FROM meals WHERE id = ?", (meal_id,)).fetchone()
+                    for meal_id in sorted(stored)]
+            lists = self._db.execute("SELECT name, json FROM lists").fetchall()
+
+            self.snapshot = snapshot
+            self.meals = SnapshotMeals(snapshot)
+            for meal_json, in rows:
+                self._index(Recipe.from_json(json.loads(meal_json)))
+            self.lists = dict(snapshot.lists)
+            for name, list_json in lists:
+                self.lists[name] = json.loads(list_json)
+            if snapshot.synced_at:
+                self.synced_at = max(self.synced_at or 0, snapshot.synced_at)
+            self.loaded = True
+
+    @property
+    def ready(self):
+        """True once a synced catalog is fully in memory"""
+        return self.loaded and self.synced_at is not None
+
+    def __len__(self):
+        return len(self.meals)
+
+    def __contains__(self, meal_id):
+        return str(meal_id) in self.meals
+
+    def _index(self, recipe):
+        if recipe.id in self.meals:
+            self._unindex(self.meals[recipe.id])
+        self.meals[recipe.id] = recipe
+
+        for index, key in self._keys(recipe):
+            index.setdefault(key, set()).add(recipe.id)
+
+    def _unindex(self, recipe):
+        for index, key in self._keys(recipe):
+            ids = index.get(key)
+            if ids:
+                ids.discard(recipe.id)
+                if not ids:
+                    del index[key]
+
+    def _keys(self, recipe):
+        """Yield (index, key) pairs a recipe belongs to"""
+        if recipe.area:
+            yield self.by_area, normalize(recipe.area)
+        if recipe.category:
+            yield self.by_category, normalize(recipe.category)
+        for tag in recipe.tags:
+            yield self.by_tag, normalize(tag)
+        for ingredient in recipe.ingredients:
+            yield self.by_ingredient, normalize(ingredient)
+
+    def add(self, recipe, commit=True):
+        """Insert or update a Recipe"""
+        with self._lock:
+            self._index(recipe)
+            self._db.execute("INSERT OR REPLACE INTO meals VALUES (?, ?)",
+                             (int(recipe.id), json.dumps(recipe.to_json())))
+            if commit:
+                self._db.commit()
+        for listener in self.listeners:
+            listener(recipe)
+
+    def recipes(self):
+        """Every Recipe as a list, safe to take while other threads add meals"""
+        with self._lock:
+            return list(self.meals.values())
+
+    def subscribe(self, listener):
+        """Add a listener; returns the IDs of the meals stored before it was added"""
+        with self._lock:
+            self.listeners.append(listener)
+            return set(self.meals)
+
+    def get(self, meal_id):
+        """Return the Recipe for an ID, or None"""
+        return self.meals.get(str(meal_id))
+
+    def ids(self, area=None, category=None, tag=None, ingredient=None):
+        """Return the set of meal IDs matching every given filter"""
+        result = None
+        with self._lock:
+            for index, value in ((self.by_area, area), (self.by_category, category),
+                                 (self.by_tag, tag), (self.by_ingredient, ingredient)):
+                if value is None:
+                    continue
+                matches = index.get(normalize(value), set())
+                result = set(matches) if result is None else result & matches
+                if not result:
+                    break
+            if result is None:
+                return set(self.meals)
+        if self.snapshot is not None:
+            # Recipes added since the snapshot are matched by the indexes above
+            overlay = self.meals.overlay
+            result |= {meal_id for meal_id in self.snapshot.ids(area, category, tag, ingredient)
+                       if meal_id not in overlay}
+        return result
+
+    def random_meal(self, area=None, category=None):
+        """Pick a random meal matching the filters, or None"""
+        ids = self.ids(area=area, category=category)
+        if not ids:
+            return None
+        return self.meals[random.choice(tuple(ids))]
+
+    def sync(self, client, progress=None):
+        """Download the whole catalog from the API through client"""
+        for name, (endpoint, field) in LIST_ENDPOINTS.items():
+            data = client.get_json(endpoint)
+            values = [item[field] for item in data.get("meals") or []]
+            with self._lock:
+                self.lists[name] = values
+                self._db.execute("INSERT OR REPLACE INTO lists VALUES (?, ?)",
+                                 (name, json.dumps(values)))
+
+        for letter in string.ascii_lowercase:
+            data = client.get_json(f"search.php?f={letter}")
+            meals = data.get("meals") or []
+            for meal in meals:
+                self.add(Recipe.from_json(meal), commit=False)
+            if progress:
+                progress(letter, len(meals))
+
+        with self._lock:
+            self.synced_at = time.time()
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('synced_at', ?)",
+                             (str(self.synced_at),))
+            self.loaded = True
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+            if self.snapshot is not None:
+                self.snapshot.close()
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in ("sync", "stats"):
+        print("usage: python catalog.py sync | stats")
+        return 2
+
+    catalog = Catalog()
+    if argv[0] == "sync":
+        from mealdb_core import MealDB
+
+        core = MealDB()
+        start = time.perf_counter()
+        catalog.sync(core.client, progress=lambda letter, count: print(f"  {letter}: {count} meals"))
+        print(f"Synced {len(catalog)} meals in {time.perf_counter() - start:.1f}s")
+        core.close()
+    elif catalog.snapshot is not None:
+        counts = catalog.snapshot.counts()
+        print(f"{len(catalog)} meals, {counts['area']} areas, "
+              f"{counts['category']} categories, "
+              f"{counts['ingredients']} ingredients, {counts['tags']} tags (snapshot)")
+    else:
+        print(f"{len(catalog)} meals, {len(catalog.by_area)} areas, "
+              f"{len(catalog.by_category)} categories, "
+              f"{len(catalog.by_ingredient)} ingredients, {len(catalog.by_tag)} tags")
+    catalog.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
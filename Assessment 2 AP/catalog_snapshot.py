@@ -0,0 +1,472 @@
+"""Binary, memory-mapped snapshot of the recipe catalog
+
+    python catalog_snapshot.py build [--from catalog|cache] [-o catalog.snap]
+    python catalog_snapshot.py verify [catalog.snap] [--against-catalog]
+    python catalog_snapshot.py info [catalog.snap]
+
+A snapshot is one file that opens with mmap in a few milliseconds whatever
+the catalog size: nothing is parsed up front, and a Recipe is decoded from
+the mapped bytes only when it is asked for, so memory grows with the
+recipes actually touched. Catalog.load() uses it automatically when
+DATA_DIR/catalog.snap exists, which lets kiosks run offline from a copied
+file. build reads the synced catalog (catalog.py sync) or, with --from
+cache, every lookup.php / search.php response in the HTTP cache.
+
+Layout: a fixed header, then 8-byte aligned column sections, then a JSON
+directory of section offsets. Meal IDs are a sorted uint32 array (the row
+of an ID is found by binary search). Free-text fields are string columns:
+a uint32 offset array plus UTF-8 bytes. Area, category, tags, ingredients
+and measures are dictionary coded: a string table plus uint32 codes, with
+a start offset array per row for the list columns.
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+import zlib
+from array import array
+from bisect import bisect_left
+from collections.abc import MutableMapping
+
+from catalog import SNAPSHOT_PATH as DEFAULT_PATH, normalize
+from recipe import Recipe
+
+MAGIC = b"CUISNAP\x00"
+VERSION = 1
+# magic, version, directory offset, directory length, CRC32 of the sections
+HEADER = struct.Struct("<8sIQII")
+HEADER_SIZE = 32
+
+TEXT_COLUMNS = ["name", "instructions", "thumb", "youtube", "source"]
+CODED_COLUMNS = ["area", "category"]
+LIST_COLUMNS = ["tags", "ingredients", "measures"]
+
+
+def _u32(values):
+    return array("I", values).tobytes()
+
+
+def _text_sections(values):
+    """(offsets, data) bytes of a string column"""
+    offsets = array("I", [0])
+    data = bytearray()
+    for value in values:
+        data += value.encode("utf-8")
+        offsets.append(len(data))
+    return offsets.tobytes(), bytes(data)
+
+
+class _Writer:
+    """Appends aligned sections to a file and keeps the directory and CRC"""
+
+    def __init__(self, f):
+        self.f = f
+        self.sections = {}
+        self.crc = 0
+        f.write(b"\0" * HEADER_SIZE)
+
+    def _write(self, data):
+        self.f.write(data)
+        self.crc = zlib.crc32(data, self.crc)
+
+    def add(self, name, data):
+        padding = -self.f.tell() % 8
+        if padding:
+            self._write(b"\0" * padding)
+        self.sections[name] = [self.f.tell(), len(data)]
+        self._write(data)
+
+    def add_text(self, name, values):
+        offsets, data = _text_sections(values)
+        self.add(f"{name}.offsets", offsets)
+        self.add(f"{name}.data", data)
+
+
+def build(recipes, path=DEFAULT_PATH, lists=None, synced_at=None):
+    """Write a snapshot of recipes to path (atomically) and return the row count"""
+    recipes = sorted({int(recipe.id): recipe for recipe in recipes}.items())
+    tmp = f"{path}.tmp"
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(tmp, "wb") as f:
+        writer = _Writer(f)
+        writer.add("id", _u32(meal_id for meal_id, _ in recipes))
+        for column in TEXT_COLUMNS:
+            writer.add_text(column, (getattr(recipe, column) or "" for _, recipe in recipes))
+
+        for column in CODED_COLUMNS + LIST_COLUMNS:
+            table = {}
+            codes = array("I")
+            starts = array("I", [0])
+            for _, recipe in recipes:
+                values = getattr(recipe, column)
+                for value in ([values or ""] if column in CODED_COLUMNS else values):
+                    codes.append(table.setdefault(value, len(table)))
+                starts.append(len(codes))
+            writer.add(f"{column}.codes", codes.tobytes())
+            if column in LIST_COLUMNS:
+                writer.add(f"{column}.starts", starts.tobytes())
+            writer.add_text(f"{column}.table", table)
+
+        directory = json.dumps({
+            "count": len(recipes),
+            "byteorder": sys.byteorder,
+            "synced_at": synced_at,
+            "built_at": time.time(),
+            "lists": lists or {},
+            "sections": writer.sections,
+        }).encode("utf-8")
+        directory_offset = f.tell()
+        f.write(directory)
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, directory_offset, len(directory), writer.crc))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return len(recipes)
+
+
+class _Strings:
+    """Read-only view of a string column; items are decoded on access"""
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return str(self.data[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+
+class CatalogSnapshot:
+    """A catalog snapshot file opened with mmap
+
+    Opening reads only the header and directory. get() decodes a Recipe
+    from the mapped columns the first time an ID is asked for and keeps
+    it; the small area / category / tag / ingredient string tables are
+    decoded on first use.
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if hasattr(mmap, "MADV_RANDOM"):
+            # Records are read one at a time; readahead would page in their neighbours
+            self._mmap.madvise(mmap.MADV_RANDOM)
+        self._buffer = memoryview(self._mmap)
+        self._views = []
+        self._recipes = {}
+        try:
+            magic, version, directory_offset, directory_length, self.crc = \
+                HEADER.unpack_from(self._buffer)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a version {VERSION} catalog snapshot")
+            directory = json.loads(
+                bytes(self._buffer[directory_offset:directory_offset + directory_length]))
+            if directory["byteorder"] != sys.byteorder:
+                raise ValueError(f"{path} was built on a {directory['byteorder']}-endian machine")
+        except Exception:
+            self.close()
+            raise
+        self._data_end = directory_offset
+        self.count = directory["count"]
+        self.synced_at = directory["synced_at"]
+        self.built_at = directory["built_at"]
+        self.lists = directory["lists"]
+        self.sections = directory["sections"]
+
+        self._ids = self._section("id", "I")
+        self._text = {column: self._strings(column) for column in TEXT_COLUMNS}
+        self._codes = {column: self._section(f"{column}.codes", "I")
+                       for column in CODED_COLUMNS + LIST_COLUMNS}
+        self._starts = {column: self._section(f"{column}.starts", "I")
+                        for column in LIST_COLUMNS}
+        self._tables = {}
+        self._postings = {}
+
+    def _section(self, name, fmt=None):
+        offset, length = self.sections[name]
+        view = self._buffer[offset:offset + length]
+        if fmt:
+            view = view.cast(fmt)
+        self._views.append(view)
+        return view
+
+    def _strings(self, column):
+        return _Strings(self._section(f"{column}.offsets", "I"), self._section(f"{column}.data"))
+
+    def _table(self, column):
+        """Decoded, interned string table of a dictionary-coded column"""
+        table = self._tables.get(column)
+        if table is None:
+            strings = self._strings(f"{column}.table")
+            table = self._tables[column] = [sys.intern(strings[i]) for i in range(len(strings))]
+        return table
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, meal_id):
+        return self.row(meal_id) is not None
+
+    def __iter__(self):
+        """Meal IDs in row order"""
+        return (str(meal_id) for meal_id in self._ids)
+
+    def row(self, meal_id):
+        """Row number of a meal ID, or None"""
+        try:
+            key = int(meal_id)
+        except (TypeError, ValueError):
+            return None
+        row = bisect_left(self._ids, key)
+        if row < self.count and self._ids[row] == key:
+            return row
+        return None
+
+    def missing(self, meal_ids):
+        """The given integer meal IDs that are not in the snapshot"""
+        return set(meal_ids).difference(self._ids)
+
+    def _values(self, column, row):
+        table = self._table(column)
+        codes = self._codes[column]
+        starts = self._starts[column]
+        return tuple(table[code] for code in codes[starts[row]:starts[row + 1]])
+
+    def recipe(self, row):
+        """Decode the Recipe stored in a row"""
+        return Recipe(
+            id=sys.intern(str(self._ids[row])),
+            name=self._text["name"][row],
+            area=self._table("area")[self._codes["area"][row]],
+            category=self._table("category")[self._codes["category"][row]],
+            tags=self._values("tags", row),
+            instructions=self._text["instructions"][row],
+            thumb=self._text["thumb"][row],
+            youtube=self._text["youtube"][row],
+            source=self._text["source"][row],
+            ingredients=self._values("ingredients", row),
+            measures=self._values("measures", row)
+        )
+
+    def get(self, meal_id):
+        """Return the Recipe for an ID, or None"""
+        meal_id = str(meal_id)
+        recipe = self._recipes.get(meal_id)
+        if recipe is None:
+            row = self.row(meal_id)
+            if row is None:
+                return None
+            recipe = self._recipes[meal_id] = self.recipe(row)
+        return recipe
+
+    def _rows_with(self, column, key):
+        """Rows whose column holds a value normalizing to key"""
+        postings = self._postings.get(column)
+        if postings is None:
+            keys = [normalize(value) for value in self._table(column)]
+            postings = self._postings[column] = {}
+            codes = self._codes[column]
+            if column in CODED_COLUMNS:
+                for row, code in enumerate(codes):
+                    postings.setdefault(keys[code], set()).add(row)
+            else:
+                starts = self._starts[column]
+                for row in range(self.count):
+                    for code in codes[starts[row]:starts[row + 1]]:
+                        postings.setdefault(keys[code], set()).add(row)
+        return postings.get(key, set())
+
+    def ids(self, area=None, category=None, tag=None, ingredient=None):
+        """Return the set of meal IDs matching every given filter"""
+        rows = None
+        for column, value in (("area", area), ("category", category),
+                              ("tags", tag), ("ingredients", ingredient)):
+            if value is None:
+                continue
+            matches = self._rows_with(column, normalize(value))
+            rows = set(matches) if rows is None else rows & matches
+            if not rows:
+                return set()
+        if rows is None:
+            return set(self)
+        return {str(self._ids[row]) for row in rows}
+
+    def counts(self):
+        """Distinct areas, categories, ingredients and tags"""
+        return {column: len({normalize(value) for value in self._table(column)} - {""})
+                for column in ("area", "category", "ingredients", "tags")}
+
+    def verify(self):
+        """Check the checksum and every record; returns a list of problems"""
+        problems = []
+        crc = zlib.crc32(self._buffer[HEADER_SIZE:self._data_end])
+        if crc != self.crc:
+            problems.append(f"checksum mismatch: {crc:08x} != {self.crc:08x}")
+        for name, (offset, length) in self.sections.items():
+            if offset < HEADER_SIZE or offset + length > self._data_end:
+                problems.append(f"section {name} lies outside the data area")
+        if problems:
+            return problems
+
+        previous = -1
+        for row, meal_id in enumerate(self._ids):
+            if meal_id <= previous:
+                problems.append(f"row {row}: ID {meal_id} out of order")
+            previous = meal_id
+        for column in LIST_COLUMNS:
+            starts = self._starts[column]
+            if len(starts) != self.count + 1 or starts[-1] != len(self._codes[column]):
+                problems.append(f"{column}: offsets do not match codes")
+        for column in CODED_COLUMNS:
+            if len(self._codes[column]) != self.count:
+                problems.append(f"{column}: expected {self.count} codes")
+        if problems:
+            return problems
+
+        for row in range(self.count):
+            try:
+                recipe = self.recipe(row)
+                if len(recipe.ingredients) != len(recipe.measures):
+                    problems.append(f"{recipe.id}: ingredients and measures differ in length")
+            except Exception as e:
+                problems.append(f"row {row}: {e!r}")
+        return problems
+
+    def close(self):
+        self._recipes.clear()
+        # Views into the map must be released before it can be closed
+        for view in reversed(self._views):
+            view.release()
+        self._views.clear()
+        self._buffer.release()
+        self._mmap.close()
+
+
+class SnapshotMeals(MutableMapping):
+    """Catalog.meals backed by a snapshot, with newer recipes layered on top"""
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.overlay = {}
+        self._extra = 0
+
+    def __getitem__(self, meal_id):
+        recipe = self.overlay.get(meal_id)
+        if recipe is None:
+            recipe = self.snapshot.get(meal_id)
+            if recipe is None:
+                raise KeyError(meal_id)
+        return recipe
+
+    def __setitem__(self, meal_id, recipe):
+        if meal_id not in self.overlay and meal_id not in self.snapshot:
+            self._extra += 1
+        self.overlay[meal_id] = recipe
+
+    def __delitem__(self, meal_id):
+        raise TypeError("recipes cannot be removed from a catalog snapshot")
+
+    def __contains__(self, meal_id):
+        return meal_id in self.overlay or meal_id in self.snapshot
+
+    def __iter__(self):
+        yield from self.overlay
+        for meal_id in self.snapshot:
+            if meal_id not in self.overlay:
+                yield meal_id
+
+    def __len__(self):
+        return len(self.snapshot) + self._extra
+
+
+def recipes_from_cache(cache):
+    """Every meal found in cached lookup.php and search.php responses"""
+    for endpoint in ("lookup.php", "search.php"):
+        for url, body in cache.bodies(endpoint):
+            try:
+                meals = json.loads(body).get("meals") or []
+            except ValueError:
+                continue
+            for meal in meals:
+                yield Recipe.from_json(meal)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build and check catalog snapshots")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="write a snapshot from local data")
+    build_parser.add_argument("--from", dest="source", choices=["catalog", "cache"],
+                              default="catalog")
+    build_parser.add_argument("-o", "--output", default=DEFAULT_PATH)
+    verify_parser = commands.add_parser("verify", help="check a snapshot's integrity")
+    verify_parser.add_argument("path", nargs="?", default=DEFAULT_PATH)
+    verify_parser.add_argument("--against-catalog", action="store_true",
+                               help="also compare every recipe with catalog.sqlite")
+    info_parser = commands.add_parser("info", help="show what a snapshot holds")
+    info_parser.add_argument("path", nargs="?", default=DEFAULT_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        start = time.perf_counter()
+        if args.source == "catalog":
+            from catalog import Catalog
+
+            # The sqlite store, not an existing snapshot, is the source
+            catalog = Catalog(snapshot_path=None)
+            count = build(catalog.meals.values(), args.output, catalog.lists, catalog.synced_at)
+            catalog.close()
+        else:
+            from meal_cache import ResponseCache
+
+            cache = ResponseCache()
+            count = build(recipes_from_cache(cache), args.output)
+            cache.close()
+        size = os.path.getsize(args.output)
+        print(f"Wrote {count} recipes to {args.output} ({size / 1024:.0f} KB) "
+              f"in {time.perf_counter() - start:.2f}s")
+        return 0
+
+    start = time.perf_counter()
+    snapshot = CatalogSnapshot(args.path)
+    opened_ms = (time.perf_counter() - start) * 1000
+    try:
+        if args.command == "info":
+            counts = snapshot.counts()
+            synced = time.ctime(snapshot.synced_at) if snapshot.synced_at else "never"
+            print(f"{snapshot.count} meals, {counts['area']} areas, "
+                  f"{counts['category']} categories, {counts['ingredients']} ingredients, "
+                  f"{counts['tags']} tags; synced {synced}; opened in {opened_ms:.2f} ms")
+            return 0
+
+        problems = snapshot.verify()
+        if args.against_catalog and not problems:
+            from catalog import Catalog
+
+            catalog = Catalog(snapshot_path=None)
+            for meal_id, recipe in catalog.meals.items():
+                stored = snapshot.get(meal_id)
+                if stored is None:
+                    problems.append(f"{meal_id}: missing from the snapshot")
+                elif stored.to_json() != recipe.to_json():
+                    problems.append(f"{meal_id}: differs from catalog.sqlite")
+            if len(catalog) != snapshot.count:
+                problems.append(f"catalog has {len(catalog)} meals, snapshot {snapshot.count}")
+            catalog.close()
+        for problem in problems:
+            print(problem)
+        print(f"{args.path}: {'FAILED' if problems else 'OK'} ({snapshot.count} meals)")
+        return 1 if problems else 0
+    finally:
+        snapshot.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""Batch export of TheMealDB recipes without the GUI
+
+    python cuisine_cli.py export --area Italian --area Greek -o italian_greek.jsonl
+    python cuisine_cli.py export --category Dessert --format csv -o desserts.csv
+
+Each --area / --category listing comes from filter.php and the meals are
+hydrated through lookup.php on a thread pool. Recipes are written as they
+arrive, so memory stays flat however large the export is. IDs whose lookup
+fails are reported on stderr and skipped; the exit status is then 1.
+The client-side rate limit grows with --workers unless --rate is given.
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+
+from mealdb_core import MealDB, DEFAULT_BASE_URL
+
+CSV_FIELDS = ["id", "name", "area", "category", "tags", "ingredients",
+              "instructions", "thumb", "youtube"]
+
+
+def export_ids(core, areas, categories):
+    """Meal IDs for every requested area and category, without duplicates"""
+    seen = set()
+    selections = [{"area": area} for area in areas]
+    selections += [{"category": category} for category in categories]
+    for selection in selections:
+        for meal_id in core.filter_ids(**selection):
+            if meal_id not in seen:
+                seen.add(meal_id)
+                yield meal_id
+
+
+def csv_row(recipe):
+    return {
+        "id": recipe.id,
+        "name": recipe.name,
+        "area": recipe.area,
+        "category": recipe.category,
+        "tags": ",".join(recipe.tags),
+        "ingredients": "; ".join(" ".join(filter(None, pair)) for pair in recipe.items()),
+        "instructions": recipe.instructions,
+        "thumb": recipe.thumb,
+        "youtube": recipe.youtube,
+    }
+
+
+def export(core, out, areas, categories, fmt="jsonl", workers=8, failed=None):
+    """Stream recipes to an open text file and return how many were written
+
+    Lookups that fail are appended to failed as (meal_id, error) when a
+    list is given, and raised otherwise.
+    """
+    if fmt == "csv":
+        writer = csv.DictWriter(out, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        write = lambda recipe: writer.writerow(csv_row(recipe))
+    else:
+        write = lambda recipe: out.write(json.dumps(recipe.to_json()) + "\n")
+
+    count = 0
+    for result in core.get_recipes_by_ids(export_ids(core, areas, categories),
+                                          concurrency=workers):
+        if result.error is not None:
+            if failed is None:
+                raise result.error
+            failed.append((result.meal_id, result.error))
+        elif result.recipe is not None:
+            write(result.recipe)
+            count += 1
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cuisine Explorer command line tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="export areas or categories to a file")
+    export_parser.add_argument("--area", action="append", default=[],
+                               help="area to export (repeatable)")
+    export_parser.add_argument("--category", action="append", default=[],
+                               help="category to export (repeatable)")
+    export_parser.add_argument("--format", choices=["jsonl", "csv"], default="jsonl")
+    export_parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    export_parser.add_argument("--workers", type=int, default=8,
+                               help="concurrent lookup.php requests")
+    export_parser.add_argument("--rate", type=float,
+                               help="lookup.php requests per second (default: scaled to "
+                                    "--workers, 0 = unlimited)")
+    export_parser.add_argument("--base-url", default=DEFAULT_BASE_URL)
+    args = parser.parse_args(argv)
+
+    if not args.area and not args.category:
+        parser.error("export needs at least one --area or --category")
+
+    core = MealDB(args.base_url)
+    core.client.ensure_pool(args.workers)
+    core.client.scale_limiter(args.workers, args.rate)
+    out = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+    start = time.perf_counter()
+    failed = []
+    try:
+        count = export(core, out, args.area, args.category, args.format, args.workers, failed)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        core.close()
+    for meal_id, error in failed:
+        print(f"Could not fetch {meal_id}: {error}", file=sys.stderr)
+    print(f"Exported {count} recipes in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
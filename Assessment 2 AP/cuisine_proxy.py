@@ -0,0 +1,317 @@
+"""Shared caching proxy for TheMealDB, for many explorers on one network
+
+    python cuisine_proxy.py [--host 0.0.0.0] [--port 8765] [--upstream URL]
+                            [--cache PATH] [--cache-mb 500] [--hot-mb 64]
+                            [--upstream-rate 20]
+
+Serves the same paths as the API (/api/json/v1/1/lookup.php?i=... and the
+/images/... thumbnails), so an explorer only needs
+CUISINE_API_URL=http://<proxy host>:8765/api/json/v1/1. Thumbnail URLs in
+JSON responses are rewritten to point back at the proxy.
+
+Upstream requests go through the usual MealDBClient (keep-alive pool, rate
+limiter, circuit breaker, coalescing of identical in-flight requests) into
+an SQLite response cache shared by every client. Finished responses,
+already rewritten and gzip-compressed for clients that accept it, are kept
+in an in-memory LRU so repeat requests cost one dict lookup. Clients get
+ETags and can revalidate with If-None-Match.
+
+GET /_proxy/stats returns hit rates, upstream traffic and throughput.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from meal_cache import DATA_DIR, ResponseCache
+from meal_client import MealDBClient
+from resilience import CircuitOpenError
+from singleflight import SingleFlight
+
+UPSTREAM_URL = "https://www.themealdb.com/api/json/v1/1"
+STATS_PATH = "/_proxy/stats"
+# Meal photos never change once published
+IMAGE_TTL = 30 * 24 * 3600
+# Below this a gzip header costs more than it saves
+MIN_GZIP_BYTES = 512
+
+
+class ProxyCache(ResponseCache):
+    """Response cache that also keeps images for IMAGE_TTL"""
+
+    def ttl_for(self, url):
+        if "/images/" in urlsplit(url).path:
+            return IMAGE_TTL
+        return super().ttl_for(url)
+
+
+class _Entry:
+    __slots__ = ("body", "content_type", "etag", "gzipped", "expires")
+
+    def __init__(self, body, content_type, etag, gzipped, expires):
+        self.body = body
+        self.content_type = content_type
+        self.etag = etag
+        self.gzipped = gzipped
+        self.expires = expires
+
+
+class CachingProxy:
+    """Everything the request handlers share: upstream client, caches and stats"""
+
+    def __init__(self, upstream=UPSTREAM_URL, cache=None, hot_bytes=64 * 1024 * 1024,
+                 client=None):
+        self.upstream = upstream.rstrip("/")
+        parts = urlsplit(self.upstream)
+        self.origin = f"{parts.scheme}://{parts.netloc}"
+        self.api_prefix = parts.path
+        self.cache = cache if cache is not None else ProxyCache(
+            os.path.join(DATA_DIR, "proxy_cache.sqlite"), max_bytes=500 * 1024 * 1024)
+        self.client = client or MealDBClient(self.upstream, cache=self.cache, pool_size=16)
+        self._flights = SingleFlight()
+
+        # In-memory LRU of finished responses, keyed by (url, host, gzip)
+        self.hot_bytes = hot_bytes
+        self._hot = OrderedDict()
+        self._hot_size = 0
+        self._lock = threading.Lock()
+
+        # Counters
+        self.started = time.time()
+        self.requests = 0
+        self.hot_hits = 0
+        self.not_modified = 0
+        self.errors = 0
+        self.bytes_out = 0
+        self.statuses = {}
+        self._seconds = deque(maxlen=60)
+
+    def route(self, path):
+        """(upstream URL, kind) for a request path, or (None, None)"""
+        request_path = urlsplit(path).path
+        if request_path.startswith(self.api_prefix + "/"):
+            return self.upstream + path[len(self.api_prefix):], "api"
+        if request_path.startswith("/images/"):
+            return self.origin + path, "image"
+        return None, None
+
+    def rewrite(self, body, host):
+        """Point upstream thumbnail URLs in a JSON body at this proxy"""
+        proxy = f"http://{host}".encode()
+        escaped = self.origin.replace("/", "\\/").encode()
+        return body.replace(self.origin.encode(), proxy).replace(
+            escaped, proxy.replace(b"/", b"\\/"))
+
+    def response(self, url, kind, host, gzip_ok):
+        """The finished _Entry for a request, from memory when possible"""
+        key = (url, host, gzip_ok)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._hot.get(key)
+            if entry is not None and entry.expires > now:
+                self._hot.move_to_end(key)
+                self.hot_hits += 1
+                return entry
+        # Uncached URLs such as random.php give every caller its own answer
+        if self.cache.ttl_for(url) <= 0:
+            return self._build(key, url, kind, host, gzip_ok)
+        return self._flights.do(key, lambda: self._build(key, url, kind, host, gzip_ok))
+
+    def _build(self, key, url, kind, host, gzip_ok):
+        body = self.client.get_bytes(url)
+        if kind == "api":
+            body = self.rewrite(body, host)
+            content_type = "application/json"
+        else:
+            content_type = mimetypes.guess_type(urlsplit(url).path)[0] or "image/jpeg"
+        # JPEGs are already compressed
+        gzipped = gzip_ok and kind == "api" and len(body) >= MIN_GZIP_BYTES
+        if gzipped:
+            body = gzip.compress(body, 6)
+        etag = '"%s"' % hashlib.blake2b(body, digest_size=8).hexdigest()
+        ttl = self.cache.ttl_for(url)
+        entry = _Entry(body, content_type, etag, gzipped, time.monotonic() + ttl)
+        if ttl > 0:
+            self._remember(key, entry)
+        return entry
+
+    def _remember(self, key, entry):
+        with self._lock:
+            old = self._hot.pop(key, None)
+            if old is not None:
+                self._hot_size -= len(old.body)
+            self._hot[key] = entry
+            self._hot_size += len(entry.body)
+            while self._hot_size > self.hot_bytes and self._hot:
+                _, evicted = self._hot.popitem(last=False)
+                self._hot_size -= len(evicted.body)
+
+    def count(self, status, size):
+        second = int(time.monotonic())
+        with self._lock:
+            self.requests += 1
+            self.bytes_out += size
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            if self._seconds and self._seconds[-1][0] == second:
+                self._seconds[-1][1] += 1
+            else:
+                self._seconds.append([second, 1])
+
+    def stats(self):
+        now = int(time.monotonic())
+        with self._lock:
+            recent = sum(count for second, count in self._seconds if now - second < 60)
+            window = min(60, max(1, time.time() - self.started))
+            stats = {
+                "uptime_s": round(time.time() - self.started, 1),
+                "requests": self.requests,
+                "statuses": {str(status): count for status, count in self.statuses.items()},
+                "hot_hits": self.hot_hits,
+                "hot_hit_ratio": round(self.hot_hits / self.requests, 3) if self.requests else 0,
+                "hot_entries": len(self._hot),
+                "hot_bytes": self._hot_size,
+                "not_modified": self.not_modified,
+                "bytes_out": self.bytes_out,
+                "requests_per_s_1m": round(recent / window, 1),
+            }
+        upstream = self.client.metrics()
+        stats["shared_cache"] = self.cache.stats()
+        stats["upstream"] = {key: upstream[key] for key in
+                             ("requests", "errors", "coalesced", "bytes", "breaker")}
+        stats["coalesced"] = self._flights.shared + upstream["coalesced"]
+        return stats
+
+    def close(self):
+        self.client.close()
+        self.cache.close()
+
+
+class ProxyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are two writes; with Nagle on, the body of a small
+    # keep-alive response would wait ~40 ms for the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        proxy = self.server.proxy
+        if self.path == STATS_PATH:
+            self.send(200, json.dumps(proxy.stats()).encode(), "application/json")
+            return
+        url, kind = proxy.route(self.path)
+        if url is None:
+            self.send(404, b'{"error": "unknown path"}', "application/json")
+            return
+
+        host = self.headers.get("Host") or "%s:%s" % self.server.server_address[:2]
+        gzip_ok = "gzip" in self.headers.get("Accept-Encoding", "")
+        try:
+            entry = proxy.response(url, kind, host, gzip_ok)
+        except CircuitOpenError as e:
+            self.send(503, str(e).encode(), "text/plain",
+                      {"Retry-After": str(int(e.retry_in) + 1)})
+            return
+        except Exception as e:
+            response = getattr(e, "response", None)
+            status = response.status_code if response is not None else 502
+            with proxy._lock:
+                proxy.errors += 1
+            self.send(status, str(e).encode(), "text/plain")
+            return
+
+        headers = {"ETag": entry.etag, "Vary": "Accept-Encoding"}
+        if entry.gzipped:
+            headers["Content-Encoding"] = "gzip"
+        if self.headers.get("If-None-Match") == entry.etag:
+            with proxy._lock:
+                proxy.not_modified += 1
+            self.send(304, b"", None, headers)
+            return
+        self.send(200, entry.body, entry.content_type, headers)
+
+    def send(self, status, body, content_type, headers=None):
+        self.server.proxy.count(status, len(body))
+        self.send_response(status)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+
+class ProxyServer(ThreadingHTTPServer):
+    """HTTP/1.1 keep-alive server, one thread per client connection"""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address, proxy):
+        super().__init__(address, ProxyHandler)
+        self.proxy = proxy
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{self.proxy.api_prefix}"
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Caching proxy for TheMealDB")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--upstream", default=UPSTREAM_URL, help="API base URL to forward to")
+    parser.add_argument("--cache", default=os.path.join(DATA_DIR, "proxy_cache.sqlite"),
+                        help="shared response cache file")
+    parser.add_argument("--cache-mb", type=int, default=500)
+    parser.add_argument("--hot-mb", type=int, default=64, help="in-memory response cache")
+    parser.add_argument("--upstream-rate", type=float, default=20,
+                        help="upstream requests per second (0 = unlimited)")
+    parser.add_argument("--stats-every", type=float, default=60,
+                        help="print stats every N seconds (0 = never)")
+    args = parser.parse_args(argv)
+
+    cache = ProxyCache(args.cache, max_bytes=args.cache_mb << 20)
+    client = MealDBClient(args.upstream, cache=cache, pool_size=16,
+                          rate=args.upstream_rate or None)
+    proxy = CachingProxy(args.upstream, cache, hot_bytes=args.hot_mb << 20, client=client)
+    server = ProxyServer((args.host, args.port), proxy)
+    print(f"Proxying {proxy.upstream} at {server.base_url}", flush=True)
+
+    def report():
+        while True:
+            time.sleep(args.stats_every)
+            stats = proxy.stats()
+            print(f"{stats['requests']} requests, {stats['requests_per_s_1m']}/s, "
+                  f"{stats['hot_hit_ratio']:.0%} from memory, "
+                  f"{stats['upstream']['requests']} upstream", flush=True)
+
+    if args.stats_every > 0:
+        threading.Thread(target=report, name="proxy-stats", daemon=True).start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(proxy.stats(), indent=2))
+        proxy.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
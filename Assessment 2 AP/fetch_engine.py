@@ -0,0 +1,137 @@
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from tracing import span
+
+
+class FetchEngine:
+    """Runs blocking work on a thread pool and hands results back to the Tk thread
+
+    Every job belongs to a channel (e.g. "recipe" or "image"). Submitting a new
+    job on a channel supersedes the previous one: if it has not started yet it
+    is cancelled, and if it has, its result is dropped instead of delivered.
+    A job submitted with the same key as the one already in flight on its
+    channel is not run again; the running job's result goes to the newest
+    callbacks instead.
+    """
+
+    def __init__(self, root, workers=4, poll_ms=15, budget_ms=8):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.budget = budget_ms / 1000.0
+        self.on_busy_change = None
+
+        self._pool = ThreadPoolExecutor(max_workers=workers,
+                                        thread_name_prefix="fetch")
+        self._results = queue.SimpleQueue()
+        self._generation = {}
+        self._futures = {}
+        self._keys = {}
+        self._handlers = {}
+        self._pending = 0
+        self._closed = False
+
+        # Counters
+        self.submitted = 0
+        self.coalesced = 0
+        self.superseded = 0
+
+        self._poll_id = self.root.after(self.poll_ms, self._poll)
+
+    def submit(self, channel, work, on_done, on_error=None, key=None):
+        """Run work() in the background and call on_done(result) on the Tk thread"""
+        self.submitted += 1
+        self._handlers[channel] = (on_done, on_error)
+        if key is not None and self._keys.get(channel) == key:
+            # Same request already in flight - let it answer this one too
+            self.coalesced += 1
+            return self._generation[channel]
+
+        generation = self._generation.get(channel, 0) + 1
+        self._generation[channel] = generation
+        self._keys[channel] = key
+
+        # Cancel the job this one replaces if it is still waiting for a worker
+        previous = self._futures.get(channel)
+        if previous is not None and previous.cancel():
+            self.superseded += 1
+            self._set_pending(self._pending - 1)
+
+        def run():
+            try:
+                with span(f"work.{channel}"):
+                    result = work()
+            except Exception as e:
+                self._results.put((channel, generation, None, e))
+            else:
+                self._results.put((channel, generation, result, None))
+
+        self._set_pending(self._pending + 1)
+        self._futures[channel] = self._pool.submit(run)
+        return generation
+
+    def cancel(self, channel):
+        """Drop whatever is in flight on a channel"""
+        self._generation[channel] = self._generation.get(channel, 0) + 1
+        self._keys.pop(channel, None)
+        future = self._futures.pop(channel, None)
+        if future is not None and future.cancel():
+            self._set_pending(self._pending - 1)
+
+    def is_current(self, channel, generation):
+        """True if generation is still the latest job on channel"""
+        return self._generation.get(channel) == generation
+
+    @property
+    def busy(self):
+        return self._pending > 0
+
+    def _set_pending(self, value):
+        was_busy = self._pending > 0
+        self._pending = value
+        if was_busy != (value > 0) and self.on_busy_change:
+            self.on_busy_change(value > 0)
+
+    def _poll(self):
+        """Deliver finished jobs, stopping once the frame budget is spent"""
+        deadline = time.perf_counter() + self.budget
+        while time.perf_counter() < deadline:
+            try:
+                channel, generation, result, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            self._set_pending(self._pending - 1)
+            if self._generation.get(channel) != generation:
+                self.superseded += 1
+                continue  # Superseded by a newer action, never rendered
+            self._keys.pop(channel, None)
+            on_done, on_error = self._handlers[channel]
+
+            try:
+                with span(f"deliver.{channel}"):
+                    if error is None:
+                        on_done(result)
+                    elif on_error:
+                        on_error(error)
+                    else:
+                        print(f"{channel} error: {error}")
+            except Exception as e:
+                print(f"{channel} callback error: {e}")
+
+        if not self._closed:
+            self._poll_id = self.root.after(self.poll_ms, self._poll)
+
+    def stats(self):
+        return {"submitted": self.submitted, "coalesced": self.coalesced,
+                "superseded": self.superseded, "pending": self._pending}
+
+    def shutdown(self):
+        """Stop polling and abandon any queued work"""
+        self._closed = True
+        try:
+            self.root.after_cancel(self._poll_id)
+        except Exception:
+            pass
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,173 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+
+from meal_cache import DATA_DIR
+from singleflight import SingleFlight
+from tracing import span
+
+# TheMealDB serves a ~250px thumbnail when "/preview" is appended to a meal image URL
+PREVIEW_SUFFIX = "/preview"
+PREVIEW_SIZE = 250
+
+_thumb_format = None
+
+
+def thumb_format():
+    """WebP when Pillow was built with it, otherwise JPEG"""
+    global _thumb_format
+    if _thumb_format is None:
+        from PIL import features
+        _thumb_format = "WEBP" if features.check("webp") else "JPEG"
+    return _thumb_format
+
+
+class ImagePipeline:
+    """Recipe thumbnails with a PhotoImage LRU in memory and resized copies on disk"""
+
+    def __init__(self, client, cache_dir=None, memory_items=64,
+                 max_disk_bytes=100 * 1024 * 1024):
+        self.client = client
+        self.cache_dir = cache_dir or os.path.join(DATA_DIR, "thumbs")
+        self.memory_items = memory_items
+        self.max_disk_bytes = max_disk_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self._photos = OrderedDict()
+        self._lock = threading.Lock()
+        self._saves = 0
+        self._flights = SingleFlight()
+
+        # Counters
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.downloads = 0
+
+    def _path(self, url, size):
+        key = hashlib.sha1(f"{url}|{size[0]}x{size[1]}".encode()).hexdigest()
+        ext = "webp" if thumb_format() == "WEBP" else "jpg"
+        return os.path.join(self.cache_dir, f"{key}.{ext}")
+
+    def get_photo(self, url, size):
+        """Return a ready PhotoImage if one is in memory (Tk thread only)"""
+        photo = self._photos.get((url, size))
+        if photo is not None:
+            self._photos.move_to_end((url, size))
+            self.memory_hits += 1
+        return photo
+
+    def to_photo(self, url, size, img):
+        """Turn a loaded thumbnail into a PhotoImage and remember it (Tk thread only)"""
+        from PIL import ImageTk
+        with span("image.photo"):
+            photo = ImageTk.PhotoImage(img)
+        self._photos[(url, size)] = photo
+        self._photos.move_to_end((url, size))
+        while len(self._photos) > self.memory_items:
+            self._photos.popitem(last=False)
+        return photo
+
+    def load(self, url, size):
+        """Return a PIL thumbnail of url at size, from disk or the network (any thread)
+
+        Concurrent loads of the same thumbnail share one download and resize.
+        """
+        return self._flights.do((url, size), lambda: self._load(url, size))
+
+    def _load(self, url, size):
+        # Pillow is imported here, off the startup path
+        from PIL import Image
+
+        path = self._path(url, size)
+        try:
+            with span("image.disk_read"):
+                img = Image.open(path)
+                img.load()
+            self.disk_hits += 1
+            return img
+        except (OSError, ValueError):
+            pass
+
+        img = self._download(url, size)
+        if img.size != size:
+            with span("image.resize"):
+                img = img.resize(size, Image.Resampling.LANCZOS)
+
+        # Write to a temp name first so a crash never leaves half a file
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with span("image.save"):
+            img.save(tmp, thumb_format(), quality=85)
+            os.replace(tmp, path)
+
+        with self._lock:
+            self._saves += 1
+            prune = self._saves % 50 == 0
+        if prune:
+            self.prune()
+        return img
+
+    def _download(self, url, size):
+        """Fetch the smallest source that still covers size and decode it cheaply"""
+        data = None
+        if max(size) <= PREVIEW_SIZE:
+            try:
+                data = self._fetch(url + PREVIEW_SUFFIX)
+            except Exception:
+                data = None  # Fall back to the full image
+        if data is None:
+            data = self._fetch(url)
+        self.downloads += 1
+
+        from PIL import Image
+        with span("image.decode", bytes=len(data)):
+            img = Image.open(io.BytesIO(data))
+            # Let libjpeg decode at 1/2, 1/4 or 1/8 scale when that is still big enough
+            img.draft("RGB", size)
+            return img.convert("RGB")
+
+    def _fetch(self, url):
+        response = self.client.get(url)
+        response.raise_for_status()
+        return response.content
+
+    def prune(self):
+        """Delete the least recently used thumbnails once the disk cache is over budget"""
+        entries = []
+        total = 0
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.is_file():
+                    stat = entry.stat()
+                    entries.append((stat.st_atime, stat.st_size, entry.path))
+                    total += stat.st_size
+        entries.sort()
+        for _, file_size, path in entries:
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= file_size
+            except OSError:
+                pass
+
+    def clear(self):
+        """Forget every thumbnail in memory and on disk"""
+        self._photos.clear()
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.is_file():
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
+
+    def stats(self):
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "downloads": self.downloads,
+            "coalesced": self._flights.shared,
+            "photos_in_memory": len(self._photos),
+        }
@@ -0,0 +1,105 @@
+import threading
+from array import array
+from collections import Counter
+
+from catalog import normalize
+
+
+# Words that end in s without being plurals
+NOT_PLURAL = {"asparagus", "couscous", "hummus", "houmous", "citrus", "octopus", "haggis",
+              "molasses", "swiss", "brussels"}
+# Plurals the suffix rules below get wrong
+IRREGULAR_PLURALS = {"chillies": "chilli", "chilies": "chili", "leaves": "leaf",
+                     "loaves": "loaf", "halves": "half"}
+
+
+def singular(word):
+    """Best-effort singular of an ingredient word: tomatoes, cherries, eggs"""
+    if word in IRREGULAR_PLURALS:
+        return IRREGULAR_PLURALS[word]
+    if word in NOT_PLURAL or not word.endswith("s") or word.endswith(("ss", "us", "is")):
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith(("oes", "ches", "shes", "xes", "sses")):
+        return word[:-2]
+    return word[:-1]
+
+
+def ingredient_key(name):
+    """Normalize an ingredient so 'Tomatoes', ' tomato ' and 'TOMATO' share one key"""
+    key = normalize(name)
+    if key in NOT_PLURAL:
+        return key
+    head, _, last = key.rpartition(" ")
+    return f"{head} {singular(last)}" if head else singular(last)
+
+
+def recipe_ingredients(recipe):
+    """Return the distinct ingredient keys of a Recipe"""
+    keys = []
+    for ingredient in recipe.ingredients:
+        key = ingredient_key(ingredient)
+        if key not in keys:
+            keys.append(key)
+    return keys
+
+
+class IngredientIndex:
+    """Inverted index from ingredient to meals for "what can I cook" searches
+
+    Each meal gets a dense row number and every ingredient maps to a sorted
+    array of row numbers, so a query only touches the postings of the
+    ingredients it names.
+    """
+
+    def __init__(self, recipes=()):
+        self._lock = threading.Lock()
+        self.meal_ids = []
+        self.ingredient_counts = array("H")
+        self.postings = {}
+        self._rows = {}
+        for recipe in recipes:
+            self.add(recipe)
+
+    def __len__(self):
+        return len(self.meal_ids)
+
+    def add(self, recipe):
+        """Index one Recipe; recipes already indexed are skipped"""
+        with self._lock:
+            if recipe.id in self._rows:
+                return
+            row = len(self.meal_ids)
+            self._rows[recipe.id] = row
+            self.meal_ids.append(recipe.id)
+
+            keys = recipe_ingredients(recipe)
+            self.ingredient_counts.append(len(keys))
+            # Rows only ever grow, so appending keeps every posting list sorted
+            for key in keys:
+                self.postings.setdefault(key, array("I")).append(row)
+
+    def search(self, ingredients, require_all=False, limit=50):
+        """Rank meals by how many of the given ingredients they use
+
+        Returns (meal_id, matched, total) tuples, best first: most query
+        ingredients matched, then fewest other ingredients needed.
+        """
+        keys = {ingredient_key(name) for name in ingredients if name.strip()}
+        if not keys:
+            return []
+
+        with self._lock:
+            counts = Counter()
+            for key in keys:
+                counts.update(self.postings.get(key, ()))
+
+            needed = len(keys) if require_all else 1
+            ranked = [
+                (-matched, self.ingredient_counts[row] - matched, row)
+                for row, matched in counts.items() if matched >= needed
+            ]
+            ranked.sort()
+            return [(self.meal_ids[row], -neg_matched, self.ingredient_counts[row])
+                    for neg_matched, _, row in ranked[:limit]]
@@ -0,0 +1,195 @@
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlsplit
+
+from resilience import CircuitOpenError
+
+# Where the explorer keeps everything it stores between runs
+# (CUISINE_DATA_DIR points benchmarks at a throwaway directory)
+DATA_DIR = os.environ.get("CUISINE_DATA_DIR") or \
+    os.path.join(os.path.expanduser("~"), ".cuisine_explorer")
+
+# How long each endpoint's response stays fresh (seconds).
+# A meal never changes once published, listings change rarely and
+# random.php must never be answered from the cache.
+ENDPOINT_TTLS = {
+    "lookup.php": 30 * 24 * 3600,
+    "list.php": 7 * 24 * 3600,
+    "categories.php": 7 * 24 * 3600,
+    "filter.php": 24 * 3600,
+    "search.php": 24 * 3600,
+    "random.php": 0,
+}
+DEFAULT_TTL = 3600
+
+
+class ResponseCache:
+    """SQLite-backed HTTP response cache with per-endpoint TTLs and LRU eviction"""
+
+    def __init__(self, path=None, max_bytes=50 * 1024 * 1024, ttls=None):
+        self.path = path or os.path.join(DATA_DIR, "responses.sqlite")
+        self.max_bytes = max_bytes
+        self.ttls = dict(ENDPOINT_TTLS if ttls is None else ttls)
+
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        # Worker threads share the connection, so guard it ourselves
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        """)
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS responses_lru ON responses(last_access)")
+        self._db.commit()
+
+        self._total_bytes = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.stale_served = 0
+        self.evictions = 0
+
+    def ttl_for(self, url):
+        """Return the freshness lifetime for a URL based on its endpoint"""
+        endpoint = urlsplit(url).path.rsplit("/", 1)[-1]
+        return self.ttls.get(endpoint, DEFAULT_TTL)
+
+    def fetch(self, url, get):
+        """Return the body for url, calling get(url, headers=...) only when needed"""
+        ttl = self.ttl_for(url)
+        if ttl <= 0:
+            # Never cached, e.g. random.php
+            self.misses += 1
+            response = get(url, headers={})
+            response.raise_for_status()
+            return response.content
+
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body, etag, last_modified, expires_at FROM responses WHERE url = ?",
+                (url,)
+            ).fetchone()
+            if row and row[3] > now:
+                self._db.execute(
+                    "UPDATE responses SET last_access = ? WHERE url = ?", (now, url))
+                self._db.commit()
+                self.hits += 1
+                return row[0]
+
+        # Stale or missing - revalidate if the server gave us validators
+        headers = {}
+        if row:
+            if row[1]:
+                headers["If-None-Match"] = row[1]
+            if row[2]:
+                headers["If-Modified-Since"] = row[2]
+
+        try:
+            response = get(url, headers=headers)
+        except CircuitOpenError:
+            # Offline: an expired copy beats an error
+            if not row:
+                raise
+            self.stale_served += 1
+            return row[0]
+        if row and response.status_code == 304:
+            with self._lock:
+                self._db.execute(
+                    "UPDATE responses SET expires_at = ?, last_access = ? WHERE url = ?",
+                    (now + ttl, now, url)
+                )
+                self._db.commit()
+            self.revalidated += 1
+            return row[0]
+
+        response.raise_for_status()
+        self.misses += 1
+        body = response.content
+        self.store(url, body, ttl,
+                   etag=response.headers.get("ETag"),
+                   last_modified=response.headers.get("Last-Modified"))
+        return body
+
+    def store(self, url, body, ttl=None, etag=None, last_modified=None):
+        """Insert or replace a cached body and evict old entries if over budget"""
+        if ttl is None:
+            ttl = self.ttl_for(url)
+        now = time.time()
+        with self._lock:
+            old = self._db.execute(
+                "SELECT size FROM responses WHERE url = ?", (url,)).fetchone()
+            if old:
+                self._total_bytes -= old[0]
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, body, etag, last_modified, now + ttl, now, len(body))
+            )
+            self._total_bytes += len(body)
+            self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits max_bytes"""
+        while self._total_bytes > self.max_bytes:
+            victims = self._db.execute(
+                "SELECT url, size FROM responses ORDER BY last_access LIMIT 32"
+            ).fetchall()
+            if not victims:
+                break
+            for url, size in victims:
+                self._db.execute("DELETE FROM responses WHERE url = ?", (url,))
+                self._total_bytes -= size
+                self.evictions += 1
+                if self._total_bytes <= self.max_bytes:
+                    break
+
+    def clear(self):
+        """Remove every cached response"""
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+            self._total_bytes = 0
+
+    def bodies(self, endpoint):
+        """Yield (url, body) for every cached response of an endpoint, fresh or not"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT url, body FROM responses WHERE url LIKE ?", (f"%/{endpoint}%",)
+            ).fetchall()
+        yield from rows
+
+    def stats(self):
+        """Return hit/miss counters and current size"""
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+            "stale_served": self.stale_served,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": self._total_bytes,
+        }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,218 @@
+import json
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+from resilience import CircuitBreaker, TokenBucket
+from singleflight import SingleFlight
+from tracing import span
+
+# Requests per second each bulk worker may send: about one 200 ms round trip
+BULK_RATE_PER_WORKER = 5.0
+
+
+class MealDBClient:
+    """Shared HTTP client for TheMealDB with pooling, timeouts and retries
+
+    requests is only imported when the first request is sent, so creating
+    a client costs nothing at startup. Every request first takes a token
+    from a rate limiter (rate per second, bursts of burst; rate=None turns
+    it off) and passes a circuit breaker, which fails fast with
+    CircuitOpenError while the API keeps erroring.
+    """
+
+    def __init__(self, base_url, cache=None, connect_timeout=3.05, read_timeout=10,
+                 retries=3, backoff=0.5, pool_size=8, history=200, rate=20.0, burst=30,
+                 failure_threshold=3, reset_timeout=15.0):
+        self.base_url = base_url.rstrip("/")
+        self.cache = cache
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.pool_size = pool_size
+        self._session = None
+        self._adapter = None
+        self._retry = None
+        # Adapters replaced by ensure_pool(), kept until close() so their
+        # connections can finish the requests they are serving
+        self._retired = []
+        # Identical requests already on the wire share one response
+        self._flights = SingleFlight()
+        self.limiter = TokenBucket(rate, burst) if rate else None
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+
+        # Latency metrics
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=history)
+        self.requests_sent = 0
+        self.bytes_received = 0
+        self.errors = 0
+
+    @property
+    def session(self):
+        """The pooled requests.Session, built on first use"""
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = self._build_session()
+        return self._session
+
+    def _build_session(self):
+        import requests
+        from urllib3.util.retry import Retry
+
+        # Exponential backoff on throttling and server errors
+        self._retry = Retry(
+            total=self.retries,
+            connect=self.retries,
+            read=self.retries,
+            status=self.retries,
+            backoff_factor=self.backoff,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        session = requests.Session()
+        self._mount(session)
+        session.headers["User-Agent"] = "GlobalCuisineExplorer/1.0"
+        return session
+
+    def _mount(self, session):
+        """Serve session through a new adapter with pool_size connections per host"""
+        from requests.adapters import HTTPAdapter
+
+        self._adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size,
+                                    max_retries=self._retry)
+        session.mount("https://", self._adapter)
+        session.mount("http://", self._adapter)
+
+    def ensure_pool(self, size):
+        """Keep at least size connections per host, e.g. for size parallel lookups
+
+        Requests beyond the pool size would each open a connection and throw
+        it away afterwards. Call it before the first request where possible;
+        once the session exists a larger adapter is mounted and the old one
+        is left to drain.
+        """
+        with self._lock:
+            if size <= self.pool_size:
+                return
+            self.pool_size = size
+            if self._session is not None:
+                self._retired.append(self._adapter)
+                self._mount(self._session)
+
+    def scale_limiter(self, concurrency, rate=None):
+        """Size the rate limit for concurrency parallel requests, or set it to rate
+
+        Without rate the limit grows to BULK_RATE_PER_WORKER requests per
+        second per worker, with a burst covering two windows of requests,
+        and never shrinks below the current one. A given rate allows bursts
+        of up to one second's worth; rate=0 turns the limit off.
+        """
+        if rate == 0:
+            self.limiter = None
+            return
+        if rate is not None:
+            self.limiter = TokenBucket(rate, max(1.0, min(rate, 2 * concurrency)))
+            return
+        if self.limiter is not None:
+            self.limiter = TokenBucket(max(self.limiter.rate, BULK_RATE_PER_WORKER * concurrency),
+                                       max(self.limiter.burst, 2 * concurrency))
+
+    def url(self, endpoint):
+        """Build a full URL from an endpoint such as 'lookup.php?i=52772'"""
+        return f"{self.base_url}/{endpoint}"
+
+    def get(self, url, headers=None):
+        """Send a GET on the pooled session and record how long it took"""
+        self.breaker.before_call()
+        try:
+            if self.limiter is not None:
+                self.limiter.acquire()
+            session = self.session
+            start = time.perf_counter()
+            with span("http.get", url=url):
+                response = session.get(url, headers=headers, timeout=self.timeout)
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            self.breaker.record_failure()
+            raise
+        elapsed = time.perf_counter() - start
+        # Throttling and server errors count against the API; 404s do not
+        if response.status_code == 429 or response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+        with self._lock:
+            self.requests_sent += 1
+            self.bytes_received += len(response.content)
+            self._latencies.append((url, response.status_code, elapsed))
+        return response
+
+    def get_bytes(self, url):
+        """Return the body for any URL, going through the cache if there is one"""
+        # random.php must give every caller its own meal
+        if urlsplit(url).path.endswith("random.php"):
+            return self._fetch_bytes(url)
+        return self._flights.do(url, lambda: self._fetch_bytes(url))
+
+    def _fetch_bytes(self, url):
+        if self.cache is not None:
+            with span("cache.fetch", url=url):
+                return self.cache.fetch(url, self.get)
+        response = self.get(url)
+        response.raise_for_status()
+        return response.content
+
+    def get_json(self, endpoint):
+        """GET an API endpoint and parse the JSON"""
+        body = self.get_bytes(self.url(endpoint))
+        with span("json.parse", endpoint=endpoint, bytes=len(body)):
+            return json.loads(body)
+
+    def connections_opened(self):
+        """Number of TCP connections the pool has had to open so far"""
+        if self._adapter is None:
+            return 0
+        total = 0
+        for adapter in self._retired + [self._adapter]:
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is not None:
+                    total += pool.num_connections
+        return total
+
+    def metrics(self):
+        """Return request counts and latency percentiles in milliseconds"""
+        with self._lock:
+            samples = sorted(elapsed for _, _, elapsed in self._latencies)
+            metrics = {
+                "requests": self.requests_sent,
+                "errors": self.errors,
+                "coalesced": self._flights.shared,
+                "bytes": self.bytes_received,
+                "connections_opened": self.connections_opened(),
+                "breaker": self.breaker.stats(),
+            }
+        if self.limiter is not None:
+            metrics["throttle"] = self.limiter.stats()
+        if samples:
+            metrics["latency_ms"] = {
+                "p50": samples[len(samples) // 2] * 1000,
+                "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000,
+                "max": samples[-1] * 1000,
+                "last": self._latencies[-1][2] * 1000,
+            }
+        return metrics
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+        for adapter in self._retired:
+            adapter.close()
@@ -0,0 +1,189 @@
+import random
+import threading
+import time
+
+from ingredient_index import ingredient_key, recipe_ingredients
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# Already in every kitchen, so sharing them does not shorten the shopping list
+STAPLES = {ingredient_key(name) for name in (
+    "Salt", "Black Pepper", "Pepper", "Water", "Olive Oil", "Vegetable Oil", "Sugar")}
+
+
+class MealPlanner:
+    """Picks a week of recipes that share as many ingredients as possible
+
+    Recipes are rows of a NumPy recipe x ingredient 0/1 matrix. A plan is
+    built greedily (each day adds the recipe bringing the fewest new
+    ingredients) from several starting recipes, then improved by swapping
+    one day at a time for whichever candidate shrinks the ingredient union
+    most. Every step scores all candidates with one matrix-vector product.
+    """
+
+    def __init__(self, recipes=(), ignore=STAPLES):
+        self._lock = threading.Lock()
+        self.ignore = set(ignore)
+        self.recipes = []
+        self._rows = {}
+        self._columns = {}
+        self._cells = []
+        self._matrix = None
+        for recipe in recipes:
+            self.add(recipe)
+
+    def __len__(self):
+        return len(self.recipes)
+
+    def add(self, recipe):
+        """Add one Recipe; the matrix is rebuilt on the next plan"""
+        with self._lock:
+            if recipe.id in self._rows:
+                return
+            row = len(self.recipes)
+            self._rows[recipe.id] = row
+            self.recipes.append(recipe)
+            for key in recipe_ingredients(recipe):
+                if key not in self.ignore:
+                    column = self._columns.setdefault(key, len(self._columns))
+                    self._cells.append((row, column))
+            self._matrix = None
+
+    def matrix(self):
+        """The recipe x ingredient matrix as float32 (1.0 = uses it)"""
+        with self._lock:
+            return self._current_matrix()
+
+    def _current_matrix(self):
+        """matrix() for callers already holding the lock"""
+        import numpy as np
+
+        if self._matrix is None:
+            matrix = np.zeros((len(self.recipes), max(1, len(self._columns))), np.float32)
+            if self._cells:
+                rows, columns = zip(*self._cells)
+                matrix[list(rows), list(columns)] = 1.0
+            self._matrix = matrix
+        return self._matrix
+
+    def plan(self, days=7, areas=None, categories=None, max_per_category=2, fixed=(),
+             restarts=12, time_budget=0.5, seed=None):
+        """Return (recipes, distinct ingredient count) for a week
+
+        areas / categories limit the candidates when given; fixed recipes
+        (e.g. days already planned) are kept and count towards the union.
+        No category appears more than max_per_category times among the
+        chosen recipes, unless the other categories run out before the
+        week is full. No recipe is chosen twice; returns fewer than days
+        recipes when there are not enough candidates.
+        """
+        import numpy as np
+
+        for recipe in fixed:
+            self.add(recipe)
+        # Rows and matrix from the same moment; catalog listeners may add() meanwhile
+        with self._lock:
+            matrix = self._current_matrix()
+            fixed_rows = [self._rows[recipe.id] for recipe in fixed]
+            candidates = np.array([
+                row for row, recipe in enumerate(self.recipes)
+                if (not areas or recipe.area in areas)
+                and (not categories or recipe.category in categories)
+                and row not in fixed_rows
+            ], dtype=np.int64)
+        slots = min(days - len(fixed_rows), len(candidates))
+        if slots <= 0:
+            return [self.recipes[row] for row in fixed_rows], self._distinct(fixed_rows)
+
+        sub = matrix[candidates]
+        base = matrix[fixed_rows].sum(axis=0) if fixed_rows else \
+            np.zeros(matrix.shape[1], np.float32)
+        category_of = [self.recipes[row].category for row in candidates]
+        # A single-category plan cannot keep to the variety limit
+        limit = max(max_per_category, -(-slots // len(set(category_of))))
+        sizes = sub.sum(axis=1)
+
+        rng = random.Random(seed)
+        # Start from small recipes first, then random ones for variety
+        starts = [int(i) for i in np.argsort(sizes, kind="stable")[:restarts // 2]]
+        starts += rng.sample(range(len(candidates)), min(len(candidates), restarts - len(starts)))
+
+        best, best_cost = None, None
+        deadline = time.perf_counter() + time_budget
+        for start in starts:
+            chosen = self._greedy(sub, base, category_of, start, slots, limit)
+            chosen, cost = self._improve(sub, base, category_of, chosen, limit)
+            if best_cost is None or cost < best_cost:
+                best, best_cost = chosen, cost
+            if time.perf_counter() > deadline:
+                break
+
+        rows = fixed_rows + [int(candidates[i]) for i in best]
+        return [self.recipes[row] for row in rows], int(best_cost)
+
+    def _distinct(self, rows):
+        if not rows:
+            return 0
+        return int((self.matrix()[rows].sum(axis=0) > 0).sum())
+
+    @staticmethod
+    def _allowed(category_of, chosen, max_per_category, skip=None):
+        """Mask of candidates that would not break the per-category limit"""
+        import numpy as np
+
+        counts = {}
+        for i in chosen:
+            if i != skip:
+                counts[category_of[i]] = counts.get(category_of[i], 0) + 1
+        allowed = np.array([counts.get(category, 0) < max_per_category
+                            for category in category_of])
+        for i in chosen:
+            allowed[i] = False
+        return allowed
+
+    def _greedy(self, sub, base, category_of, start, slots, max_per_category):
+        import numpy as np
+
+        chosen = [start]
+        covered = base + sub[start]
+        while len(chosen) < slots:
+            added = sub @ (covered == 0).astype(np.float32)
+            allowed = self._allowed(category_of, chosen, max_per_category)
+            added[~allowed] = np.inf
+            pick = int(np.argmin(added))
+            if not np.isfinite(added[pick]):
+                # Every category left is at its limit; take any recipe not chosen yet
+                added = sub @ (covered == 0).astype(np.float32)
+                added[chosen] = np.inf
+                pick = int(np.argmin(added))
+                if not np.isfinite(added[pick]):
+                    break
+            chosen.append(pick)
+            covered = covered + sub[pick]
+        return chosen
+
+    def _improve(self, sub, base, category_of, chosen, max_per_category, rounds=10):
+        """Swap single days while that shrinks the ingredient union"""
+        import numpy as np
+
+        covered = base + sub[chosen].sum(axis=0)
+        cost = int((covered > 0).sum())
+        for _ in range(rounds):
+            improved = False
+            for slot, current in enumerate(chosen):
+                without = covered - sub[current]
+                added = sub @ (without == 0).astype(np.float32)
+                allowed = self._allowed(category_of, chosen, max_per_category, skip=current)
+                added[~allowed] = np.inf
+                pick = int(np.argmin(added))
+                if not np.isfinite(added[pick]):
+                    continue
+                new_cost = int((without > 0).sum() + added[pick])
+                if new_cost < cost:
+                    chosen[slot] = pick
+                    covered = without + sub[pick]
+                    cost = new_cost
+                    improved = True
+            if not improved:
+                break
+        return chosen, cost
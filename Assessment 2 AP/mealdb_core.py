@@ -0,0 +1,176 @@
+"""UI-free access to TheMealDB: fetching, parsing and filtering recipes
+
+Everything here works without Tk, so it can be used from scripts, batch
+jobs (see cuisine_cli.py) and the explorer window alike.
+"""
+import os
+import random
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import quote
+
+from meal_cache import ResponseCache
+from meal_client import MealDBClient
+from recipe import Recipe
+from tracing import span
+
+# CUISINE_API_URL points everything at another server, e.g. the benchmark stand-in
+DEFAULT_BASE_URL = os.environ.get("CUISINE_API_URL",
+                                  "https://www.themealdb.com/api/json/v1/1")
+
+
+class LookupResult:
+    """What happened to one ID in a bulk lookup
+
+    recipe is None when the ID is unknown or the lookup failed; error
+    holds the exception in the latter case.
+    """
+
+    __slots__ = ("index", "meal_id", "recipe", "error")
+
+    def __init__(self, index, meal_id, recipe=None, error=None):
+        self.index = index
+        self.meal_id = meal_id
+        self.recipe = recipe
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None and self.recipe is not None
+
+    def __repr__(self):
+        state = self.error or (self.recipe.name if self.recipe else "not found")
+        return f"LookupResult({self.meal_id!r}, {state!r})"
+
+
+class MealDB:
+    """Recipe-level API over the cached HTTP client and optional local catalog"""
+
+    def __init__(self, base_url=DEFAULT_BASE_URL, cache=None, client=None, catalog=None):
+        self.cache = cache if cache is not None else ResponseCache()
+        self.client = client or MealDBClient(base_url, cache=self.cache)
+        self.catalog = catalog
+
+    def api_get(self, endpoint):
+        """GET an API endpoint through the response cache and parse the JSON"""
+        return self.client.get_json(endpoint)
+
+    def fetch_meal(self, endpoint):
+        """Return the first meal from an endpoint as a Recipe, or None"""
+        data = self.api_get(endpoint)
+        if not data.get("meals"):
+            return None
+        with span("recipe.parse"):
+            recipe = Recipe.from_json(data["meals"][0])
+        # Keep the local mirror up to date with anything we download
+        if self.catalog is not None and self.catalog.ready and recipe.id not in self.catalog:
+            self.catalog.add(recipe)
+        return recipe
+
+    def random_recipe(self):
+        return self.fetch_meal("random.php")
+
+    def lookup(self, meal_id):
+        """Return the Recipe for an ID, from the local catalog if possible"""
+        if self.catalog is not None and self.catalog.ready:
+            recipe = self.catalog.get(meal_id)
+            if recipe is not None:
+                return recipe
+        return self.fetch_meal(f"lookup.php?i={meal_id}")
+
+    def search(self, name):
+        """Return every Recipe whose name matches, via search.php"""
+        data = self.api_get(f"search.php?s={quote(name)}")
+        return [Recipe.from_json(meal) for meal in data.get("meals") or []]
+
+    def filter_meals(self, area=None, category=None):
+        """Return (meal_id, name, thumb) for every meal in an area and/or category
+
+        filter.php takes one filter at a time, so with both set the two
+        listings are intersected.
+        """
+        if self.catalog is not None and self.catalog.ready:
+            ids = sorted(self.catalog.ids(area=area, category=category))
+            return [(meal_id, self.catalog.get(meal_id).name, self.catalog.get(meal_id).thumb)
+                    for meal_id in ids]
+
+        meals = None
+        for key, value in (("a", area), ("c", category)):
+            if value is None:
+                continue
+            data = self.api_get(f"filter.php?{key}={quote(value)}")
+            found = [(meal["idMeal"], meal.get("strMeal") or "", meal.get("strMealThumb") or "")
+                     for meal in data.get("meals") or []]
+            if meals is None:
+                meals = found
+            else:
+                found = {meal[0] for meal in found}
+                meals = [meal for meal in meals if meal[0] in found]
+        return meals or []
+
+    def filter_ids(self, area=None, category=None):
+        """Return meal IDs for an area and/or category"""
+        return [meal[0] for meal in self.filter_meals(area=area, category=category)]
+
+    def random_filtered(self, area=None, category=None):
+        """Pick a random Recipe matching the filters, or None"""
+        if self.catalog is not None and self.catalog.ready:
+            return self.catalog.random_meal(area=area, category=category)
+        ids = self.filter_ids(area=area, category=category)
+        if not ids:
+            return None
+        return self.fetch_meal(f"lookup.php?i={random.choice(ids)}")
+
+    def _lookup_result(self, index, meal_id):
+        try:
+            return LookupResult(index, meal_id, self.lookup(meal_id))
+        except Exception as e:
+            return LookupResult(index, meal_id, error=e)
+
+    def get_recipes_by_ids(self, ids, concurrency=8, ordered=True):
+        """Yield a LookupResult for every ID, fetching up to concurrency at once
+
+        Results stream out as soon as they can: in input order when ordered
+        is true, otherwise as each lookup finishes (index tells where it
+        came from). A failed lookup is reported on its own result and does
+        not stop the others. At most 2 * concurrency lookups are in flight
+        or waiting to be consumed, so memory stays flat however many IDs
+        are streamed; stopping the iteration early cancels the rest. The
+        client's connection pool grows to concurrency if it is smaller.
+        """
+        self.client.ensure_pool(concurrency)
+        window = deque()
+
+        def drain(keep):
+            while len(window) > keep:
+                if ordered:
+                    yield window.popleft().result()
+                    continue
+                done, _ = wait(window, return_when=FIRST_COMPLETED)
+                for future in done:
+                    window.remove(future)
+                    yield future.result()
+
+        pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="lookup")
+        try:
+            for index, meal_id in enumerate(ids):
+                window.append(pool.submit(self._lookup_result, index, meal_id))
+                yield from drain(concurrency * 2 - 1)
+            yield from drain(0)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def hydrate(self, ids, workers=8):
+        """Yield the full Recipe for each ID, in order, fetching concurrently
+
+        Unknown IDs are skipped; the first failed lookup is raised.
+        """
+        for result in self.get_recipes_by_ids(ids, concurrency=workers):
+            if result.error is not None:
+                raise result.error
+            if result.recipe is not None:
+                yield result.recipe
+
+    def close(self):
+        self.client.close()
+        self.cache.close()
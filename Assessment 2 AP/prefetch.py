@@ -0,0 +1,100 @@
+import threading
+from collections import deque
+
+
+class PrefetchBuffer:
+    """Keeps the next few results of produce() ready in the background
+
+    A daemon thread tops the buffer up to depth whenever it drops to
+    low_water, so pop() normally returns immediately without touching the
+    network. If produce() fails (e.g. offline) or returns None (e.g. an
+    empty filter result) the thread backs off before trying again.
+    """
+
+    def __init__(self, name, produce, depth=3, low_water=1, max_backoff=60):
+        self.name = name
+        self.produce = produce
+        self.depth = depth
+        self.low_water = low_water
+        self.max_backoff = max_backoff
+
+        self._items = deque()
+        self._wake = threading.Condition()
+        self._stopped = False
+        self._thread = None
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.produced = 0
+        self.failures = 0
+        self.empty = 0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True,
+                                            name=f"prefetch-{self.name}")
+            self._thread.start()
+
+    def pop(self):
+        """Return the next prefetched item, or None if the buffer is empty"""
+        with self._wake:
+            if self._items:
+                item = self._items.popleft()
+                self.hits += 1
+            else:
+                item = None
+                self.misses += 1
+            if len(self._items) <= self.low_water:
+                self._wake.notify()
+        return item
+
+    def __len__(self):
+        return len(self._items)
+
+    def _run(self):
+        backoff = 1
+        while True:
+            with self._wake:
+                while not self._stopped and len(self._items) > self.low_water:
+                    self._wake.wait()
+                if self._stopped:
+                    return
+
+            # Refill all the way up to depth
+            while not self._stopped and len(self._items) < self.depth:
+                try:
+                    item = self.produce()
+                except Exception as e:
+                    self.failures += 1
+                    print(f"Prefetch {self.name} error: {e}")
+                    item = None
+                else:
+                    if item is None:
+                        self.empty += 1
+
+                if item is None:
+                    with self._wake:
+                        self._wake.wait(backoff)
+                    backoff = min(backoff * 2, self.max_backoff)
+                    continue
+
+                backoff = 1
+                with self._wake:
+                    self._items.append(item)
+                self.produced += 1
+
+    def stop(self):
+        with self._wake:
+            self._stopped = True
+            self._wake.notify_all()
+
+    def stats(self):
+        return {
+            "ready": len(self._items),
+            "hits": self.hits,
+            "misses": self.misses,
+            "produced": self.produced,
+            "failures": self.failures,
+            "empty": self.empty,
+        }
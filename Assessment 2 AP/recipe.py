@@ -0,0 +1,99 @@
+import sys
+
+MAX_INGREDIENTS = 20
+
+
+def _text(value):
+    return value.strip() if value else ""
+
+
+class Recipe:
+    """A meal parsed once from TheMealDB JSON
+
+    The API returns around 50 string fields per meal, most of them empty
+    (strIngredient1..20 / strMeasure1..20). A Recipe keeps only what the app
+    uses, stores the ingredient list as tuples and interns the strings that
+    repeat across thousands of meals (ingredients, areas, categories, tags).
+    """
+
+    __slots__ = ("id", "name", "area", "category", "tags", "instructions",
+                 "thumb", "youtube", "source", "ingredients", "measures")
+
+    def __init__(self, id, name, area="", category="", tags=(), instructions="",
+                 thumb="", youtube="", source="", ingredients=(), measures=()):
+        self.id = id
+        self.name = name
+        self.area = area
+        self.category = category
+        self.tags = tags
+        self.instructions = instructions
+        self.thumb = thumb
+        self.youtube = youtube
+        self.source = source
+        self.ingredients = ingredients
+        self.measures = measures
+
+    @classmethod
+    def from_json(cls, meal):
+        """Parse one entry of an API "meals" list"""
+        ingredients = []
+        measures = []
+        for i in range(1, MAX_INGREDIENTS + 1):
+            ingredient = meal.get(f"strIngredient{i}")
+            if ingredient and ingredient.strip():
+                ingredients.append(sys.intern(" ".join(ingredient.split())))
+                measures.append(sys.intern(_text(meal.get(f"strMeasure{i}"))))
+
+        tags = tuple(sys.intern(tag.strip())
+                     for tag in (meal.get("strTags") or "").split(",") if tag.strip())
+
+        return cls(
+            id=sys.intern(str(meal["idMeal"])),
+            name=_text(meal.get("strMeal")),
+            area=sys.intern(_text(meal.get("strArea"))),
+            category=sys.intern(_text(meal.get("strCategory"))),
+            tags=tags,
+            instructions=meal.get("strInstructions") or "",
+            thumb=_text(meal.get("strMealThumb")),
+            youtube=_text(meal.get("strYoutube")),
+            source=_text(meal.get("strSource")),
+            ingredients=tuple(ingredients),
+            measures=tuple(measures)
+        )
+
+    def to_json(self):
+        """Rebuild the API-shaped dict (for storage and export)"""
+        meal = {
+            "idMeal": self.id,
+            "strMeal": self.name,
+            "strArea": self.area,
+            "strCategory": self.category,
+            "strTags": ",".join(self.tags) or None,
+            "strInstructions": self.instructions,
+            "strMealThumb": self.thumb,
+            "strYoutube": self.youtube,
+            "strSource": self.source or None,
+        }
+        for i in range(MAX_INGREDIENTS):
+            has = i < len(self.ingredients)
+            meal[f"strIngredient{i + 1}"] = self.ingredients[i] if has else ""
+            meal[f"strMeasure{i + 1}"] = self.measures[i] if has else ""
+        return meal
+
+    def items(self):
+        """(measure, ingredient) pairs in recipe order"""
+        return zip(self.measures, self.ingredients)
+
+    def ingredient_lines(self, bullet=""):
+        """Ingredient list formatted one per line, e.g. '• 2 cups Flour'"""
+        return [f"{bullet}{measure} {ingredient}" if measure else f"{bullet}{ingredient}"
+                for measure, ingredient in self.items()]
+
+    def __eq__(self, other):
+        return isinstance(other, Recipe) and other.id == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __repr__(self):
+        return f"Recipe({self.id!r}, {self.name!r})"
@@ -0,0 +1,181 @@
+import math
+import threading
+
+from ingredient_index import recipe_ingredients
+from catalog import normalize
+
+# How much each kind of feature counts before IDF weighting
+INGREDIENT_WEIGHT = 1.0
+AREA_WEIGHT = 1.5
+CATEGORY_WEIGHT = 1.5
+TAG_WEIGHT = 1.0
+
+
+def recipe_features(recipe):
+    """Weighted feature names of a Recipe: its ingredients, area, category and tags"""
+    features = {f"i:{key}": INGREDIENT_WEIGHT for key in recipe_ingredients(recipe)}
+    if recipe.area:
+        features[f"a:{normalize(recipe.area)}"] = AREA_WEIGHT
+    if recipe.category:
+        features[f"c:{normalize(recipe.category)}"] = CATEGORY_WEIGHT
+    for tag in recipe.tags:
+        features[f"t:{normalize(tag)}"] = TAG_WEIGHT
+    return features
+
+
+class Recommender:
+    """"More like this" from a precomputed top-k nearest-neighbour table
+
+    Every recipe is a unit-length TF-IDF vector (rows of a NumPy matrix)
+    and the k most cosine-similar recipes of each one are kept in a table,
+    so a lookup is just a row read. Adding a recipe scores it against the
+    others with one matrix-vector product and slots it into any neighbour
+    lists it beats. IDF weights are fixed when a recipe is added;
+    rebuild() recomputes them for everything.
+    """
+
+    def __init__(self, recipes=(), k=12):
+        self.k = k
+        self._lock = threading.Lock()
+        self.recipes = []
+        self._rows = {}
+        self._columns = {}
+        self._document_counts = []
+        self._features = []
+        self._vectors = None
+        self._neighbors = None
+        self._scores = None
+        recipes = list(recipes)
+        if recipes:
+            self.rebuild(recipes)
+
+    def __len__(self):
+        return len(self.recipes)
+
+    def __contains__(self, meal_id):
+        return meal_id in self._rows
+
+    def _register(self, recipe):
+        """Record a recipe's features and document counts; returns its feature dict"""
+        features = recipe_features(recipe)
+        for name in features:
+            column = self._columns.get(name)
+            if column is None:
+                column = self._columns[name] = len(self._columns)
+                self._document_counts.append(0)
+            self._document_counts[column] += 1
+        self._rows[recipe.id] = len(self.recipes)
+        self.recipes.append(recipe)
+        self._features.append(features)
+        return features
+
+    def _vector(self, features, width):
+        import numpy as np
+
+        vector = np.zeros(width, np.float32)
+        total = len(self.recipes)
+        for name, weight in features.items():
+            column = self._columns[name]
+            idf = math.log((1 + total) / (1 + self._document_counts[column])) + 1
+            vector[column] = weight * idf
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+    def _grow(self, rows, columns):
+        """Make room for at least rows x columns, doubling so adds stay cheap"""
+        import numpy as np
+
+        height, width = self._vectors.shape
+        if rows <= height and columns <= width:
+            return
+        new_height = max(height, rows if rows <= height else max(rows, height * 2))
+        new_width = max(width, columns if columns <= width else max(columns, width * 2))
+        vectors = np.zeros((new_height, new_width), np.float32)
+        vectors[:height, :width] = self._vectors
+        neighbors = np.full((new_height, self.k), -1, np.int32)
+        neighbors[:height] = self._neighbors
+        scores = np.full((new_height, self.k), -np.inf, np.float32)
+        scores[:height] = self._scores
+        self._vectors, self._neighbors, self._scores = vectors, neighbors, scores
+
+    def rebuild(self, recipes=None, chunk=1024):
+        """Recompute every vector and the whole neighbour table"""
+        import numpy as np
+
+        with self._lock:
+            recipes = list(self.recipes if recipes is None else recipes)
+            self.recipes, self._rows, self._columns = [], {}, {}
+            self._document_counts, self._features = [], []
+            for recipe in recipes:
+                if recipe.id not in self._rows:
+                    self._register(recipe)
+
+            count = len(self.recipes)
+            width = max(1, len(self._columns))
+            self._vectors = np.zeros((max(1, count), width), np.float32)
+            for row, features in enumerate(self._features):
+                self._vectors[row] = self._vector(features, width)
+            self._neighbors = np.full((max(1, count), self.k), -1, np.int32)
+            self._scores = np.full((max(1, count), self.k), -np.inf, np.float32)
+
+            # Similarities a block of rows at a time so memory stays bounded
+            vectors = self._vectors[:count]
+            keep = min(self.k, count - 1)
+            for start in range(0, count, chunk):
+                block = vectors[start:start + chunk] @ vectors.T
+                block[np.arange(len(block)), np.arange(start, start + len(block))] = -np.inf
+                if keep <= 0:
+                    continue
+                top = np.argpartition(-block, keep - 1, axis=1)[:, :keep]
+                top_scores = np.take_along_axis(block, top, axis=1)
+                order = np.argsort(-top_scores, axis=1)
+                self._neighbors[start:start + len(block), :keep] = \
+                    np.take_along_axis(top, order, axis=1)
+                self._scores[start:start + len(block), :keep] = \
+                    np.take_along_axis(top_scores, order, axis=1)
+
+    def add(self, recipe):
+        """Index one new Recipe and update the neighbour lists it belongs in"""
+        import numpy as np
+
+        with self._lock:
+            if recipe.id in self._rows:
+                return
+            if self._vectors is None:
+                self._vectors = np.zeros((1, 1), np.float32)
+                self._neighbors = np.full((1, self.k), -1, np.int32)
+                self._scores = np.full((1, self.k), -np.inf, np.float32)
+
+            features = self._register(recipe)
+            row = len(self.recipes) - 1
+            self._grow(row + 1, len(self._columns))
+            vector = self._vector(features, self._vectors.shape[1])
+            self._vectors[row] = vector
+            if row == 0:
+                return
+
+            scores = self._vectors[:row] @ vector
+            keep = min(self.k, row)
+            top = np.argpartition(-scores, keep - 1)[:keep]
+            top = top[np.argsort(-scores[top])]
+            self._neighbors[row, :keep] = top
+            self._scores[row, :keep] = scores[top]
+
+            # Existing recipes that now have a closer neighbour than their worst one
+            for other in np.nonzero(scores > self._scores[:row, -1])[0]:
+                position = int(np.searchsorted(-self._scores[other], -scores[other]))
+                self._neighbors[other, position + 1:] = self._neighbors[other, position:-1]
+                self._scores[other, position + 1:] = self._scores[other, position:-1]
+                self._neighbors[other, position] = row
+                self._scores[other, position] = scores[other]
+
+    def similar(self, recipe, count=10):
+        """Return up to count (Recipe, similarity) pairs most like recipe"""
+        if recipe.id not in self._rows:
+            self.add(recipe)
+        with self._lock:
+            row = self._rows[recipe.id]
+            neighbors = self._neighbors[row, :count].tolist()
+            scores = self._scores[row, :count].tolist()
+        return [(self.recipes[other], score)
+                for other, score in zip(neighbors, scores) if other >= 0]
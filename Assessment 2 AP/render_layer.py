@@ -0,0 +1,95 @@
+import tkinter as tk
+
+
+class RenderBatcher:
+    """Collects view updates and runs them in one idle callback
+
+    schedule(key, render) remembers the latest render function for each
+    key; the first schedule after a flush registers a single after_idle
+    callback. Flipping through ten recipes before Tk gets a chance to draw
+    renders only the last one.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._pending = {}
+        self._idle_id = None
+
+        # Counters
+        self.scheduled = 0
+        self.rendered = 0
+
+    def schedule(self, key, render):
+        self.scheduled += 1
+        self._pending[key] = render
+        if self._idle_id is None:
+            self._idle_id = self.root.after_idle(self.flush)
+
+    def flush(self):
+        """Run every pending render now"""
+        self._idle_id = None
+        pending, self._pending = self._pending, {}
+        for render in pending.values():
+            self.rendered += 1
+            render()
+
+    def cancel(self):
+        if self._idle_id is not None:
+            self.root.after_cancel(self._idle_id)
+            self._idle_id = None
+        self._pending.clear()
+
+    def stats(self):
+        return {"scheduled": self.scheduled, "rendered": self.rendered,
+                "coalesced": self.scheduled - self.rendered - len(self._pending)}
+
+
+class FieldCache:
+    """Applies widget options, text and visibility only when they change"""
+
+    def __init__(self):
+        self._options = {}
+        self._texts = {}
+        self._visible = {}
+
+        # Counters
+        self.applied = 0
+        self.skipped = 0
+
+    def config(self, widget, **options):
+        last = self._options.setdefault(widget, {})
+        changed = {}
+        for name, value in options.items():
+            if name in last and last[name] == value:
+                continue
+            changed[name] = value
+        if changed:
+            widget.config(**changed)
+            last.update(changed)
+            self.applied += 1
+        else:
+            self.skipped += 1
+
+    def set_text(self, widget, content, disabled=False):
+        """Replace the contents of a Text widget if they are different"""
+        if self._texts.get(widget) == content:
+            self.skipped += 1
+            return
+        widget.config(state='normal')
+        widget.delete(1.0, tk.END)
+        widget.insert(tk.END, content)
+        if disabled:
+            widget.config(state='disabled')
+        self._texts[widget] = content
+        self.applied += 1
+
+    def show(self, widget, visible=True, **pack_options):
+        """pack() or pack_forget() a widget if its visibility changes"""
+        if self._visible.get(widget, False) == visible:
+            return
+        if visible:
+            widget.pack(**pack_options)
+        else:
+            widget.pack_forget()
+        self._visible[widget] = visible
+        self.applied += 1
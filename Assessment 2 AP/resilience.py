@@ -0,0 +1,143 @@
+import threading
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while the circuit is open"""
+
+    def __init__(self, retry_in):
+        super().__init__(f"TheMealDB looks unreachable; retrying in {retry_in:.0f}s")
+        self.retry_in = retry_in
+
+
+class TokenBucket:
+    """Client-side rate limit: rate requests per second with bursts up to burst
+
+    acquire() takes a token, sleeping until one is available, so callers on
+    worker threads are spread out instead of hitting the API all at once.
+    """
+
+    def __init__(self, rate=5.0, burst=10):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+        # Counters
+        self.acquired = 0
+        self.throttled = 0
+        self.waited = 0.0
+
+    def _reserve(self):
+        """Take a token now or reserve the next one; returns seconds to wait"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            self.acquired += 1
+            if self._tokens >= 0:
+                return 0.0
+            delay = -self._tokens / self.rate
+            self.throttled += 1
+            self.waited += delay
+            return delay
+
+    def acquire(self):
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def stats(self):
+        return {"rate": self.rate, "burst": self.burst, "acquired": self.acquired,
+                "throttled": self.throttled, "throttle_wait_s": round(self.waited, 3)}
+
+
+class CircuitBreaker:
+    """Stops calling a service that keeps failing, then probes it again
+
+    After failure_threshold failures in a row the circuit opens and
+    before_call() raises CircuitOpenError without touching the network.
+    Once reset_timeout seconds have passed one caller is let through as a
+    half-open probe: its success closes the circuit, its failure opens it
+    again for another reset_timeout. listeners are called with the new
+    state (from whichever thread caused the change).
+    """
+
+    def __init__(self, failure_threshold=3, reset_timeout=15.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.listeners = []
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+        # Counters
+        self.opened = 0
+        self.rejected = 0
+        self.probes = 0
+
+    def retry_in(self):
+        """Seconds until the next probe is allowed (0 unless open)"""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def before_call(self):
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            if self.state == OPEN and self.retry_in() <= 0:
+                changed = self._set_state(HALF_OPEN)
+            elif self.state == HALF_OPEN and not self._probing:
+                changed = None
+            else:
+                self.rejected += 1
+                raise CircuitOpenError(max(self.retry_in(), 1.0))
+            self._probing = True
+            self.probes += 1
+        self._notify(changed)
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            changed = self._set_state(CLOSED)
+        self._notify(changed)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            changed = None
+            if self.state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._probing = False
+                changed = self._set_state(OPEN)
+                if changed:
+                    self.opened += 1
+        self._notify(changed)
+
+    def _set_state(self, state):
+        """Switch state under the lock; returns the new state if it changed"""
+        if self.state == state:
+            return None
+        self.state = state
+        return state
+
+    def _notify(self, state):
+        if state is not None:
+            for listener in list(self.listeners):
+                listener(state)
+
+    def stats(self):
+        return {"state": self.state, "consecutive_failures": self._failures,
+                "opened": self.opened, "rejected": self.rejected, "probes": self.probes,
+                "retry_in_s": round(self.retry_in(), 1)}
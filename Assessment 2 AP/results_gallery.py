@@ -0,0 +1,156 @@
+import tkinter as tk
+
+
+class _Card:
+    """One reusable result card: a thumbnail and a caption on a canvas window"""
+
+    __slots__ = ("frame", "image", "caption", "window", "index", "photo", "channel")
+
+    def __init__(self, canvas, channel, width, placeholder):
+        self.frame = tk.Frame(canvas, bg='#f8f9fa', width=width)
+        self.image = tk.Label(self.frame, bg='#dfe6e9', image=placeholder, bd=0)
+        self.image.pack(padx=4, pady=(4, 2))
+        self.caption = tk.Label(self.frame, bg='#f8f9fa', font=("Segoe UI", 9),
+                                wraplength=width - 8, justify='center', height=2)
+        self.caption.pack(fill='x', padx=4, pady=(0, 4))
+        self.window = canvas.create_window(0, 0, window=self.frame, anchor='nw',
+                                           width=width, state='hidden')
+        self.index = None
+        self.photo = None
+        self.channel = channel
+
+
+class ResultsGallery:
+    """Scrollable grid of result cards that only has widgets for the visible rows
+
+    Items are (meal_id, title, thumbnail URL) tuples. The canvas scroll
+    region is as tall as every row would be, but only enough cards to
+    cover the viewport (plus one row) exist; scrolling moves those cards
+    and points them at other items. Each card loads its thumbnail on its
+    own fetcher channel, so a card scrolled to a new item supersedes the
+    load it had queued for the old one.
+    """
+
+    def __init__(self, parent, images, fetcher, on_open, columns=3,
+                 card_width=150, thumb_size=(140, 90)):
+        self.images = images
+        self.fetcher = fetcher
+        self.on_open = on_open
+        self.columns = columns
+        self.card_width = card_width
+        self.thumb_size = thumb_size
+        self.row_height = thumb_size[1] + 54
+        self.items = []
+        self.cards = []
+        # One blank image keeps empty cards thumbnail-sized
+        self.placeholder = tk.PhotoImage(width=thumb_size[0], height=thumb_size[1])
+
+        self.frame = tk.Frame(parent, bg='white')
+        self.canvas = tk.Canvas(self.frame, bg='white', highlightthickness=0,
+                                width=columns * (card_width + 8),
+                                yscrollincrement=self.row_height // 4)
+        scrollbar = tk.Scrollbar(self.frame, orient='vertical', command=self._yview)
+        self.canvas.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side='right', fill='y')
+        self.canvas.pack(side='left', fill='both', expand=True)
+
+        self.canvas.bind('<Configure>', lambda event: self.refresh())
+        for sequence in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+            self.canvas.bind(sequence, self._on_wheel)
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def set_items(self, items):
+        """Show a new result list from the top"""
+        self.items = list(items)
+        rows = (len(self.items) + self.columns - 1) // self.columns
+        self.canvas.configure(scrollregion=(0, 0, self.columns * (self.card_width + 8),
+                                            rows * self.row_height))
+        self.canvas.yview_moveto(0)
+        for card in self.cards:
+            card.index = None
+        self.refresh()
+
+    def _yview(self, *args):
+        self.canvas.yview(*args)
+        self.refresh()
+
+    def _on_wheel(self, event):
+        if event.num == 4 or event.delta > 0:
+            self.canvas.yview_scroll(-1, 'units')
+        else:
+            self.canvas.yview_scroll(1, 'units')
+        self.refresh()
+
+    def _make_card(self):
+        # Channel names are reused by the next gallery, so they never pile up
+        card = _Card(self.canvas, f"gallery{len(self.cards)}",
+                     self.card_width, self.placeholder)
+        for widget in (card.frame, card.image, card.caption):
+            widget.bind('<Button-1>', lambda event, card=card: self._open(card))
+            for sequence in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+                widget.bind(sequence, self._on_wheel)
+        self.cards.append(card)
+        return card
+
+    def _open(self, card):
+        if card.index is not None:
+            self.on_open(self.items[card.index])
+
+    def refresh(self):
+        """Point the card pool at whichever rows are in view"""
+        height = max(self.canvas.winfo_height(), self.row_height)
+        top = int(self.canvas.canvasy(0))
+        first_row = max(0, top // self.row_height)
+        visible_rows = height // self.row_height + 2
+        needed = visible_rows * self.columns
+        while len(self.cards) < needed:
+            self._make_card()
+
+        first = first_row * self.columns
+        free = [card for card in self.cards
+                if card.index is None or not first <= card.index < first + needed]
+        placed = {card.index for card in self.cards if card not in free}
+        for index in range(first, min(first + needed, len(self.items))):
+            if index not in placed:
+                self._assign(free.pop(), index)
+        for card in free:
+            if card.index is not None:
+                self.fetcher.cancel(card.channel)
+                card.index = None
+                card.photo = None
+                card.image.config(image=self.placeholder)
+            self.canvas.itemconfigure(card.window, state='hidden')
+
+    def _assign(self, card, index):
+        meal_id, title, thumb = self.items[index]
+        card.index = index
+        row, column = divmod(index, self.columns)
+        self.canvas.coords(card.window, column * (self.card_width + 8) + 4,
+                           row * self.row_height + 4)
+        self.canvas.itemconfigure(card.window, state='normal')
+        card.caption.config(text=title)
+
+        photo = self.images.get_photo(thumb, self.thumb_size) if thumb else None
+        card.photo = photo
+        card.image.config(image=photo or self.placeholder)
+        if photo or not thumb:
+            self.fetcher.cancel(card.channel)
+            return
+
+        def work():
+            return self.images.load(thumb, self.thumb_size)
+
+        def done(img):
+            # The card may have been recycled for another item meanwhile
+            if card.index is not None and self.items[card.index][2] == thumb:
+                card.photo = self.images.to_photo(thumb, self.thumb_size, img)
+                card.image.config(image=card.photo)
+
+        self.fetcher.submit(card.channel, work, done, lambda e: None, key=thumb)
+
+    def destroy(self):
+        for card in self.cards:
+            self.fetcher.cancel(card.channel)
+        self.frame.destroy()
@@ -0,0 +1,184 @@
+import re
+
+from ingredient_index import ingredient_key
+
+# Unit aliases -> (dimension, canonical unit, size of one unit in the base unit)
+UNITS = {}
+for names, dimension, unit, factor in (
+    (("ml", "millilitre", "milliliter", "millilitres", "milliliters"), "volume", "ml", 1),
+    (("l", "litre", "liter", "litres", "liters"), "volume", "l", 1000),
+    (("tsp", "tsps", "teaspoon", "teaspoons"), "volume", "tsp", 5),
+    (("tbs", "tbsp", "tbsps", "tblsp", "tablespoon", "tablespoons"), "volume", "tbsp", 15),
+    (("cup", "cups"), "volume", "cup", 240),
+    (("pint", "pints"), "volume", "pint", 568),
+    (("floz", "fl"), "volume", "fl oz", 30),
+    (("g", "gr", "gram", "grams", "gm"), "mass", "g", 1),
+    (("kg", "kgs", "kilogram", "kilograms"), "mass", "kg", 1000),
+    (("oz", "ounce", "ounces"), "mass", "oz", 28.35),
+    (("lb", "lbs", "pound", "pounds"), "mass", "lb", 453.6),
+):
+    for name in names:
+        UNITS[name] = (dimension, unit, factor)
+UNIT_FACTORS = {unit: factor for _, unit, factor in UNITS.values()}
+
+FRACTIONS = {"½": 0.5, "¼": 0.25, "¾": 0.75, "⅓": 1 / 3, "⅔": 2 / 3, "⅛": 0.125}
+
+QUANTITY_RE = re.compile(
+    r"^\s*(?:(\d+(?:\.\d+)?)\s*-\s*)?"            # optional range start, e.g. "2-"
+    r"(\d+\s+\d+/\d+|\d+/\d+|\d+(?:\.\d+)?)?"     # 1 1/2, 1/2, 2, 2.5
+    r"\s*([½¼¾⅓⅔⅛])?\s*(.*)$"
+)
+
+
+def parse_measure(measure):
+    """Split a strMeasure value into (quantity, dimension, unit)
+
+    Returns (None, None, text) when there is no usable quantity, e.g.
+    "pinch" or "to taste". A number without a known unit ("3", "2 large")
+    counts pieces.
+    """
+    text = " ".join((measure or "").split())
+    match = QUANTITY_RE.match(text)
+    number, fraction, rest = match.group(2), match.group(3), match.group(4)
+    if not number and not fraction:
+        return None, None, text
+
+    quantity = 0.0
+    if number:
+        for part in number.split():
+            if "/" in part:
+                top, bottom = part.split("/")
+                quantity += float(top) / float(bottom) if float(bottom) else 0
+            else:
+                quantity += float(part)
+    if fraction:
+        quantity += FRACTIONS[fraction]
+
+    # "200ml" leaves "ml", "2 fl oz" leaves "fl oz"
+    word = rest.lower().split(" ")[0].rstrip(".") if rest else ""
+    if word in UNITS:
+        dimension, unit, factor = UNITS[word]
+        return quantity * factor, dimension, unit
+    return quantity, "count", ""
+
+
+def format_amount(dimension, base, unit, amount_in_unit):
+    """Human-readable amount, keeping the recipe's own unit when all parts agree"""
+    if unit is not None and dimension != "count":
+        value = round(amount_in_unit, 2)
+        plural = "s" if unit in ("cup", "pint") and value != 1 else ""
+        return f"{value:g} {unit}{plural}"
+    if dimension == "volume":
+        return f"{base / 1000:g} l" if base >= 1000 else f"{round(base):g} ml"
+    if dimension == "mass":
+        return f"{base / 1000:g} kg" if base >= 1000 else f"{round(base):g} g"
+    return f"{round(base, 2):g}"
+
+
+class ShoppingItem:
+    """One ingredient on the list with its merged amounts"""
+
+    __slots__ = ("name", "amounts", "notes", "recipes")
+
+    def __init__(self, name):
+        self.name = name
+        # dimension -> [total in base units, unit or None if mixed, total in that unit]
+        self.amounts = {}
+        self.notes = []
+        self.recipes = set()
+
+    def add(self, measure):
+        amount, dimension, unit = parse_measure(measure)
+        if amount is None:
+            if unit and unit not in self.notes:
+                self.notes.append(unit)
+            return
+
+        factor = UNIT_FACTORS.get(unit, 1)
+        entry = self.amounts.get(dimension)
+        if entry is None:
+            self.amounts[dimension] = [amount, unit, amount / factor]
+        else:
+            entry[0] += amount
+            if entry[1] == unit:
+                entry[2] += amount / factor
+            else:
+                entry[1] = None
+
+    def text(self):
+        parts = [format_amount(dimension, *entry) for dimension, entry in self.amounts.items()]
+        parts.extend(self.notes)
+        return f"{self.name} ({' + '.join(parts)})" if parts else self.name
+
+    def to_json(self):
+        return {"name": self.name, "amounts": self.amounts,
+                "notes": self.notes, "recipes": sorted(self.recipes)}
+
+    @classmethod
+    def from_json(cls, data):
+        item = cls(data["name"])
+        item.amounts = {dimension: list(entry) for dimension, entry in data["amounts"].items()}
+        item.notes = list(data["notes"])
+        item.recipes = set(data["recipes"])
+        return item
+
+
+class ShoppingList:
+    """Aggregated shopping list keyed by normalized ingredient
+
+    Adding a recipe merges its measures into existing items ("2 cups" +
+    "200ml" of milk becomes one line) and returns the keys that changed so
+    a view can update just those lines.
+    """
+
+    def __init__(self):
+        self.items = {}
+        self.recipes = set()
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items.values())
+
+    def add(self, ingredient, measure="", recipe_id=None):
+        """Add one ingredient and return its key"""
+        key = ingredient_key(ingredient)
+        item = self.items.get(key)
+        if item is None:
+            item = self.items[key] = ShoppingItem(ingredient)
+        if recipe_id is not None:
+            item.recipes.add(recipe_id)
+        item.add(measure)
+        return key
+
+    def add_recipe(self, recipe):
+        """Merge every ingredient of a Recipe and return the changed keys"""
+        # A recipe added twice should not double its quantities
+        if recipe.id in self.recipes:
+            return []
+        self.recipes.add(recipe.id)
+
+        changed = []
+        for measure, ingredient in recipe.items():
+            key = self.add(ingredient, measure, recipe.id)
+            if key not in changed:
+                changed.append(key)
+        return changed
+
+    def clear(self):
+        self.items.clear()
+        self.recipes.clear()
+
+    def to_json(self):
+        return {"recipes": sorted(self.recipes),
+                "items": [item.to_json() for item in self.items.values()]}
+
+    @classmethod
+    def from_json(cls, data):
+        shopping = cls()
+        shopping.recipes = set(data["recipes"])
+        for entry in data["items"]:
+            item = ShoppingItem.from_json(entry)
+            shopping.items[ingredient_key(item.name)] = item
+        return shopping
@@ -0,0 +1,200 @@
+"""Finds what blocks the Tk mainloop, in the field
+
+A heartbeat scheduled with root.after() stamps the time every interval
+milliseconds; it can only run when the event loop is free. A sampler
+thread watches the stamp and, once a heartbeat is more than threshold
+milliseconds late, snapshots the Tk thread's Python stack every sample
+milliseconds until the loop comes back. Each stall is written to a
+rotating log (~/.cuisine_explorer/stalls.log) with its duration and the
+stacks seen, most common first, and a histogram of stall durations is
+written when the watchdog stops.
+
+CUISINE_STALL_MS sets the threshold (default 100); 0 turns it off.
+"""
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from logging.handlers import RotatingFileHandler
+
+from meal_cache import DATA_DIR
+
+DEFAULT_STALL_MS = 100
+LOG_PATH = os.path.join(DATA_DIR, "stalls.log")
+# Upper bounds of the histogram buckets, in milliseconds
+BUCKETS_MS = (100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+def stall_threshold(setting):
+    """Milliseconds from CUISINE_STALL_MS; a bad value warns and keeps the default"""
+    if setting is None or not setting.strip():
+        return DEFAULT_STALL_MS
+    try:
+        return int(float(setting))
+    except (ValueError, OverflowError):
+        logging.getLogger("cuisine.stalls").warning(
+            "Ignoring CUISINE_STALL_MS=%r (not a number); using %d ms",
+            setting, DEFAULT_STALL_MS)
+        return DEFAULT_STALL_MS
+
+
+STALL_MS = stall_threshold(os.environ.get("CUISINE_STALL_MS"))
+
+
+def bucket_label(i):
+    if i == len(BUCKETS_MS):
+        return f">{BUCKETS_MS[-1]}ms"
+    low = BUCKETS_MS[i - 1] if i else 0
+    return f"{low}-{BUCKETS_MS[i]}ms"
+
+
+class StallWatchdog:
+    """Heartbeat through root.after plus a sampler thread catching late beats
+
+    The Tk side does one assignment per beat. Everything else, including
+    writing the log, happens on the sampler thread. The first beat only
+    sets a baseline, so building the window before mainloop() is not
+    reported as a stall.
+    """
+
+    def __init__(self, root, threshold_ms=STALL_MS, interval_ms=50, sample_ms=10,
+                 log_path=LOG_PATH, max_bytes=1024 * 1024, backups=3):
+        self.root = root
+        self.threshold = threshold_ms / 1000
+        self.interval_ms = interval_ms
+        self.sample = sample_ms / 1000
+        self.log_path = log_path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._last_beat = None
+        self._after_id = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._log = None
+        self._lock = threading.Lock()
+
+        # Counters
+        self.beats = 0
+        self.stalls = 0
+        self.samples = 0
+        self.worst = 0.0
+        self.histogram = [0] * (len(BUCKETS_MS) + 1)
+
+    def start(self):
+        if self._thread is not None or self.threshold <= 0:
+            return
+        self._main_ident = threading.get_ident()
+        self._stop.clear()
+        self._after_id = self.root.after(self.interval_ms, self._beat)
+        self._thread = threading.Thread(target=self._watch, name="stall-watchdog",
+                                        daemon=True)
+        self._thread.start()
+
+    def _beat(self):
+        self._last_beat = time.monotonic()
+        self.beats += 1
+        self._after_id = self.root.after(self.interval_ms, self._beat)
+
+    def _watch(self):
+        interval = self.interval_ms / 1000
+        seen = None
+        stacks = {}
+        while not self._stop.wait(self.sample):
+            beat = self._last_beat
+            if beat is None:
+                continue
+            if beat != seen:
+                if stacks or seen is not None and beat - seen - interval > self.threshold:
+                    self._record(seen + interval, beat, stacks)
+                    stacks = {}
+                seen = beat
+            elif time.monotonic() - beat - interval > self.threshold:
+                stack = self._sample()
+                if stack:
+                    stacks[stack] = stacks.get(stack, 0) + 1
+
+    def _sample(self):
+        """The Tk thread's stack as (filename, line, function) tuples, outermost first"""
+        frame = sys._current_frames().get(self._main_ident)
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append((code.co_filename, frame.f_lineno, code.co_name))
+            frame = frame.f_back
+        return tuple(reversed(stack))
+
+    def _record(self, due, arrived, stacks):
+        """Count one stall and write it to the log"""
+        duration = arrived - due
+        with self._lock:
+            self.stalls += 1
+            self.samples += sum(stacks.values())
+            self.worst = max(self.worst, duration)
+            self.histogram[bisect_left(BUCKETS_MS, duration * 1000)] += 1
+        ranked = sorted(stacks.items(), key=lambda item: -item[1])
+        when = datetime.now() - timedelta(seconds=time.monotonic() - due)
+        lines = [f"{when:%Y-%m-%d %H:%M:%S.%f}"[:-3] +
+                 f" stall {duration * 1000:.0f} ms, {sum(stacks.values())} samples"]
+        if not ranked:
+            lines.append("  (over before a sample was taken)")
+        for stack, count in ranked[:3]:
+            lines.append(f"  {count} x")
+            summary = traceback.StackSummary.from_list(
+                [traceback.FrameSummary(*entry) for entry in stack])
+            lines.extend("    " + line.rstrip().replace("\n", "\n    ")
+                         for line in summary.format())
+        if len(ranked) > 3:
+            lines.append(f"  ... {len(ranked) - 3} other stacks")
+        self._write("\n".join(lines))
+
+    def _write(self, text):
+        if self._log is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.log_path)), exist_ok=True)
+            self._log = logging.getLogger(f"cuisine.stalls.{id(self)}")
+            self._log.propagate = False
+            self._log.setLevel(logging.INFO)
+            handler = RotatingFileHandler(self.log_path, maxBytes=self.max_bytes,
+                                          backupCount=self.backups, encoding="utf-8",
+                                          delay=True)
+            self._log.addHandler(handler)
+        self._log.info(text)
+
+    def histogram_text(self):
+        with self._lock:
+            counts = list(self.histogram)
+        width = max(counts) or 1
+        return "\n".join(f"  {bucket_label(i):>12} {count:6} {'#' * (40 * count // width)}"
+                         for i, count in enumerate(counts))
+
+    def stop(self):
+        """Stop beating and sampling, and log the stall histogram"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        if self._after_id is not None:
+            try:
+                self.root.after_cancel(self._after_id)
+            except Exception:
+                pass  # The window may already be gone
+            self._after_id = None
+        if self.stalls:
+            self._write(f"{datetime.now():%Y-%m-%d %H:%M:%S} session: {self.stalls} stalls "
+                        f"over {self.threshold * 1000:.0f} ms in {self.beats} beats, "
+                        f"worst {self.worst * 1000:.0f} ms\n{self.histogram_text()}")
+        if self._log is not None:
+            for handler in list(self._log.handlers):
+                handler.close()
+                self._log.removeHandler(handler)
+
+    def stats(self):
+        with self._lock:
+            return {"stalls": self.stalls, "worst_ms": round(self.worst * 1000),
+                    "samples": self.samples, "beats": self.beats,
+                    "histogram": {bucket_label(i): count
+                                  for i, count in enumerate(self.histogram) if count}}
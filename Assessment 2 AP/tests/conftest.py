@@ -0,0 +1,7 @@
+import os
+import sys
+import tempfile
+
+# Modules live next to the app script; keep test runs out of ~/.cuisine_explorer
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("CUISINE_DATA_DIR", tempfile.mkdtemp(prefix="cuisine_tests_"))
@@ -0,0 +1,18 @@
+"""Small Recipe builders shared by the tests"""
+from recipe import Recipe
+
+
+def meal(meal_id, *ingredients, area="", category=""):
+    """A Recipe with the given ingredients, each measured as "1" """
+    data = {"idMeal": str(meal_id), "strMeal": f"Meal {meal_id}",
+            "strArea": area, "strCategory": category,
+            "strInstructions": f"Cook meal {meal_id}."}
+    for i, name in enumerate(ingredients, 1):
+        data[f"strIngredient{i}"] = name
+        data[f"strMeasure{i}"] = "1"
+    return Recipe.from_json(data)
+
+
+def numbered(i):
+    """A distinct, stable Recipe for each number"""
+    return meal(52700 + i, f"Ingredient {i}", "Salt", area="British", category="Beef")
@@ -0,0 +1,21 @@
+from ingredient_index import IngredientIndex, ingredient_key
+from meals import meal
+
+
+def test_plurals_share_a_key():
+    assert ingredient_key("Tomatoes") == ingredient_key(" tomato ")
+    assert ingredient_key("Cherry Tomatoes") == "cherry tomato"
+    assert ingredient_key("Potatoes") == "potato"
+    assert ingredient_key("Chillies") == ingredient_key("Chilli")
+    assert ingredient_key("Cherries") == "cherry"
+    assert ingredient_key("Eggs") == "egg"
+
+
+def test_words_ending_in_s_are_kept():
+    for name in ("Asparagus", "Couscous", "Hummus", "Swiss Chard"):
+        assert ingredient_key(name) == name.lower()
+
+
+def test_tomato_finds_tomatoes_recipe():
+    index = IngredientIndex([meal("1", "Tomatoes", "Basil"), meal("2", "Rice")])
+    assert [meal_id for meal_id, _, _ in index.search(["tomato"])] == ["1"]
@@ -0,0 +1,20 @@
+from meal_planner import MealPlanner
+from meals import meal
+
+
+def test_one_category_catalog_never_repeats_a_meal():
+    recipes = [meal(i, f"Beef cut {i}", "Onion", category="Beef") for i in range(10)]
+    recipes.append(meal(100, "Sugar", "Flour", category="Dessert"))
+    week, distinct = MealPlanner(recipes).plan(seed=1)
+
+    ids = [recipe.id for recipe in week]
+    assert len(ids) == 7
+    assert len(set(ids)) == 7
+    ingredients = {key for recipe in week for key in recipe.ingredients} - {"Sugar"}
+    assert distinct == len(ingredients)
+
+
+def test_short_catalog_gives_a_short_plan():
+    recipes = [meal(i, "Beef", category="Beef") for i in range(3)]
+    week, _ = MealPlanner(recipes).plan(seed=1)
+    assert sorted(recipe.id for recipe in week) == ["0", "1", "2"]
@@ -0,0 +1,13 @@
+from stall_watchdog import DEFAULT_STALL_MS, stall_threshold
+
+
+def test_threshold_setting():
+    assert stall_threshold(None) == DEFAULT_STALL_MS
+    assert stall_threshold("250") == 250
+    assert stall_threshold("0") == 0
+
+
+def test_bad_threshold_setting_keeps_default(caplog):
+    for setting in ("abc", "100ms", "inf", "nan"):
+        assert stall_threshold(setting) == DEFAULT_STALL_MS
+    assert "CUISINE_STALL_MS" in caplog.text
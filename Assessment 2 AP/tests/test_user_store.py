@@ -0,0 +1,65 @@
+import json
+
+from meals import numbered as recipe
+from user_store import UserStore
+
+
+def test_replay_restores_state(tmp_path):
+    path = str(tmp_path / "user.jsonl")
+    store = UserStore(path)
+    store.add_favorite(recipe(1))
+    store.add_favorite(recipe(2))
+    store.remove_favorite(recipe(1).id)
+    store.plan_meal("Monday", recipe(3))
+    store.add_recipe_to_shopping(recipe(3))
+    store.set_last_viewed(recipe(4))
+    store.close()
+
+    store = UserStore(path)
+    assert store.favorites == [recipe(2).id]
+    assert store.meal_plan == {"Monday": recipe(3).id}
+    assert recipe(3).id in store.shopping.recipes
+    assert store.last_viewed == recipe(4).id
+    assert store.get(recipe(2).id).name == recipe(2).name
+    assert store.get(recipe(1).id) is None
+    store.close()
+
+
+def test_partial_last_line_is_cut_off(tmp_path):
+    path = str(tmp_path / "user.jsonl")
+    store = UserStore(path)
+    store.add_favorite(recipe(1))
+    store.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"op": "favorite_add", "id": "9')  # Crash mid-write
+
+    store = UserStore(path)
+    assert store.favorites == [recipe(1).id]
+    store.add_favorite(recipe(2))
+    store.close()
+
+    store = UserStore(path)
+    assert store.favorites == [recipe(1).id, recipe(2).id]
+    store.close()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            json.loads(line)
+
+
+def test_views_are_compacted(tmp_path):
+    path = str(tmp_path / "user.jsonl")
+    store = UserStore(path, min_compact_lines=50)
+    store.add_favorite(recipe(0))
+    for i in range(1, 2001):
+        store.set_last_viewed(recipe(i))
+    assert set(store.recipes) == {recipe(0).id, recipe(2000).id}
+    assert store._lines < 60
+    store.close()
+
+    with open(path, encoding="utf-8") as f:
+        assert sum(1 for _ in f) < 60
+    store = UserStore(path)
+    assert store.favorites == [recipe(0).id]
+    assert store.last_viewed == recipe(2000).id
+    assert set(store.recipes) == {recipe(0).id, recipe(2000).id}
+    store.close()
@@ -0,0 +1,151 @@
+import heapq
+import math
+import re
+import threading
+from collections import Counter
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from in into is it of on or the then to with
+until over your you about all each
+""".split())
+
+# How much a term found in each field counts towards the score
+NAME_WEIGHT = 3.0
+TAG_WEIGHT = 2.0
+INSTRUCTIONS_WEIGHT = 1.0
+
+
+def tokenize(text):
+    """Lowercase words of text without stopwords"""
+    return [word for word in WORD_RE.findall(text.lower()) if word not in STOPWORDS]
+
+
+def trigrams(term):
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TextSearch:
+    """Local full-text recipe search with BM25 ranking and typo tolerance
+
+    Meal names, tags and instructions are indexed into one weighted
+    inverted index. Query words that are not in the vocabulary (or look
+    like typos) are expanded to similar terms through a trigram index over
+    the vocabulary.
+    """
+
+    def __init__(self, recipes=(), k1=1.2, b=0.75, fuzzy_threshold=0.4, max_expansions=4):
+        self.k1 = k1
+        self.b = b
+        self.fuzzy_threshold = fuzzy_threshold
+        self.max_expansions = max_expansions
+
+        self._lock = threading.Lock()
+        self.meal_ids = []
+        self.doc_lengths = []
+        self.total_length = 0.0
+        self.postings = {}
+        self.term_trigrams = {}
+        self._rows = {}
+        self._norms = None
+        for recipe in recipes:
+            self.add(recipe)
+
+    def __len__(self):
+        return len(self.meal_ids)
+
+    def add(self, recipe):
+        """Index one Recipe, or re-index it if its ID is already known"""
+        meal_id = recipe.id
+        weights = Counter()
+        for text, weight in ((recipe.name, NAME_WEIGHT),
+                             (" ".join(recipe.tags), TAG_WEIGHT),
+                             (recipe.instructions, INSTRUCTIONS_WEIGHT)):
+            for term in tokenize(text):
+                weights[term] += weight
+
+        with self._lock:
+            row = self._rows.get(meal_id)
+            if row is None:
+                row = len(self.meal_ids)
+                self._rows[meal_id] = row
+                self.meal_ids.append(meal_id)
+                self.doc_lengths.append(0.0)
+            else:
+                self.total_length -= self.doc_lengths[row]
+                for term_postings in self.postings.values():
+                    term_postings.pop(row, None)
+
+            self._norms = None
+            length = sum(weights.values())
+            self.doc_lengths[row] = length
+            self.total_length += length
+            for term, tf in weights.items():
+                term_postings = self.postings.get(term)
+                if term_postings is None:
+                    term_postings = self.postings[term] = {}
+                    for gram in trigrams(term):
+                        self.term_trigrams.setdefault(gram, set()).add(term)
+                term_postings[row] = tf
+
+    def expand(self, word):
+        """Return (term, weight) pairs for a query word, including close misspellings"""
+        expansions = []
+        if word in self.postings:
+            expansions.append((word, 1.0))
+            if len(word) < 5:
+                return expansions
+
+        grams = trigrams(word)
+        shared = Counter()
+        for gram in grams:
+            for term in self.term_trigrams.get(gram, ()):
+                shared[term] += 1
+
+        candidates = []
+        for term, common in shared.items():
+            if term == word:
+                continue
+            similarity = common / (len(grams) + len(trigrams(term)) - common)
+            if similarity >= self.fuzzy_threshold:
+                candidates.append((similarity, term))
+        candidates.sort(reverse=True)
+        for similarity, term in candidates[:self.max_expansions]:
+            # Exact hits should always outrank fuzzy ones
+            expansions.append((term, similarity * 0.8))
+        return expansions
+
+    def search(self, query, page=0, page_size=20):
+        """Return (total_matches, [(meal_id, score), ...]) for one page of results"""
+        words = tokenize(query)
+        if not words:
+            return 0, []
+
+        with self._lock:
+            count = len(self.meal_ids)
+            if not count:
+                return 0, []
+            if self._norms is None:
+                # BM25 length normalisation only changes when documents do
+                avg_length = self.total_length / count
+                self._norms = [self.k1 * (1 - self.b + self.b * length / avg_length)
+                               for length in self.doc_lengths]
+            norms = self._norms
+            boost = self.k1 + 1
+            scores = Counter()
+
+            for word in words:
+                for term, weight in self.expand(word):
+                    term_postings = self.postings[term]
+                    df = len(term_postings)
+                    idf = math.log(1 + (count - df + 0.5) / (df + 0.5))
+                    factor = weight * idf * boost
+                    for row, tf in term_postings.items():
+                        scores[row] += factor * tf / (tf + norms[row])
+
+            start = page * page_size
+            ranked = heapq.nlargest(start + page_size, scores.items(), key=lambda item: item[1])
+            return len(scores), [(self.meal_ids[row], score)
+                                 for row, score in ranked[start:]]
@@ -0,0 +1,131 @@
+"""Timing spans for fetch, parse, decode and render, exported as Chrome trace JSON
+
+Set CUISINE_TRACE=1 to record spans into ~/.cuisine_explorer/trace.json,
+or set it to a file path. The trace is written when the program exits and
+opens in chrome://tracing or https://ui.perfetto.dev. When the variable
+is unset, span() hands back one shared no-op object and traced() returns
+the function untouched, so instrumented code costs next to nothing.
+"""
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from meal_cache import DATA_DIR
+
+_setting = os.environ.get("CUISINE_TRACE", "")
+ENABLED = _setting not in ("", "0")
+TRACE_PATH = os.path.join(DATA_DIR, "trace.json") if _setting in ("1", "true", "yes") \
+    else _setting
+
+_T0 = time.perf_counter()
+_events = deque(maxlen=200000)
+_recent = {}
+_counts = {}
+_threads = {}
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """Records one complete ("X") trace event when the with-block ends"""
+
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        tid = threading.get_ident()
+        if tid not in _threads:
+            _threads[tid] = threading.current_thread().name
+        event = {"name": self.name, "cat": self.name.split(".")[0], "ph": "X",
+                 "ts": (self.start - _T0) * 1e6, "dur": (end - self.start) * 1e6,
+                 "pid": os.getpid(), "tid": tid}
+        if self.args or exc_type:
+            event["args"] = dict(self.args, error=repr(exc)) if exc_type else self.args
+        _events.append(event)
+
+        recent = _recent.get(self.name)
+        if recent is None:
+            recent = _recent.setdefault(self.name, deque(maxlen=200))
+        recent.append(end - self.start)
+        _counts[self.name] = _counts.get(self.name, 0) + 1
+        return False
+
+
+def span(name, **args):
+    """Context manager timing a block as a span called name"""
+    if not ENABLED:
+        return _NULL_SPAN
+    return Span(name, args)
+
+
+def traced(name):
+    """Decorator recording every call of a function as a span"""
+    def decorate(func):
+        if not ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with Span(name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def summary():
+    """Per-span count and recent p50/p95/last durations in milliseconds"""
+    result = {}
+    for name, recent in list(_recent.items()):
+        samples = sorted(recent)
+        if not samples:
+            continue
+        result[name] = {
+            "count": _counts.get(name, 0),
+            "p50_ms": samples[len(samples) // 2] * 1000,
+            "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000,
+            "last_ms": recent[-1] * 1000,
+        }
+    return result
+
+
+def export(path=None):
+    """Write every recorded span as Chrome trace-event JSON and return the path"""
+    path = path or TRACE_PATH
+    pid = os.getpid()
+    events = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+               "args": {"name": name}} for tid, name in list(_threads.items())]
+    events.extend(list(_events))
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    os.replace(tmp, path)
+    return path
+
+
+if ENABLED:
+    atexit.register(export)
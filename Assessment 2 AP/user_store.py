@@ -0,0 +1,207 @@
+import json
+import os
+import threading
+
+from meal_cache import DATA_DIR
+from recipe import Recipe
+from shopping_list import ShoppingList
+
+
+class UserStore:
+    """Favorites, shopping list and meal plan saved to an append-only journal
+
+    Everything is keyed by idMeal and each referenced recipe is kept as a
+    snapshot, so opening a favorite or a planned meal never needs the
+    network. Each change appends one JSON line; once the journal holds many
+    more lines than live records it is compacted into a single snapshot
+    line and atomically swapped in.
+    """
+
+    def __init__(self, path=None, compact_ratio=4, min_compact_lines=200):
+        self.path = path or os.path.join(DATA_DIR, "user_data.jsonl")
+        self.compact_ratio = compact_ratio
+        self.min_compact_lines = min_compact_lines
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.recipes = {}
+        self.favorites = []
+        self.meal_plan = {}
+        self.shopping = ShoppingList()
+        self.shopping_started = False
+        self.last_viewed = None
+        self._lines = 0
+
+        self._replay()
+        self._journal = open(self.path, "a", encoding="utf-8")
+
+    def _replay(self):
+        """Rebuild state from the journal, cutting off a torn final line
+
+        A crash can leave the last entry without its newline. It is cut back
+        to the previous newline, so the next entry starts on a line of its
+        own instead of being glued onto the fragment and lost with it.
+        """
+        try:
+            journal = open(self.path, "r+b")
+        except FileNotFoundError:
+            return
+        with journal:
+            end = 0
+            for line in journal:
+                if not line.endswith(b"\n"):
+                    journal.truncate(end)
+                    break
+                end += len(line)
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # Corrupt line; the rest of the journal still applies
+                self._apply(entry)
+                self._lines += 1
+
+    def _apply(self, entry):
+        """Apply one journal entry; shopping entries return the changed keys"""
+        op = entry["op"]
+        released = ()
+        if "recipe" in entry:
+            recipe = Recipe.from_json(entry["recipe"])
+            self.recipes[recipe.id] = recipe
+
+        if op == "snapshot":
+            self.recipes = {}
+            for meal in entry["recipes"]:
+                recipe = Recipe.from_json(meal)
+                self.recipes[recipe.id] = recipe
+            self.favorites = list(entry["favorites"])
+            self.meal_plan = dict(entry["meal_plan"])
+            self.shopping = ShoppingList.from_json(entry["shopping"])
+            self.shopping_started = entry["shopping_started"]
+            self.last_viewed = entry.get("last_viewed")
+        elif op == "favorite_add":
+            if entry["id"] not in self.favorites:
+                self.favorites.append(entry["id"])
+        elif op == "favorite_remove":
+            if entry["id"] in self.favorites:
+                self.favorites.remove(entry["id"])
+            released = (entry["id"],)
+        elif op == "plan_set":
+            released = (self.meal_plan.get(entry["day"]),)
+            self.meal_plan[entry["day"]] = entry["id"]
+        elif op == "plan_clear":
+            released = (self.meal_plan.pop(entry["day"], None),)
+        elif op == "shopping_recipe":
+            self.shopping_started = True
+            return self.shopping.add_recipe(self.recipes[entry["id"]])
+        elif op == "shopping_item":
+            self.shopping_started = True
+            return [self.shopping.add(entry["name"], entry.get("measure", ""))]
+        elif op == "last_viewed":
+            released = (self.last_viewed,)
+            self.last_viewed = entry["id"]
+        elif op == "shopping_clear":
+            released = tuple(self.shopping.recipes)
+            self.shopping.clear()
+            self.shopping_started = True
+        self._release(released)
+
+    def _release(self, meal_ids):
+        """Drop recipe snapshots that nothing refers to any more"""
+        for meal_id in meal_ids:
+            if meal_id in self.recipes and meal_id != self.last_viewed and \
+                    meal_id not in self.favorites and meal_id not in self.shopping.recipes \
+                    and meal_id not in self.meal_plan.values():
+                del self.recipes[meal_id]
+
+    def _write(self, entry):
+        """Apply a change and append it to the journal"""
+        with self._lock:
+            result = self._apply(entry)
+            self._journal.write(json.dumps(entry) + "\n")
+            self._journal.flush()
+            self._lines += 1
+            if self._lines >= self.min_compact_lines and \
+                    self._lines > self.compact_ratio * self._live_records():
+                self._compact()
+        return result
+
+    def _live_records(self):
+        return len(self._used_recipes()) + len(self.favorites) + len(self.meal_plan) + len(self.shopping)
+
+    def _used_recipes(self):
+        """IDs of the recipes that something still refers to"""
+        used = set(self.favorites) | set(self.meal_plan.values()) | self.shopping.recipes
+        used.add(self.last_viewed)
+        return [meal_id for meal_id in used if meal_id in self.recipes]
+
+    def _snapshot(self):
+        return {
+            "op": "snapshot",
+            "recipes": [self.recipes[meal_id].to_json() for meal_id in self._used_recipes()],
+            "favorites": self.favorites,
+            "meal_plan": self.meal_plan,
+            "shopping": self.shopping.to_json(),
+            "shopping_started": self.shopping_started,
+            "last_viewed": self.last_viewed,
+        }
+
+    def _compact(self):
+        """Replace the journal with a single snapshot line"""
+        snapshot = self._snapshot()
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(json.dumps(snapshot) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal.close()
+        os.replace(tmp, self.path)
+        self._journal = open(self.path, "a", encoding="utf-8")
+        self._lines = 1
+        self.recipes = {meal_id: self.recipes[meal_id] for meal_id in self._used_recipes()}
+
+    def compact(self):
+        with self._lock:
+            self._compact()
+
+    def get(self, meal_id):
+        """Return the saved snapshot of a recipe, or None"""
+        return self.recipes.get(meal_id)
+
+    def add_favorite(self, recipe):
+        """Add a recipe to favorites; returns False if it is already there"""
+        if recipe.id in self.favorites:
+            return False
+        self._write({"op": "favorite_add", "id": recipe.id, "recipe": recipe.to_json()})
+        return True
+
+    def remove_favorite(self, meal_id):
+        self._write({"op": "favorite_remove", "id": meal_id})
+
+    def plan_meal(self, day, recipe):
+        self._write({"op": "plan_set", "day": day, "id": recipe.id, "recipe": recipe.to_json()})
+
+    def clear_plan(self, day):
+        self._write({"op": "plan_clear", "day": day})
+
+    def set_last_viewed(self, recipe):
+        """Remember the recipe on screen so the next start can show it instantly"""
+        if recipe.id != self.last_viewed:
+            self._write({"op": "last_viewed", "id": recipe.id, "recipe": recipe.to_json()})
+
+    def add_recipe_to_shopping(self, recipe):
+        """Merge a recipe into the shopping list and return the changed keys"""
+        if recipe.id in self.shopping.recipes:
+            return []
+        return self._write({"op": "shopping_recipe", "id": recipe.id,
+                            "recipe": recipe.to_json()})
+
+    def add_shopping_item(self, name, measure=""):
+        """Add a single item and return its key"""
+        return self._write({"op": "shopping_item", "name": name, "measure": measure})[0]
+
+    def clear_shopping(self):
+        self._write({"op": "shopping_clear"})
+
+    def close(self):
+        with self._lock:
+            self._journal.close()